@@ -0,0 +1,255 @@
+# =========================
+# BUFFERED ACTIVITY LOG
+# =========================
+# Server-side audit events (login, planting created, recommendation generated,
+# ...) used to cost every request a second commit. record() now only puts the
+# row on a bounded in-memory queue; one background writer drains it and writes
+# batches in a single transaction each. When the queue is full the caller
+# writes its row inline, so a slow disk applies backpressure instead of
+# dropping events.
+#
+# Sinks: DatabaseSink appends to the main database's user_actions table, which
+# is what every reader queries. MonthlySQLiteSink writes one SQLite file per
+# month (activity-YYYY-MM.db) that can be shipped off or deleted whole; it is
+# used as an archive copy behind the database (ArchivingSink), not instead of it.
+#
+# Readers get read-your-writes through pending(user_id) + flush(): flush()
+# wakes the writer instead of waiting out flush_interval.
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# fsync policy -> PRAGMA synchronous for the monthly files (WAL journal)
+#   always: fsync on every batch commit
+#   batch:  fsync at WAL checkpoints; a power loss can lose the last batches, never corrupt
+#   off:    leave it to the OS
+FSYNC_POLICIES = {'always': 'FULL', 'batch': 'NORMAL', 'off': 'OFF'}
+
+COLUMNS = ('user_id', 'planting_id', 'action_type', 'details', 'created_at')
+
+_FLUSH = object()  # queue marker: write what has been collected now
+
+
+class DatabaseSink:
+    """Appends batches to a user_actions table through a SQLAlchemy engine"""
+
+    def __init__(self, engine, table):
+        self.engine = engine
+        self.table = table
+
+    def write(self, rows):
+        with self.engine.begin() as conn:
+            conn.execute(self.table.insert(), rows)
+
+
+class MonthlySQLiteSink:
+    """One SQLite file per calendar month of created_at, same columns as user_actions"""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS user_actions ("
+        "action_id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, planting_id INTEGER, "
+        "action_type VARCHAR(50) NOT NULL, details TEXT, created_at DATETIME)",
+        "CREATE INDEX IF NOT EXISTS ix_user_actions_user_created ON user_actions (user_id, created_at)"
+    )
+
+    def __init__(self, directory, fsync='batch'):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {sorted(FSYNC_POLICIES)}")
+        self.directory = directory
+        self.fsync = fsync
+        self._connections = {}  # 'YYYY-MM' -> sqlite3 connection
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, month):
+        return os.path.join(self.directory, f'activity-{month}.db')
+
+    def partitions(self):
+        """Months that have a file, oldest first"""
+        return sorted(name[len('activity-'):-len('.db')] for name in os.listdir(self.directory)
+                      if name.startswith('activity-') and name.endswith('.db'))
+
+    def _connection(self, month):
+        conn = self._connections.get(month)
+        if conn is None:
+            conn = sqlite3.connect(self.path(month), check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={FSYNC_POLICIES[self.fsync]}')
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._connections[month] = conn
+        return conn
+
+    def write(self, rows):
+        by_month = {}
+        for row in rows:
+            by_month.setdefault(row['created_at'].strftime('%Y-%m'), []).append(row)
+        with self._lock:
+            for month, batch in by_month.items():
+                conn = self._connection(month)
+                with conn:  # one transaction per partition
+                    conn.executemany(
+                        f"INSERT INTO user_actions ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                        [(r['user_id'], r['planting_id'], r['action_type'], r['details'],
+                          r['created_at'].strftime('%Y-%m-%d %H:%M:%S.%f')) for r in batch]
+                    )
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+
+
+class ArchivingSink:
+    """Writes to primary, then copies the batch to archive.
+
+    The primary write decides success; an archive failure is only counted, so a
+    retry never writes the primary rows twice.
+    """
+
+    def __init__(self, primary, archive):
+        self.primary = primary
+        self.archive = archive
+        self.archive_errors = 0
+
+    def write(self, rows):
+        self.primary.write(rows)
+        try:
+            self.archive.write(rows)
+        except Exception as e:
+            self.archive_errors += 1
+            print(f"⚠️ Activity archive skipped {len(rows)} rows: {e}")
+
+
+def encode_details(details):
+    """details as stored in user_actions.details: JSON text or None"""
+    if details is None:
+        return None
+    if isinstance(details, str):
+        try:
+            json.loads(details)
+            return details
+        except ValueError:
+            pass
+    return json.dumps(details)
+
+
+class ActivityLog:
+    def __init__(self, sink, max_queue=10000, batch_size=500, flush_interval=0.5):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._done = threading.Condition()
+        self._enqueued = 0
+        self._written = 0  # rows handled by the writer, written or failed
+        self._pending_users = {}  # user_id -> queued rows not yet handled by the writer
+        self.counters = {'recorded': 0, 'written': 0, 'batches': 0, 'inline_writes': 0, 'write_errors': 0, 'lost': 0}
+
+    # ---------- producers ----------
+    def record(self, user_id, action_type, planting_id=None, details=None, created_at=None):
+        """Queue one action; details may be any JSON-serialisable value or a JSON string.
+
+        A string that is not valid JSON is stored as a JSON string literal, so
+        user_actions.details always holds JSON.
+        """
+        row = {
+            'user_id': user_id,
+            'planting_id': planting_id,
+            'action_type': action_type,
+            'details': encode_details(details),
+            'created_at': created_at or datetime.utcnow()
+        }
+        self._ensure_writer()
+        with self._done:
+            self.counters['recorded'] += 1
+            try:
+                self._queue.put_nowait(row)
+                self._enqueued += 1
+                self._pending_users[user_id] = self._pending_users.get(user_id, 0) + 1
+                return
+            except queue.Full:
+                self.counters['inline_writes'] += 1
+        self._write([row])
+
+    # ---------- writer ----------
+    def _ensure_writer(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _FLUSH:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if row is _FLUSH:
+                    break
+                batch.append(row)
+            self._write(batch)
+            with self._done:
+                self._written += len(batch)
+                for row in batch:
+                    left = self._pending_users.pop(row['user_id'], 1) - 1
+                    if left:
+                        self._pending_users[row['user_id']] = left
+                self._done.notify_all()
+
+    def _write(self, rows):
+        try:
+            self.sink.write(rows)
+        except Exception as e:
+            # One retry covers a transient "database is locked"; after that the rows are lost
+            try:
+                self.sink.write(rows)
+            except Exception:
+                with self._done:
+                    self.counters['write_errors'] += 1
+                    self.counters['lost'] += len(rows)
+                print(f"⚠️ Activity log dropped {len(rows)} rows: {e}")
+                return
+        with self._done:
+            self.counters['written'] += len(rows)
+            self.counters['batches'] += 1
+
+    def pending(self, user_id):
+        """True while rows recorded for user_id are still queued"""
+        return user_id in self._pending_users
+
+    def flush(self, timeout=5.0):
+        """Wait until every row queued before the call has been written; False on timeout"""
+        with self._done:
+            target = self._enqueued
+            if self._written >= target:
+                return True
+            try:
+                self._queue.put_nowait(_FLUSH)  # don't wait for flush_interval to run out
+            except queue.Full:
+                pass  # the writer is already working through full batches
+            return self._done.wait_for(lambda: self._written >= target, timeout=timeout)
+
+    def stats(self):
+        return dict(self.counters, queued=self._queue.qsize(), max_queue=self._queue.maxsize,
+                    batch_size=self.batch_size, flush_interval=self.flush_interval,
+                    sink=type(self.sink).__name__)
@@ -1,71 +1,160 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
 import joblib
 import numpy as np
-import pandas as pd
-import requests
-from sklearn.svm import SVC
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.tree import DecisionTreeClassifier
+import io
 import json
 import os
+import threading
+import zipfile
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from activity_log import ActivityLog, ArchivingSink, DatabaseSink, MonthlySQLiteSink
+from change_events import UserChangeTracker
+from crop_reference import CropReferenceIndex
+from dashboard_cache import DashboardCache
+from event_hub import EventHub, TooManyConnections
+from inference_backends import load_backend
+from inference_batcher import InferenceBatcher
+from model_registry import ModelRegistry
+from notifications import NotificationService, local_midnight_utc
+from prediction_cache import create_prediction_cache, perceptual_hash
+from schema_migrations import apply_migrations, create_indexes
+import sqlite_profile
+from weather_cache import WeatherCache
+from weather_client import WeatherHTTPClient
 
 load_dotenv()
 
-# --- Keras model for image-based pest/disease detection (H5) ---
 try:
-    from tensorflow.keras.models import load_model
-    from tensorflow.keras.preprocessing.image import img_to_array
-    from PIL import Image
-    import io
+    import image_preprocess
 except Exception:
-    # If imports fail, we'll handle at runtime when endpoint is called
-    load_model = None
-    img_to_array = None
-    Image = None
-    io = None
-
-# Global holder for the Keras model and labels
-crop_model = None
-class_labels = []
-
-def initialize_keras_model():
-    global crop_model, class_labels
-    model_path = os.path.join('models', 'crop_disease_pest_model.h5')
+    # If Pillow is missing, image endpoints report an error at runtime
+    image_preprocess = None
+
+# ============================================
+# MODEL REGISTRY
+# ============================================
+# Models load lazily (first use) or in a background warm-up thread so the app
+# starts serving login/dashboard/sync immediately.
+# MODEL_WARMUP: 'background' (default), 'lazy' (first use only) or 'eager'.
+MODEL_WARMUP = os.getenv('MODEL_WARMUP', 'background').lower()
+model_registry = ModelRegistry()
+
+# --- Crop disease CNN (Keras H5 or an exported TFLite / ONNX artifact) ---
+def load_class_labels():
+    """Build class labels from dataset folder structure if available"""
     dataset_dir = os.path.join('dataset')
+    if os.path.isdir(dataset_dir):
+        return sorted([d for d in os.listdir(dataset_dir) if os.path.isdir(os.path.join(dataset_dir, d))])
+    return []
+
+class_labels = load_class_labels()
+
+KERAS_MODEL_PATH = os.path.join('models', 'crop_disease_pest_model.h5')
+
+# Which runtime serves the CNN: 'auto' (TFLite, then ONNX, then Keras, whichever
+# artifact exists - see model_export.py), 'tflite', 'onnx', 'keras', or
+# 'tflite_int8' for the quantized model from model_quantize.py (never auto)
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'auto').lower()
+INFERENCE_THREADS = int(os.getenv('INFERENCE_THREADS', '0')) or None
+
+def initialize_crop_model():
+    """Registry loader: the inference backend for the crop disease CNN"""
+    backend = load_backend(INFERENCE_BACKEND, KERAS_MODEL_PATH, num_threads=INFERENCE_THREADS)
+    print(f'✅ Crop CNN loaded ({backend.name}) from', backend.path)
+    if prediction_cache:
+        prediction_cache.bind_model(backend.path)  # cache keys follow the file actually served
+    return backend
+
+model_registry.register('crop_cnn', initialize_crop_model)
+
+def get_crop_model(wait=True):
+    """Return the crop CNN backend, loading it on first use (None if unavailable)"""
+    return model_registry.get('crop_cnn', wait=wait)
+
+# Micro-batching queue in front of crop_model (created on first prediction)
+PREDICT_MAX_BATCH_SIZE = int(os.getenv('PREDICT_MAX_BATCH_SIZE', 16))
+PREDICT_MAX_WAIT_MS = float(os.getenv('PREDICT_MAX_WAIT_MS', 5))
+predict_batcher = None
+_predict_batcher_lock = threading.Lock()
+
+def predict_with_crop_model(batch):
+    """Batcher predict_fn: looks the backend up per batch so a reloaded model takes over"""
+    model = get_crop_model()
+    if model is None:
+        raise RuntimeError('Model not loaded on server')
+    return model.predict(batch)
+
+def get_predict_batcher():
+    """Return the shared InferenceBatcher for crop_model, or None if no model is loaded"""
+    global predict_batcher
+    if get_crop_model() is None:
+        return None
+    with _predict_batcher_lock:
+        if predict_batcher is None:
+            predict_batcher = InferenceBatcher(
+                predict_with_crop_model,
+                max_batch_size=PREDICT_MAX_BATCH_SIZE,
+                max_wait_ms=PREDICT_MAX_WAIT_MS
+            )
+    return predict_batcher
+
+# Batch prediction settings (/api/predict/batch)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+PREDICT_BATCH_CHUNK = int(os.getenv('PREDICT_BATCH_CHUNK', 16))
+PREDICT_BATCH_MAX_FILES = int(os.getenv('PREDICT_BATCH_MAX_FILES', 200))
+# Per-image and per-request caps on decoded bytes (zip entries are checked
+# against their declared uncompressed size before anything is inflated)
+PREDICT_BATCH_MAX_FILE_BYTES = int(os.getenv('PREDICT_BATCH_MAX_FILE_BYTES', 20 * 1024 * 1024))
+PREDICT_BATCH_MAX_TOTAL_BYTES = int(os.getenv('PREDICT_BATCH_MAX_TOTAL_BYTES', 200 * 1024 * 1024))
+_decode_pool = ThreadPoolExecutor(
+    max_workers=int(os.getenv('PREDICT_DECODE_WORKERS', min(4, os.cpu_count() or 1))),
+    thread_name_prefix='image-decode'
+)
+
+def reload_crop_model():
+    """Prediction cache saw the model file change: serve the new file from the next request on"""
+    print('🔄 Crop CNN file changed, reloading')
+    model_registry.reload('crop_cnn')
+
+# Exact + near-duplicate prediction cache (PREDICTION_CACHE=memory|sqlite|off);
+# bound to the served model file by initialize_crop_model, disabled until then
+prediction_cache = create_prediction_cache(on_model_change=reload_crop_model)
+
+def decode_upload(name, data, out):
+    """Worker-pool task: decodes into out (a row of the chunk's batch array); returns (name, error)"""
     try:
-        if load_model and os.path.exists(model_path):
-            crop_model = load_model(model_path)
-            print('✅ Keras H5 model loaded from', model_path)
-        else:
-            print('Keras load_model not available or model file missing:', model_path)
-
-        # Build class labels from dataset folder structure if available
-        if os.path.isdir(dataset_dir):
-            class_labels = sorted([d for d in os.listdir(dataset_dir) if os.path.isdir(os.path.join(dataset_dir, d))])
-            print('Detected class labels:', class_labels)
-        else:
-            class_labels = []
+        image_preprocess.preprocess(io.BytesIO(data), out=out)
+        return name, None
     except Exception as e:
-        print('Failed to initialize Keras model:', e)
-        crop_model = None
-        class_labels = []
-
-# Initialize model at startup (best-effort)
-initialize_keras_model()
+        return name, str(e)
+
+def build_top_predictions(probs, k=3):
+    """Map a probability row to the top-k [{'label', 'score'}] list returned by the API"""
+    indexed = list(enumerate(probs))
+    indexed.sort(key=lambda x: x[1], reverse=True)
+    results = []
+    for idx, score in indexed[:k]:
+        label = class_labels[idx] if idx < len(class_labels) else f'Class {idx}'
+        results.append({'label': label, 'score': float(score)})
+    return results
 
 app = Flask(__name__)
 CORS(app)
 
 # Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///smart_crop_system.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///smart_crop_system.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'default')  # 'default' or opt-in 'production' (WAL + pragmas)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_profile.engine_options(app.config['SQLALCHEMY_DATABASE_URI'], SQLITE_PROFILE)
 db = SQLAlchemy(app)
+with app.app_context():
+    sqlite_profile.install(db.engine, SQLITE_PROFILE)
 
 # ============================================
 # LOAD ML MODELS FROM PICKLE FILES
@@ -138,8 +227,11 @@ class MLModelManager:
         except Exception as e:
             print(f"❌ Error loading ML models: {e}")
 
-# Initialize ML models
-ml_models = MLModelManager()
+model_registry.register('ml_models', MLModelManager)
+
+def get_ml_models(wait=True):
+    """Return the MLModelManager, loading the pickles on first use"""
+    return model_registry.get('ml_models', wait=wait)
 
 # ============================================
 # DATABASE MODELS (SENSOR-FREE VERSION)
@@ -180,6 +272,7 @@ class CropMaster(db.Model):
 
 class UserCrop(db.Model):
     __tablename__ = 'user_crops'
+    __table_args__ = (db.Index('ix_user_crops_user_active', 'user_id', 'is_active'),)
     planting_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     crop_type = db.Column(db.String(50), nullable=False)
@@ -204,6 +297,7 @@ class UserCrop(db.Model):
 # MANUAL OBSERVATIONS instead of sensor readings
 class ManualObservation(db.Model):
     __tablename__ = 'manual_observations'
+    __table_args__ = (db.Index('ix_manual_observations_planting_date', 'planting_id', 'observation_date'),)
     observation_id = db.Column(db.Integer, primary_key=True)
     planting_id = db.Column(db.Integer, db.ForeignKey('user_crops.planting_id'), nullable=False)
     observation_date = db.Column(db.Date, nullable=False)
@@ -226,6 +320,7 @@ class ManualObservation(db.Model):
 
 class ImageAnalysis(db.Model):
     __tablename__ = 'image_analyses'
+    __table_args__ = (db.Index('ix_image_analyses_planting_date', 'planting_id', 'analysis_date'),)
     analysis_id = db.Column(db.Integer, primary_key=True)
     planting_id = db.Column(db.Integer, db.ForeignKey('user_crops.planting_id'), nullable=False)
     analysis_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -244,6 +339,9 @@ class ImageAnalysis(db.Model):
 
 class Recommendation(db.Model):
     __tablename__ = 'recommendations'
+    __table_args__ = (
+        db.Index('ix_recommendations_planting_implemented_date', 'planting_id', 'implemented', 'recommendation_date'),
+    )
     recommendation_id = db.Column(db.Integer, primary_key=True)
     planting_id = db.Column(db.Integer, db.ForeignKey('user_crops.planting_id'), nullable=False)
     recommendation_date = db.Column(db.Date, nullable=False)
@@ -269,6 +367,7 @@ class Recommendation(db.Model):
 # -------------------------
 class UserAction(db.Model):
     __tablename__ = 'user_actions'
+    __table_args__ = (db.Index('ix_user_actions_user_created', 'user_id', 'created_at'),)
     action_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     planting_id = db.Column(db.Integer, db.ForeignKey('user_crops.planting_id'))
@@ -319,6 +418,7 @@ class GrowthMilestone(db.Model):
 
 class Notification(db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (db.Index('ix_notifications_user_read_created', 'user_id', 'is_read', 'created_at'),)
     notification_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
     planting_id = db.Column(db.Integer, db.ForeignKey('user_crops.planting_id'))
@@ -329,12 +429,182 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     scheduled_for = db.Column(db.DateTime)
 
+class SyncCheckpoint(db.Model):
+    """Last record sequence number committed for a user's streamed sync upload"""
+    __tablename__ = 'sync_checkpoints'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), primary_key=True)
+    stream_id = db.Column(db.String(64), primary_key=True)
+    last_seq = db.Column(db.Integer, nullable=False, default=0)
+    records = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class JobCheckpoint(db.Model):
+    """Progress of a resumable batch job (bulk_recommend.py), committed with each chunk's rows"""
+    __tablename__ = 'job_checkpoints'
+    job = db.Column(db.String(64), primary_key=True)
+    run_date = db.Column(db.Date, nullable=False)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Boolean, nullable=False, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# ============================================
+# CHANGE TRACKING & DASHBOARD SNAPSHOT CACHE
+# ============================================
+
+def planting_owner(planting_ids):
+    """{planting_id: user_id}, read on its own connection (called after commit)"""
+    with db.engine.connect() as conn:
+        rows = conn.execute(
+            db.select(UserCrop.planting_id, UserCrop.user_id).where(UserCrop.planting_id.in_(list(planting_ids)))
+        )
+        return {pid: uid for pid, uid in rows}
+
+change_tracker = UserChangeTracker(
+    [User, UserCrop, Recommendation, Notification, ManualObservation, CropMaster, GrowthMilestone], planting_owner
+)
+change_tracker.install(db.session)
+
+def load_crop_reference():
+    """All CropMaster and GrowthMilestone rows as plain dicts"""
+    with db.engine.connect() as conn:
+        crops = [dict(r) for r in conn.execute(db.select(CropMaster.__table__)).mappings()]
+        milestones = [dict(r) for r in conn.execute(
+            db.select(GrowthMilestone.__table__).order_by(GrowthMilestone.milestone_id)
+        ).mappings()]
+    return crops, milestones
+
+crop_reference = CropReferenceIndex(load_crop_reference)
+
+def invalidate_crop_reference(changes):
+    if any(tables & {'crops_master', 'growth_milestones'} for tables in changes.values()):
+        crop_reference.invalidate()
+
+change_tracker.subscribe(invalidate_crop_reference)
+
+# Invalidation only reaches this process: other workers, the CLI and
+# bulk_recommend.py write without telling it, so the TTL bounds how long their
+# changes can be missed.
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '30'))
+dashboard_cache = DashboardCache(ttl_seconds=DASHBOARD_CACHE_TTL) if DASHBOARD_CACHE_TTL > 0 else None
+if dashboard_cache:
+    change_tracker.subscribe(dashboard_cache.on_changes)
+
+# ============================================
+# ACTIVITY LOG (BUFFERED USER ACTION WRITES)
+# ============================================
+# Audit events recorded by the server itself go through activity_log.record()
+# and are written in batches by a background thread, off the request path.
+# user_actions stays the table every reader uses; with ACTIVITY_LOG_DIR set the
+# same rows are also copied to monthly SQLite files there as an archive.
+# Readers of a user's actions call wait_for_activity_log() first, so a user
+# sees their own just-recorded events.
+ACTIVITY_LOG_DIR = os.getenv('ACTIVITY_LOG_DIR')
+ACTIVITY_LOG_FSYNC = os.getenv('ACTIVITY_LOG_FSYNC', 'batch')  # always | batch | off (monthly files only)
+
+def create_activity_log():
+    with app.app_context():
+        sink = DatabaseSink(db.engine, UserAction.__table__)
+    if ACTIVITY_LOG_DIR:
+        sink = ArchivingSink(sink, MonthlySQLiteSink(ACTIVITY_LOG_DIR, fsync=ACTIVITY_LOG_FSYNC))
+    return ActivityLog(
+        sink,
+        max_queue=int(os.getenv('ACTIVITY_LOG_QUEUE', '10000')),
+        batch_size=int(os.getenv('ACTIVITY_LOG_BATCH', '500')),
+        flush_interval=float(os.getenv('ACTIVITY_LOG_FLUSH_MS', '500')) / 1000.0
+    )
+
+activity_log = create_activity_log()
+atexit.register(activity_log.flush)
+
+def wait_for_activity_log(user_id):
+    """Write the user's queued audit events before their actions are read"""
+    if activity_log.pending(user_id):
+        activity_log.flush()
+
+# ============================================
+# NOTIFICATIONS (OUTBOX, UNREAD COUNTERS, SCHEDULING)
+# ============================================
+with app.app_context():
+    notification_service = NotificationService(
+        db.engine, Notification.__table__,
+        max_queue=int(os.getenv('NOTIFICATION_QUEUE', '10000')),
+        batch_size=int(os.getenv('NOTIFICATION_BATCH', '200')),
+        flush_interval=float(os.getenv('NOTIFICATION_FLUSH_MS', '200')) / 1000.0,
+        count_ttl=float(os.getenv('NOTIFICATION_COUNT_TTL', '30'))  # s; bounds staleness from other workers
+    )
+change_tracker.subscribe(notification_service.on_changes)
+if dashboard_cache:
+    notification_service.subscribe(dashboard_cache.on_changes)
+atexit.register(notification_service.flush)
+NOTIFICATIONS_MAX_LIMIT = 100
+
+# ============================================
+# PUSH EVENTS (SERVER-SENT EVENTS)
+# ============================================
+# Dashboards keep one /events stream open instead of polling; commits touching
+# a user's rows wake that user's streams through event_hub.
+SSE_MAX_CONNECTIONS = int(os.getenv('SSE_MAX_CONNECTIONS', '200'))
+SSE_MAX_PER_USER = int(os.getenv('SSE_MAX_PER_USER', '5'))
+SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', '15'))
+SSE_RETRY_MS = 5000
+
+event_hub = EventHub(max_connections=SSE_MAX_CONNECTIONS, max_per_user=SSE_MAX_PER_USER)
+change_tracker.subscribe(event_hub.on_changes)
+notification_service.subscribe(event_hub.on_changes)
+
+# ============================================
+# SCHEMA MIGRATIONS (EXISTING DATABASES)
+# ============================================
+
+def model_index(model, name):
+    return next(ix for ix in model.__table__.indexes if ix.name == name)
+
+MIGRATIONS = [
+    (1, 'composite indexes for hot query paths', create_indexes(
+        model_index(ManualObservation, 'ix_manual_observations_planting_date'),
+        model_index(Recommendation, 'ix_recommendations_planting_implemented_date'),
+        model_index(UserAction, 'ix_user_actions_user_created'),
+        model_index(ImageAnalysis, 'ix_image_analyses_planting_date'),
+        model_index(Notification, 'ix_notifications_user_read_created'),
+        model_index(UserCrop, 'ix_user_crops_user_active')
+    )),
+]
+
 # ============================================
 # SVM DECISION ENGINE (SENSOR-FREE)
 # ============================================
 
+def is_missing(value):
+    """Scalar equivalent of pd.isna (pandas is only imported by offline scripts)"""
+    if value is None:
+        return True
+    try:
+        return bool(np.isnan(value))
+    except TypeError:
+        return False
+
+def float_column(values):
+    """Column as a float array; None and values float() rejects become NaN"""
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        out = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except (TypeError, ValueError):
+                pass
+        return out
+
 class SmartCropDecisionEngine:
+    # Column order for 2-D array input to predict_action_batch (all encoded)
+    BATCH_FEATURE_COLUMNS = ['visual_health', 'pest_pressure', 'growth_stage', 'days_elapsed', 'weather', 'temperature']
+    ACTION_NAMES = np.array(['no_action', 'irrigate', 'fertilize', 'pesticide', 'monitor', 'harvest'], dtype=object)
+    WEATHER_NAMES = np.array(['sunny', 'cloudy', 'rainy', 'storm'], dtype=object)
+    TEMP_NAMES = np.array(['cold', 'cool', 'optimal', 'warm', 'hot'], dtype=object)
+
     def __init__(self):
+        from sklearn.preprocessing import StandardScaler
         self.svm_model = None
         self.scaler = StandardScaler()
         self.load_or_train_model()
@@ -342,7 +612,8 @@ class SmartCropDecisionEngine:
     def load_or_train_model(self):
         """Load trained SVM model or use loaded pickle model"""
         try:
-            if ml_models.svm_model:
+            ml_models = get_ml_models()
+            if ml_models and ml_models.svm_model:
                 self.svm_model = ml_models.svm_model
                 self.scaler = ml_models.svm_scaler
                 print("✅ SVM model loaded from pickle file")
@@ -382,7 +653,7 @@ class SmartCropDecisionEngine:
         return temp_map.get(temp_category, 2)
     
     def encode_action(self, action_str):
-        if pd.isna(action_str):
+        if is_missing(action_str):
             return 0
         action_map = {
             'no_action': 0,
@@ -397,7 +668,7 @@ class SmartCropDecisionEngine:
         return action_str
     
     def categorize_pressure(self, score):
-        if pd.isna(score):
+        if is_missing(score):
             return 1
         if score < 1.5:
             return 0  # low
@@ -450,6 +721,151 @@ class SmartCropDecisionEngine:
             print(f"SVM prediction error: {e}")
             return self.rule_based_decision(features_dict)
     
+    def _batch_columns(self, features):
+        """Normalize DataFrame / list of feature dicts / 2-D array into column arrays + row dicts"""
+        defaults = {
+            'visual_health': 1, 'pest_pressure': 0, 'growth_stage': 1, 'days_elapsed': 30,
+            'weather': 0, 'temperature': 2
+        }
+        if isinstance(features, (list, tuple)) and (not features or isinstance(features[0], dict)):
+            rows = list(features)
+            cols = {k: np.array([r.get(k, d) for r in rows], dtype=object) for k, d in defaults.items()}
+            # rule_based_decision reads these keys (and its own growth_stage default)
+            cols['rule_stage'] = np.array([r.get('growth_stage', 'vegetative') for r in rows], dtype=object)
+            cols['weather_forecast'] = np.array([r.get('weather_forecast', 'sunny') for r in rows], dtype=object)
+            cols['temperature_category'] = np.array([r.get('temperature_category', 'optimal') for r in rows], dtype=object)
+            return cols, rows
+
+        if hasattr(features, 'columns'):
+            # DataFrame: use whichever columns exist, defaults for the rest
+            n = len(features)
+            cols = {
+                k: (features[k].to_numpy(dtype=object) if k in features.columns else np.full(n, d, dtype=object))
+                for k, d in defaults.items()
+            }
+            cols['rule_stage'] = (features['growth_stage'].to_numpy(dtype=object)
+                                  if 'growth_stage' in features.columns else np.full(n, 'vegetative', dtype=object))
+            for key, names, code_col in (('weather_forecast', self.WEATHER_NAMES, 'weather'),
+                                         ('temperature_category', self.TEMP_NAMES, 'temperature')):
+                if key in features.columns:
+                    cols[key] = features[key].to_numpy(dtype=object)
+                else:
+                    cols[key] = names[cols[code_col].astype(int)]
+            return cols, None
+
+        # 2-D array in BATCH_FEATURE_COLUMNS order; categories decoded from the codes
+        X = np.asarray(features)
+        if X.ndim != 2 or X.shape[1] != len(self.BATCH_FEATURE_COLUMNS):
+            raise ValueError(f'Expected an (n, {len(self.BATCH_FEATURE_COLUMNS)}) array')
+        cols = {k: X[:, i] for i, k in enumerate(self.BATCH_FEATURE_COLUMNS)}
+        cols['rule_stage'] = cols['growth_stage']
+        cols['weather_forecast'] = self.WEATHER_NAMES[cols['weather'].astype(int)]
+        cols['temperature_category'] = self.TEMP_NAMES[cols['temperature'].astype(int)]
+        return cols, None
+
+    def predict_action_batch(self, features):
+        """
+        Vectorized predict_action for many plantings: one scaler.transform and one
+        predict_proba call (label taken from the argmax) for the whole batch.
+        Accepts a DataFrame, a list of feature dicts or a 2-D array (BATCH_FEATURE_COLUMNS).
+        Rows with missing or non-numeric features get the rule-based decision,
+        as predict_action gives them, while the rest still go through the SVM.
+        Returns: (actions, confidences, reasonings) numpy arrays
+        """
+        cols, rows = self._batch_columns(features)
+        n = len(cols['visual_health'])
+        if n == 0:
+            empty = np.array([], dtype=object)
+            return empty, np.array([], dtype=float), empty
+
+        if not self.svm_model:
+            return self.rule_based_decision_batch(cols)
+
+        X = np.column_stack([
+            float_column(cols['visual_health']),
+            float_column(cols['pest_pressure']),
+            float_column(cols['growth_stage']),
+            np.minimum(float_column(cols['days_elapsed']) / 100, 1),
+            float_column(cols['weather']),
+            float_column(cols['temperature'])
+        ])
+        model_rows = np.flatnonzero(np.isfinite(X).all(axis=1))
+        probabilities = None
+        if len(model_rows):
+            try:
+                probabilities = self.svm_model.predict_proba(self.scaler.transform(X[model_rows]))
+            except Exception as e:
+                print(f"SVM batch prediction error: {e}")
+                model_rows = model_rows[:0]
+
+        actions = np.empty(n, dtype=object)
+        confidences = np.empty(n, dtype=float)
+        reasonings = np.empty(n, dtype=object)
+        fallback = np.ones(n, dtype=bool)
+        fallback[model_rows] = False
+        if fallback.any():
+            actions[fallback], confidences[fallback], reasonings[fallback] = \
+                self.rule_based_decision_batch({k: v[fallback] for k, v in cols.items()})
+        if not len(model_rows):
+            return actions, confidences, reasonings
+
+        best = probabilities.argmax(axis=1)
+        confidences[model_rows] = probabilities[np.arange(len(model_rows)), best]
+        labels = np.asarray(self.svm_model.classes_)[best].astype(int)
+        known = (labels >= 0) & (labels < len(self.ACTION_NAMES))
+        actions[model_rows] = np.where(known, self.ACTION_NAMES[np.clip(labels, 0, len(self.ACTION_NAMES) - 1)],
+                                       'no_action')
+
+        # Reasoning text depends on a handful of fields; memoize identical inputs
+        memo = {}
+        for i in model_rows:
+            row = rows[i] if rows is not None else {
+                'growth_stage': cols['rule_stage'][i],
+                'visual_health': cols['visual_health'][i],
+                'pest_pressure': cols['pest_pressure'][i],
+                'days_elapsed': cols['days_elapsed'][i],
+                'weather_forecast': cols['weather_forecast'][i],
+                'temperature_category': cols['temperature_category'][i]
+            }
+            key = (actions[i], confidences[i] < 0.7, row.get('days_elapsed', 0) > 100,
+                   row.get('weather_forecast'), row.get('temperature_category'), row.get('estimated_moisture'),
+                   row.get('growth_stage'), row.get('visual_health'), row.get('leaf_color'),
+                   row.get('pest_pressure', 0) >= 2, row.get('disease_symptoms'))
+            if key not in memo:
+                memo[key] = self.generate_reasoning(actions[i], row, confidences[i])
+            reasonings[i] = memo[key]
+
+        return actions, confidences, reasonings
+
+    def rule_based_decision_batch(self, cols):
+        """rule_based_decision evaluated with numpy masks; cols as built by _batch_columns"""
+        visual_health = float_column(cols['visual_health'])
+        pest_pressure = float_column(cols['pest_pressure'])
+        days_elapsed = float_column(cols['days_elapsed'])
+        stage = np.asarray(cols['rule_stage'], dtype=object)
+        weather = cols['weather_forecast']
+        temp = cols['temperature_category']
+
+        # Same precedence as rule_based_decision: first matching rule wins
+        conditions = [
+            (pest_pressure == 3) | (visual_health == 3),
+            (stage == 'flowering') & (visual_health <= 1),
+            np.isin(temp, ['warm', 'hot']) & np.isin(weather, ['sunny', 'cloudy']),
+            weather == 'rainy',
+            (stage == 'mature') & (days_elapsed > 100)
+        ]
+        conditions = [np.asarray(c, dtype=bool) for c in conditions]
+        actions = np.select(conditions, ['pesticide', 'fertilize', 'irrigate', 'no_action', 'monitor'], 'monitor')
+        confidences = np.select(conditions, [0.85, 0.8, 0.75, 0.9, 0.7], 0.6)
+        reasonings = np.select(conditions, [
+            "High pest pressure or poor plant health detected",
+            "Flowering stage requires nutrients",
+            "Hot dry weather requires watering",
+            "Rain forecasted, conserve resources",
+            "Crop is mature, monitor for harvest"
+        ], "Conditions normal, continue monitoring")
+        return actions.astype(object), confidences.astype(float), reasonings.astype(object)
+
     def rule_based_decision(self, features):
         """Rule-based decision system (no sensors needed)"""
         visual_health = features.get('visual_health', 1)  # 1 = good
@@ -526,98 +942,132 @@ class SmartCropDecisionEngine:
         
         return ". ".join(reasons) if reasons else "System recommendation"
 
-# Initialize decision engine
-decision_engine = SmartCropDecisionEngine()
+model_registry.register('decision_engine', SmartCropDecisionEngine)
+
+def get_decision_engine(wait=True):
+    """Return the SVM decision engine, building it on first use"""
+    return model_registry.get('decision_engine', wait=wait)
+
+if MODEL_WARMUP == 'eager':
+    model_registry.warm_up(['ml_models', 'decision_engine', 'crop_cnn'], background=False)
+elif MODEL_WARMUP == 'background':
+    model_registry.warm_up(['ml_models', 'decision_engine', 'crop_cnn'])
 
 # ============================================
 # WEATHER SERVICE
 # ============================================
 
 class WeatherService:
-    def __init__(self):
+    def __init__(self, cache=None, client=None, max_concurrency=8):
         self.api_key = os.getenv('OPENWEATHER_API_KEY', 'your_api_key_here')
-        self.base_url = "http://api.openweathermap.org/data/2.5"
-    
+        self.base_url = os.getenv('OPENWEATHER_BASE_URL', "http://api.openweathermap.org/data/2.5")
+        self.cache = cache
+        self.client = client or WeatherHTTPClient(max_concurrency=max_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=self.client.max_concurrency, thread_name_prefix='weather')
+
+    def _request(self, endpoint, lat, lon):
+        url = f"{self.base_url}/{endpoint}?lat={lat}&lon={lon}&appid={self.api_key}&units=metric"
+        return self.client.get_json(url)
+
+    def fetch_weather(self, lat, lon):
+        """Current weather straight from the API (raises on failure)"""
+        data = self._request('weather', lat, lon)
+        main = data['main']
+        weather = data['weather'][0]
+
+        # Categorize temperature
+        temp = main['temp']
+        if temp < 10:
+            temp_category = 'cold'
+        elif temp < 18:
+            temp_category = 'cool'
+        elif temp < 28:
+            temp_category = 'optimal'
+        elif temp < 35:
+            temp_category = 'warm'
+        else:
+            temp_category = 'hot'
+
+        # Categorize weather
+        description = weather['description'].lower()
+        if 'rain' in description or 'drizzle' in description:
+            weather_category = 'rainy'
+        elif 'storm' in description or 'thunder' in description:
+            weather_category = 'storm'
+        elif 'cloud' in description:
+            weather_category = 'cloudy'
+        else:
+            weather_category = 'sunny'
+
+        return {
+            'temperature': temp,
+            'temperature_category': temp_category,
+            'humidity': main['humidity'],
+            'description': weather['description'],
+            'weather_category': weather_category,
+            'wind_speed': data['wind']['speed']
+        }
+
+    def fetch_forecast(self, lat, lon):
+        """5-day forecast straight from the API (raises on failure)"""
+        data = self._request('forecast', lat, lon)
+        forecasts = []
+        for item in data['list'][:8:2]:  # Next 4 days, every 12 hours
+            date = datetime.fromtimestamp(item['dt'])
+            main = item['main']
+            weather = item['weather'][0]
+
+            forecasts.append({
+                'date': date.strftime('%Y-%m-%d'),
+                'time': date.strftime('%H:%M'),
+                'temperature': main['temp'],
+                'humidity': main['humidity'],
+                'description': weather['description'],
+                'precipitation': item.get('rain', {}).get('3h', 0)
+            })
+        return forecasts
+
     def get_weather(self, lat, lon):
-        """Get current weather from API"""
+        """Get current weather (grid-cached), mock data if the API fails"""
         try:
-            url = f"{self.base_url}/weather?lat={lat}&lon={lon}&appid={self.api_key}&units=metric"
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            
-            if response.status_code == 200:
-                main = data['main']
-                weather = data['weather'][0]
-                
-                # Categorize temperature
-                temp = main['temp']
-                if temp < 10:
-                    temp_category = 'cold'
-                elif temp < 18:
-                    temp_category = 'cool'
-                elif temp < 28:
-                    temp_category = 'optimal'
-                elif temp < 35:
-                    temp_category = 'warm'
-                else:
-                    temp_category = 'hot'
-                
-                # Categorize weather
-                description = weather['description'].lower()
-                if 'rain' in description or 'drizzle' in description:
-                    weather_category = 'rainy'
-                elif 'storm' in description or 'thunder' in description:
-                    weather_category = 'storm'
-                elif 'cloud' in description:
-                    weather_category = 'cloudy'
-                else:
-                    weather_category = 'sunny'
-                
-                return {
-                    'temperature': temp,
-                    'temperature_category': temp_category,
-                    'humidity': main['humidity'],
-                    'description': weather['description'],
-                    'weather_category': weather_category,
-                    'wind_speed': data['wind']['speed']
-                }
-            else:
-                return self.get_mock_weather()
-                
+            if self.cache:
+                return self.cache.get('current', lat, lon, self.fetch_weather)
+            return self.fetch_weather(lat, lon)
         except Exception as e:
             print(f"Weather API error: {e}")
             return self.get_mock_weather()
-    
+
     def get_forecast(self, lat, lon):
-        """Get 5-day forecast"""
+        """Get 5-day forecast (grid-cached), mock data if the API fails"""
         try:
-            url = f"{self.base_url}/forecast?lat={lat}&lon={lon}&appid={self.api_key}&units=metric"
-            response = requests.get(url, timeout=10)
-            data = response.json()
-            
-            if response.status_code == 200:
-                forecasts = []
-                for item in data['list'][:8:2]:  # Next 4 days, every 12 hours
-                    date = datetime.fromtimestamp(item['dt'])
-                    main = item['main']
-                    weather = item['weather'][0]
-                    
-                    forecasts.append({
-                        'date': date.strftime('%Y-%m-%d'),
-                        'time': date.strftime('%H:%M'),
-                        'temperature': main['temp'],
-                        'humidity': main['humidity'],
-                        'description': weather['description'],
-                        'precipitation': item.get('rain', {}).get('3h', 0)
-                    })
-                return forecasts
-            else:
-                return self.get_mock_forecast()
-                
+            if self.cache:
+                return self.cache.get('forecast', lat, lon, self.fetch_forecast)
+            return self.fetch_forecast(lat, lon)
         except Exception as e:
             print(f"Forecast API error: {e}")
             return self.get_mock_forecast()
-    
+
+    def get_weather_and_forecast(self, lat, lon):
+        """Current weather and forecast fetched concurrently"""
+        forecast = self._pool.submit(self.get_forecast, lat, lon)
+        current = self.get_weather(lat, lon)
+        return current, forecast.result()
+
+    def get_weather_many(self, locations):
+        """Current weather for a list of (lat, lon), one upstream call per grid cell"""
+        keys = [self.cache.cell(lat, lon) if self.cache else (lat, lon) for lat, lon in locations]
+        unique = {}
+        for key, location in zip(keys, locations):
+            unique.setdefault(key, location)
+        futures = {key: self._pool.submit(self.get_weather, *location) for key, location in unique.items()}
+        return [futures[key].result() for key in keys]
+
+    def stats(self):
+        return {
+            'client': self.client.stats(),
+            'cache': self.cache.stats() if self.cache else None
+        }
+
     def get_mock_weather(self):
         """Mock weather for testing"""
         temp = 25 + np.random.randn() * 5
@@ -648,7 +1098,23 @@ class WeatherService:
             })
         return forecasts
 
-weather_service = WeatherService()
+def create_weather_cache():
+    """WEATHER_CACHE=off disables caching; grid size and TTLs come from env"""
+    if os.getenv('WEATHER_CACHE', 'on').lower() in ('off', '0', 'false'):
+        return None
+    return WeatherCache(
+        grid_deg=float(os.getenv('WEATHER_GRID_DEG', '0.1')),
+        ttls={
+            'current': int(os.getenv('WEATHER_CURRENT_TTL', '600')),
+            'forecast': int(os.getenv('WEATHER_FORECAST_TTL', '3600'))
+        },
+        stale_seconds=int(os.getenv('WEATHER_STALE_SECONDS', '1800'))
+    )
+
+weather_service = WeatherService(
+    cache=create_weather_cache(),
+    max_concurrency=int(os.getenv('WEATHER_MAX_CONCURRENCY', '8'))
+)
 
 # ============================================
 # PROGRESS CALCULATOR
@@ -668,30 +1134,74 @@ def calculate_growth_progress(planting_date, total_days):
     progress = min(99.9, (days_elapsed / total_days) * 100)
     return round(progress, 2)
 
+PEST_DEDUCTIONS = {'low': -5, 'medium': -15, 'high': -30}
+
+def compute_crop_status_batch(planting_dates, crop_types, pest_levels=None, disease_flags=None,
+                              last_observation_dates=None, total_days=None, default_total_days=120, today=None):
+    """Vectorised calculate_growth_progress / determine_growth_stage / calculate_health_score.
+
+    Takes parallel sequences (one entry per planting) and returns a dict of numpy
+    arrays: days_elapsed, progress, stage, days_remaining, health_score.
+    total_days overrides the per-crop CropMaster value (e.g. from a joined query).
+    """
+    n = len(planting_dates)
+    today = np.datetime64(today or datetime.now().date(), 'D')
+    crop_types = np.array(crop_types, dtype=object)
+
+    planted = np.array(planting_dates, dtype='datetime64[D]')
+    has_date = ~np.isnat(planted)
+    elapsed = np.where(has_date, (today - np.where(has_date, planted, today)).astype(np.int64), 0)
+    elapsed = np.maximum(elapsed, 0)
+
+    if total_days is None:
+        totals = np.empty(n, dtype=np.float64)
+        for crop_type in set(crop_types.tolist()):
+            totals[crop_types == crop_type] = crop_reference.total_growth_days(crop_type, default_total_days)
+    else:
+        totals = np.array([t if t else default_total_days for t in total_days], dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        progress = np.where(totals > 0, np.minimum(99.9, elapsed / totals * 100), 0.0)
+    progress = np.round(np.where(has_date, progress, 0.0), 2)
+    days_remaining = np.maximum(0, totals - elapsed).astype(np.int64)
+
+    # Stage: one searchsorted per distinct crop over its sorted milestone days
+    stage = np.full(n, 'seedling', dtype=object)
+    for crop_type in set(crop_types.tolist()):
+        if not crop_type:
+            continue
+        mask = crop_types == crop_type
+        days, stages = crop_reference.milestone_arrays(crop_type)
+        idx = np.searchsorted(days, elapsed[mask], side='right') - 1
+        stage[mask] = np.where(idx >= 0, stages[np.maximum(idx, 0)], 'seedling')
+
+    health = np.full(n, 100.0)
+    if disease_flags is not None:
+        health -= 20 * np.array([bool(d) for d in disease_flags])
+    if pest_levels is not None:
+        health += np.array([PEST_DEDUCTIONS.get(p, 0) for p in pest_levels], dtype=np.float64)
+    if last_observation_dates is not None:
+        observed = np.array(last_observation_dates, dtype='datetime64[D]')
+        has_obs = ~np.isnat(observed)
+        since = (today - np.where(has_obs, observed, today)).astype(np.int64)
+        health -= 10 * (has_obs & (since > 7))
+    health = np.clip(health, 0, 100)
+
+    return {
+        'days_elapsed': elapsed,
+        'progress': progress,
+        'stage': stage,
+        'days_remaining': days_remaining,
+        'health_score': health
+    }
+
 def determine_growth_stage(days_elapsed, crop_type):
     """Determine current growth stage based on days elapsed"""
     if not crop_type:
         return 'seedling'
     
-    milestones = GrowthMilestone.query.filter_by(crop_type=crop_type).order_by('days_from_planting').all()
-    
-    if not milestones:
-        # Default stages based on days
-        if days_elapsed < 15:
-            return 'seedling'
-        elif days_elapsed < 50:
-            return 'vegetative'
-        elif days_elapsed < 90:
-            return 'flowering'
-        else:
-            return 'mature'
-    
-    current_stage = 'seedling'
-    for milestone in milestones:
-        if days_elapsed >= milestone.days_from_planting:
-            current_stage = milestone.growth_stage
-    
-    return current_stage
+    # Milestones (or default 15/50/90-day stages) from the in-memory index
+    return crop_reference.stage(crop_type, days_elapsed)
 
 def calculate_health_score(crop):
     """Calculate crop health score based on observations"""
@@ -702,8 +1212,7 @@ def calculate_health_score(crop):
         base_score -= 20
     
     # Deduct for pest pressure
-    pest_deductions = {'low': -5, 'medium': -15, 'high': -30}
-    base_score += pest_deductions.get(crop.pest_pressure_level, 0)
+    base_score += PEST_DEDUCTIONS.get(crop.pest_pressure_level, 0)
     
     # Adjust based on last observation date
     if crop.last_observation_date:
@@ -718,18 +1227,26 @@ def calculate_health_score(crop):
 # API ROUTES - NEW FOR ML MODELS
 # ============================================
 
+def ml_model_flags():
+    """Which pickle models are loaded, without waiting for a load in progress"""
+    ml_models = get_ml_models(wait=False)
+    return {
+        'random_forest': bool(ml_models and ml_models.random_forest_model is not None),
+        'decision_tree': bool(ml_models and ml_models.decision_tree_model is not None),
+        'svm': bool(ml_models and ml_models.svm_model is not None)
+    }
+
 @app.route('/api/test-models', methods=['GET'])
 def test_models():
     """Test if ML models are loaded"""
+    models_loaded = ml_model_flags()
+    crop_model = get_crop_model(wait=False)
+    models_loaded['crop_cnn'] = crop_model.name if crop_model else False
     return jsonify({
         'status': 'success',
         'message': 'ML models test endpoint',
-        'models_loaded': {
-            'random_forest': ml_models.random_forest_model is not None,
-            'decision_tree': ml_models.decision_tree_model is not None,
-            'svm': ml_models.svm_model is not None,
-            'keras_h5': crop_model is not None
-        }
+        'models_loaded': models_loaded,
+        'models': model_registry.status()
     })
 
 @app.route('/api/predict-fertilizer', methods=['POST'])
@@ -744,7 +1261,8 @@ def predict_fertilizer():
             return jsonify({'error': 'Crop type and soil type required'}), 400
         
         # Use Random Forest model if available
-        if ml_models.random_forest_model and ml_models.rf_features:
+        ml_models = get_ml_models()
+        if ml_models and ml_models.random_forest_model and ml_models.rf_features:
             try:
                 # Prepare features for prediction
                 # This depends on how your Random Forest model was trained
@@ -942,30 +1460,41 @@ def get_tasks_from_decision_tree(crop_type, days_elapsed, growth_stage):
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
+    decision_engine = get_decision_engine(wait=False)
+    if decision_engine is not None:
+        svm_state = 'loaded' if decision_engine.svm_model else 'rule_based'
+    else:
+        svm_state = model_registry.state('decision_engine')
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'svm_model': 'loaded' if decision_engine.svm_model else 'rule_based',
-        'ml_models': {
-            'random_forest': ml_models.random_forest_model is not None,
-            'decision_tree': ml_models.decision_tree_model is not None,
-            'svm': ml_models.svm_model is not None
-        }
+        'svm_model': svm_state,
+        'ml_models': ml_model_flags(),
+        'models': model_registry.status(),
+        'weather': weather_service.stats(),
+        'crop_reference': crop_reference.stats(),
+        'activity_log': activity_log.stats(),
+        'notifications': notification_service.stats(),
+        'events': event_hub.stats(),
+        'database': {'sqlite_profile': SQLITE_PROFILE, 'settings': sqlite_profile.current_settings(db.engine)}
     })
 
 @app.route('/api/predict', methods=['POST'])
 def api_predict():
-    """Accepts an image file (multipart/form-data) and returns predictions using the H5 model."""
-    global crop_model, class_labels
-
+    """Accepts an image file (multipart/form-data) and returns predictions from the crop CNN."""
     # Support a simple health check from the frontend
     if request.is_json:
         body = request.get_json()
         if body.get('test'):
-            return jsonify({'ok': bool(crop_model), 'labels_count': len(class_labels)})
+            return jsonify({
+                'ok': model_registry.is_ready('crop_cnn'),
+                'state': model_registry.state('crop_cnn'),
+                'backend': getattr(get_crop_model(wait=False), 'name', None),
+                'labels_count': len(class_labels)
+            })
 
-    # Ensure model is loaded
-    if crop_model is None:
+    # Ensure model is loaded (blocks on the first request while it loads)
+    if get_crop_model() is None:
         return jsonify({'error': 'Model not loaded on server'}), 500
 
     if 'image' not in request.files:
@@ -976,28 +1505,169 @@ def api_predict():
         return jsonify({'error': 'Empty filename'}), 400
 
     try:
-        img = Image.open(file.stream).convert('RGB')
-        img = img.resize((224, 224))
-        arr = img_to_array(img) / 255.0
-        arr = np.expand_dims(arr, axis=0)
-
-        preds = crop_model.predict(arr)
-        probs = preds[0].tolist()
-
-        # Build top-3 list
-        indexed = list(enumerate(probs))
-        indexed.sort(key=lambda x: x[1], reverse=True)
-        topk = indexed[:3]
-        results = []
-        for idx, score in topk:
-            label = class_labels[idx] if idx < len(class_labels) else f'Class {idx}'
-            results.append({'label': label, 'score': float(score)})
-
+        data = file.read()
+        cache_version = None
+        if prediction_cache:
+            cached = prediction_cache.get(data)
+            if cached:
+                return jsonify(dict(cached, cached='exact'))
+            cache_version = prediction_cache.version  # not stored if the model changes meanwhile
+
+        # Opened in JPEG draft mode first so hashing and preprocessing share one reduced decode
+        img = image_preprocess.open_image(io.BytesIO(data))
+        phash = None
+        if prediction_cache:
+            phash = perceptual_hash(img) if prediction_cache.use_phash else None
+            cached = prediction_cache.get_similar(phash)
+            if cached:
+                return jsonify(dict(cached, cached='similar'))
+
+        # This thread's reusable buffer: the batcher copies it into the batch before this call returns
+        arr = image_preprocess.preprocess(img)
+
+        # Queued through the batcher so concurrent uploads share one forward pass
+        probs = get_predict_batcher().predict(arr).tolist()
+        results = build_top_predictions(probs)
+
+        if prediction_cache:
+            prediction_cache.put(data, {'predictions': results, 'raw': probs}, phash=phash, version=cache_version)
         return jsonify({'predictions': results, 'raw': probs})
     except Exception as e:
         print('Prediction error:', e)
         return jsonify({'error': str(e)}), 500
 
+class UploadTooLarge(Exception):
+    """A batch upload exceeds the file-count or size caps (HTTP 413)"""
+
+def collect_batch_uploads():
+    """Read (filename, bytes) pairs from multipart 'images' files and/or a zip 'archive'.
+
+    Counts and sizes are checked before each file is read, so an oversized
+    request or a zip bomb is rejected without being loaded into memory.
+    """
+    files = [f for f in request.files.getlist('images') if f.filename]
+    archive = request.files.get('archive')
+    entries = []
+    zf = None
+    if archive and archive.filename:
+        zf = zipfile.ZipFile(archive.stream)
+        entries = [info for info in zf.infolist()
+                   if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS)]
+    try:
+        if len(files) + len(entries) > PREDICT_BATCH_MAX_FILES:
+            raise UploadTooLarge(f'Too many files (max {PREDICT_BATCH_MAX_FILES})')
+        too_big = [info.filename for info in entries if info.file_size > PREDICT_BATCH_MAX_FILE_BYTES]
+        if too_big:
+            raise UploadTooLarge(f'{too_big[0]} is larger than {PREDICT_BATCH_MAX_FILE_BYTES} bytes')
+        total = sum(info.file_size for info in entries)
+        if total > PREDICT_BATCH_MAX_TOTAL_BYTES:
+            raise UploadTooLarge(f'Archive expands to more than {PREDICT_BATCH_MAX_TOTAL_BYTES} bytes')
+
+        uploads = []
+        for f in files:
+            data = f.read(PREDICT_BATCH_MAX_FILE_BYTES + 1)
+            if len(data) > PREDICT_BATCH_MAX_FILE_BYTES:
+                raise UploadTooLarge(f'{f.filename} is larger than {PREDICT_BATCH_MAX_FILE_BYTES} bytes')
+            total += len(data)
+            if total > PREDICT_BATCH_MAX_TOTAL_BYTES:
+                raise UploadTooLarge(f'Upload is larger than {PREDICT_BATCH_MAX_TOTAL_BYTES} bytes')
+            uploads.append((f.filename, data))
+        for info in entries:
+            uploads.append((info.filename, zf.read(info)))  # ZipExtFile stops at the declared file_size
+        return uploads
+    finally:
+        if zf is not None:
+            zf.close()
+
+@app.route('/api/predict/batch', methods=['POST'])
+def api_predict_batch():
+    """Classify many images in one request; streams one NDJSON line per file plus a final summary."""
+    crop_model = get_crop_model()
+    if crop_model is None:
+        return jsonify({'error': 'Model not loaded on server'}), 500
+
+    try:
+        uploads = collect_batch_uploads()
+    except zipfile.BadZipFile:
+        return jsonify({'error': 'Invalid zip archive'}), 400
+    except UploadTooLarge as e:
+        return jsonify({'error': str(e)}), 413
+
+    if not uploads:
+        return jsonify({'error': 'No image files provided'}), 400
+
+    chunks = [uploads[i:i + PREDICT_BATCH_CHUNK] for i in range(0, len(uploads), PREDICT_BATCH_CHUNK)]
+
+    def submit_chunk(chunk):
+        """Decode a chunk in the pool, each image straight into its row of one batch array"""
+        batch = np.empty((len(chunk),) + image_preprocess.SHAPE, dtype=np.float32)
+        return batch, [_decode_pool.submit(decode_upload, name, data, row)
+                       for (name, data), row in zip(chunk, batch)]
+
+    def generate():
+        label_summary = {}
+        succeeded = failed = 0
+
+        # Decode the next chunk in the pool while the current one runs through the model
+        pending = submit_chunk(chunks[0])
+        for i in range(len(chunks)):
+            batch, futures = pending
+            decoded = [f.result() for f in futures]
+            pending = submit_chunk(chunks[i + 1]) if i + 1 < len(chunks) else None
+
+            good = []
+            for row, (name, error) in enumerate(decoded):
+                if error is None:
+                    good.append((name, row))
+                else:
+                    failed += 1
+                    yield json.dumps({'type': 'error', 'file': name, 'error': error}) + '\n'
+            if not good:
+                continue
+
+            try:
+                preds = crop_model.predict(batch if len(good) == len(batch) else batch[[row for _, row in good]])
+            except Exception as e:
+                print('Batch prediction error:', e)
+                for name, _ in good:
+                    failed += 1
+                    yield json.dumps({'type': 'error', 'file': name, 'error': str(e)}) + '\n'
+                continue
+
+            for (name, _), row in zip(good, preds):
+                results = build_top_predictions(row.tolist())
+                top = results[0]
+                entry = label_summary.setdefault(top['label'], {'count': 0, 'score_sum': 0.0})
+                entry['count'] += 1
+                entry['score_sum'] += top['score']
+                succeeded += 1
+                yield json.dumps({'type': 'result', 'file': name, 'predictions': results}) + '\n'
+
+        yield json.dumps({
+            'type': 'summary',
+            'total': len(uploads),
+            'succeeded': succeeded,
+            'failed': failed,
+            'labels': {
+                label: {'count': e['count'], 'avg_score': e['score_sum'] / e['count']}
+                for label, e in sorted(label_summary.items(), key=lambda x: -x[1]['count'])
+            }
+        }) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/api/predict/stats', methods=['GET'])
+def api_predict_stats():
+    """Queue depth, batch-size histogram and per-stage latency of the inference batcher.
+
+    Never loads the model: before the first prediction (or while it is
+    unavailable) only the model state and the cache stats are reported.
+    """
+    stats = predict_batcher.stats() if predict_batcher is not None else {}
+    stats['model'] = model_registry.state('crop_cnn')
+    stats['cache'] = prediction_cache.stats() if prediction_cache else None
+    return jsonify(stats)
+
 @app.route('/api/weather', methods=['POST'])
 def get_weather():
     """Get weather data for location"""
@@ -1009,11 +1679,8 @@ def get_weather():
         if not lat or not lon:
             return jsonify({'error': 'Location required'}), 400
         
-        # Get current weather
-        current = weather_service.get_weather(lat, lon)
-        
-        # Get forecast
-        forecast = weather_service.get_forecast(lat, lon)
+        # Get current weather and forecast concurrently
+        current, forecast = weather_service.get_weather_and_forecast(lat, lon)
         
         # Generate past 10 days data
         past_days = []
@@ -1113,32 +1780,20 @@ def select_crop():
         
         # Create initial recommendations
         create_initial_recommendations(new_crop.planting_id, crop_type)
-        
-        # Create notification
-        notification = Notification(
-            user_id=user_id,
-            planting_id=new_crop.planting_id,
-            notification_type='milestone',
-            title=f'{crop_type} Planted!',
-            message=f'You have successfully planted {crop_type}. Expected harvest in {total_days} days.',
-            is_read=False
-        )
-        
-        db.session.add(notification)
         db.session.commit()
         
+        # Planting confirmation now, harvest reminder on the expected harvest date
+        notification_service.notify(user_id, 'milestone', f'{crop_type} Planted!',
+                                    f'You have successfully planted {crop_type}. Expected harvest in {total_days} days.',
+                                    planting_id=new_crop.planting_id)
+        notification_service.notify(user_id, 'reminder', f'{crop_type} Harvest Due',
+                                    f'Your {crop_type} planted on {planting_date_obj.isoformat()} is expected to be ready for harvest today.',
+                                    planting_id=new_crop.planting_id,
+                                    scheduled_for=local_midnight_utc(harvest_date))
+        
         # Log planting creation as user action
-        try:
-            user_action = UserAction(
-                user_id=user_id,
-                planting_id=new_crop.planting_id,
-                action_type='planting_created',
-                details=json.dumps({'crop_type': crop_type, 'expected_harvest': harvest_date.isoformat()})
-            )
-            db.session.add(user_action)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        activity_log.record(user_id, 'planting_created', new_crop.planting_id,
+                            {'crop_type': crop_type, 'expected_harvest': harvest_date.isoformat()})
 
         return jsonify({
             'success': True,
@@ -1170,27 +1825,22 @@ def get_user_crops(user_id):
         # Get active crops
         crops = UserCrop.query.filter_by(user_id=user_id, is_active=True).all()
         
+        # Progress, stage and days remaining for all crops in one pass
+        status = compute_crop_status_batch(
+            [c.planting_date for c in crops], [c.crop_type for c in crops], default_total_days=100
+        )
+        
         crops_data = []
-        for crop in crops:
-            # Calculate progress
-            crop_master = CropMaster.query.filter_by(crop_type=crop.crop_type).first()
-            total_days = crop_master.total_growth_days if crop_master else 100
-            
-            days_elapsed = (datetime.now().date() - crop.planting_date).days
-            days_elapsed = max(0, days_elapsed)
-            
-            progress = calculate_growth_progress(crop.planting_date, total_days)
-            growth_stage = determine_growth_stage(days_elapsed, crop.crop_type)
-            
+        for i, crop in enumerate(crops):
             crops_data.append({
                 'planting_id': crop.planting_id,
                 'crop_type': crop.crop_type,
                 'planting_date': crop.planting_date.isoformat(),
                 'expected_harvest_date': crop.expected_harvest_date.isoformat() if crop.expected_harvest_date else None,
-                'current_growth_stage': growth_stage,
-                'growth_progress': progress,
-                'days_elapsed': days_elapsed,
-                'days_remaining': max(0, total_days - days_elapsed),
+                'current_growth_stage': status['stage'][i],
+                'growth_progress': float(status['progress'][i]),
+                'days_elapsed': int(status['days_elapsed'][i]),
+                'days_remaining': int(status['days_remaining'][i]),
                 'health_score': crop.health_score,
                 'pest_pressure_level': crop.pest_pressure_level,
                 'disease_detected': crop.disease_detected,
@@ -1214,8 +1864,7 @@ def get_crop_progress(planting_id):
             return jsonify({'error': 'Crop not found'}), 404
         
         # Get crop details for total days
-        crop_master = CropMaster.query.filter_by(crop_type=crop.crop_type).first()
-        total_days = crop_master.total_growth_days if crop_master else 120
+        total_days = crop_reference.total_growth_days(crop.crop_type, 120)
         
         # Calculate current progress
         days_elapsed = (datetime.now().date() - crop.planting_date).days
@@ -1228,12 +1877,16 @@ def get_crop_progress(planting_id):
         # Calculate health score
         health_score = calculate_health_score(crop)
         
-        # Update crop record
-        crop.days_elapsed = days_elapsed
-        crop.days_remaining = max(0, total_days - days_elapsed)
-        crop.growth_progress = progress
-        crop.current_growth_stage = growth_stage
-        crop.health_score = health_score
+        # Derived fields are only written back when they changed (normally once
+        # a day), and only after the reads below, so polling stays read-only
+        derived = {
+            'days_elapsed': days_elapsed,
+            'days_remaining': max(0, total_days - days_elapsed),
+            'growth_progress': progress,
+            'current_growth_stage': growth_stage,
+            'health_score': health_score
+        }
+        changed = {field: value for field, value in derived.items() if getattr(crop, field) != value}
         
         # Get latest observation
         latest_obs = ManualObservation.query.filter_by(
@@ -1257,14 +1910,12 @@ def get_crop_progress(planting_id):
                 'category': weather['weather_category']
             }
         
-        db.session.commit()
-        
-        return jsonify({
+        result = {
             'planting_id': planting_id,
             'crop_type': crop.crop_type,
             'planting_date': crop.planting_date.isoformat(),
             'days_elapsed': days_elapsed,
-            'days_remaining': crop.days_remaining,
+            'days_remaining': derived['days_remaining'],
             'progress_percentage': progress,
             'growth_stage': growth_stage,
             'health_score': health_score,
@@ -1276,9 +1927,18 @@ def get_crop_progress(planting_id):
             } if latest_obs else None,
             'weather': weather_info,
             'next_milestone': get_next_milestone(crop.crop_type, days_elapsed)
-        })
+        }
+        
+        # Update crop record (one short write transaction, skipped when nothing changed)
+        if changed:
+            for field, value in changed.items():
+                setattr(crop, field, value)
+            db.session.commit()
+        
+        return jsonify(result)
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/crop/<int:planting_id>/observation', methods=['POST'])
@@ -1320,36 +1980,18 @@ def add_observation(planting_id):
         db.session.commit()
         
         # Record user action for manual observation
-        try:
-            action_details = {
-                'visual_health': data.get('visual_health'),
-                'pest_presence': data.get('pest_presence'),
-                'disease_symptoms': data.get('disease_symptoms'),
-                'notes': data.get('notes')
-            }
-            user_action = UserAction(
-                user_id=crop.user_id,
-                planting_id=planting_id,
-                action_type='manual_observation',
-                details=json.dumps(action_details)
-            )
-            db.session.add(user_action)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        activity_log.record(crop.user_id, 'manual_observation', planting_id, {
+            'visual_health': data.get('visual_health'),
+            'pest_presence': data.get('pest_presence'),
+            'disease_symptoms': data.get('disease_symptoms'),
+            'notes': data.get('notes')
+        })
 
         # Create notification for significant findings
         if data.get('pest_presence') in ['medium', 'high'] or data.get('disease_symptoms'):
-            notification = Notification(
-                user_id=crop.user_id,
-                planting_id=planting_id,
-                notification_type='alert',
-                title='Crop Issue Detected',
-                message=f'Observation recorded for {crop.crop_type}: {data.get("disease_symptoms", "Pest issue")}',
-                is_read=False
-            )
-            db.session.add(notification)
-            db.session.commit()
+            notification_service.notify(crop.user_id, 'alert', 'Crop Issue Detected',
+                                        f'Observation recorded for {crop.crop_type}: {data.get("disease_symptoms", "Pest issue")}',
+                                        planting_id=planting_id)
         
         return jsonify({
             'success': True,
@@ -1385,6 +2027,7 @@ def get_recommendation(planting_id):
             temp_category = 'optimal'
         
         # Prepare features for SVM (no sensor data)
+        decision_engine = get_decision_engine()
         features = {
             'visual_health': decision_engine.encode_health(latest_obs.visual_health if latest_obs else 'good'),
             'pest_pressure': decision_engine.encode_pressure(latest_obs.pest_presence if latest_obs else 'none'),
@@ -1435,17 +2078,8 @@ def get_recommendation(planting_id):
         db.session.commit()
         
         # Log generated recommendation as user action
-        try:
-            user_action = UserAction(
-                user_id=crop.user_id,
-                planting_id=planting_id,
-                action_type='recommendation_generated',
-                details=json.dumps({'recommendation_id': recommendation.recommendation_id, 'action': action, 'confidence': confidence})
-            )
-            db.session.add(user_action)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        activity_log.record(crop.user_id, 'recommendation_generated', planting_id,
+                            {'recommendation_id': recommendation.recommendation_id, 'action': action, 'confidence': confidence})
 
         return jsonify({
             'action': action,
@@ -1503,36 +2137,18 @@ def add_image_analysis(planting_id):
         db.session.commit()
         
         # Record user action for automatic detection
-        try:
-            action_details = {
-                'detected_disease': data.get('detected_disease'),
-                'disease_confidence': data.get('disease_confidence'),
-                'detected_pests': data.get('detected_pests'),
-                'pest_confidence': data.get('pest_confidence')
-            }
-            user_action = UserAction(
-                user_id=crop.user_id,
-                planting_id=planting_id,
-                action_type='automatic_detection',
-                details=json.dumps(action_details)
-            )
-            db.session.add(user_action)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        activity_log.record(crop.user_id, 'automatic_detection', planting_id, {
+            'detected_disease': data.get('detected_disease'),
+            'disease_confidence': data.get('disease_confidence'),
+            'detected_pests': data.get('detected_pests'),
+            'pest_confidence': data.get('pest_confidence')
+        })
         
         # Create alert if issues found
         if data.get('detected_disease') or data.get('detected_pests'):
-            notification = Notification(
-                user_id=crop.user_id,
-                planting_id=planting_id,
-                notification_type='alert',
-                title='Image Analysis Results',
-                message=f'Analysis detected: {data.get("detected_disease", "Pests")} in {crop.crop_type}',
-                is_read=False
-            )
-            db.session.add(notification)
-            db.session.commit()
+            notification_service.notify(crop.user_id, 'alert', 'Image Analysis Results',
+                                        f'Analysis detected: {data.get("detected_disease", "Pests")} in {crop.crop_type}',
+                                        planting_id=planting_id)
         
         return jsonify({
             'success': True,
@@ -1548,137 +2164,280 @@ def add_image_analysis(planting_id):
 # -----------------------------
 # User data sync endpoints
 # -----------------------------
-@app.route('/api/user/<int:user_id>/sync', methods=['POST'])
-def user_sync(user_id):
-    """Accept local client data (detections, observations, quick actions, plantings) and merge into server DB."""
+# ============================================
+# DEVICE SYNC IMPORT (BULK)
+# ============================================
+
+SYNC_INSERT_CHUNK = int(os.getenv('SYNC_INSERT_CHUNK', '1000'))
+DUPLICATE_WINDOW = timedelta(seconds=5)
+_EPOCH = datetime(1970, 1, 1)
+
+def parse_sync_timestamp(value):
+    """Client ISO timestamp as a naive datetime (SQLite stores wall time), now() if missing/invalid"""
     try:
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        ts = datetime.fromisoformat(value) if value else datetime.utcnow()
+    except Exception:
+        ts = datetime.utcnow()
+    return ts.replace(tzinfo=None)
 
-        payload = request.json or {}
-        stats = {'image_analyses': 0, 'manual_observations': 0, 'user_actions': 0, 'user_crops': 0, 'skipped': 0}
+def parse_planting_id(value):
+    try:
+        return int(value) if value is not None and value != '' else None
+    except (TypeError, ValueError):
+        return None
+
+class DetectionDeduper:
+    """In-memory form of the duplicate check for detection logs: same planting and
+    label within +/- DUPLICATE_WINDOW of an existing or already imported analysis."""
+
+    def __init__(self, window=DUPLICATE_WINDOW):
+        self.window = window
+        self._seconds = window.total_seconds()
+        self._buckets = {}  # (planting_id, label, bucket) -> [analysis_date, ...]
+
+    def _bucket(self, ts):
+        return int((ts - _EPOCH).total_seconds() // self._seconds)
+
+    def add(self, planting_id, label, ts):
+        self._buckets.setdefault((planting_id, label, self._bucket(ts)), []).append(ts)
+
+    def seen(self, planting_id, label, ts):
+        b = self._bucket(ts)
+        for bucket in (b - 1, b, b + 1):
+            for other in self._buckets.get((planting_id, label, bucket), ()):
+                if abs(other - ts) <= self.window:
+                    return True
+        return False
+
+class SyncImporter:
+    """Imports device sync payloads for one user with a constant number of queries:
+    owned planting ids and the existing analyses in the payload's time window are
+    prefetched, duplicates are filtered in memory and rows go in as chunked executemany
+    INSERTs. import_payload() may be called repeatedly (e.g. once per streamed chunk)."""
+
+    def __init__(self, user_id, chunk_size=SYNC_INSERT_CHUNK):
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.owned = {pid for (pid,) in db.session.query(UserCrop.planting_id).filter_by(user_id=user_id)}
+        self.deduper = DetectionDeduper()
+        self.stats = {'image_analyses': 0, 'manual_observations': 0, 'user_actions': 0, 'user_crops': 0, 'skipped': 0}
+
+    def _prefetch_analyses(self, detections):
+        planting_ids = {pid for pid, _, _ in detections}
+        if not planting_ids:
+            return
+        times = [ts for _, _, ts in detections]
+        existing = db.session.query(
+            ImageAnalysis.planting_id, ImageAnalysis.detected_disease, ImageAnalysis.analysis_date
+        ).filter(
+            ImageAnalysis.planting_id.in_(planting_ids),
+            ImageAnalysis.analysis_date.between(min(times) - DUPLICATE_WINDOW, max(times) + DUPLICATE_WINDOW)
+        )
+        for planting_id, label, analysis_date in existing:
+            self.deduper.add(planting_id, label, analysis_date)
+
+    def _insert(self, model, rows):
+        for i in range(0, len(rows), self.chunk_size):
+            db.session.execute(db.insert(model), rows[i:i + self.chunk_size])
+
+    def import_payload(self, payload):
+        stats = self.stats
+        analyses, observations, actions, crops = [], [], [], []
 
         # Process automatic detection logs
+        detections = []
         for d in payload.get('detectionLogs', []):
-            planting_id = d.get('planting_id')
-            if not planting_id:
+            planting_id = parse_planting_id(d.get('planting_id'))
+            if planting_id not in self.owned:
                 stats['skipped'] += 1
                 continue
+            detections.append((planting_id, d, parse_sync_timestamp(d.get('timestamp'))))
+        self._prefetch_analyses([(pid, d.get('detection_label'), ts) for pid, d, ts in detections])
 
-            crop = UserCrop.query.get(planting_id)
-            if not crop or crop.user_id != user_id:
+        for planting_id, d, ts in detections:
+            label = d.get('detection_label')
+            if self.deduper.seen(planting_id, label, ts):
                 stats['skipped'] += 1
                 continue
-
-            # Parse timestamp if provided
-            ts = None
-            try:
-                ts = datetime.fromisoformat(d.get('timestamp')) if d.get('timestamp') else datetime.utcnow()
-            except Exception:
-                ts = datetime.utcnow()
-
-            # Simple duplicate protection: look for same planting_id + disease + similar timestamp
-            dup = ImageAnalysis.query.filter_by(planting_id=planting_id, detected_disease=d.get('detection_label')).filter(
-                ImageAnalysis.analysis_date.between(ts - timedelta(seconds=5), ts + timedelta(seconds=5))
-            ).first()
-            if dup:
-                stats['skipped'] += 1
-                continue
-
-            analysis = ImageAnalysis(
-                planting_id=planting_id,
-                image_path=d.get('image_path'),
-                detected_disease=d.get('detection_label'),
-                disease_confidence=d.get('detection_score', 0),
-                overall_health_score=d.get('overall_health_score'),
-                analysis_date=ts
-            )
-            db.session.add(analysis)
-
-            user_action = UserAction(
-                user_id=user_id,
-                planting_id=planting_id,
-                action_type='automatic_detection',
-                details=json.dumps(d)
-            )
-            db.session.add(user_action)
+            self.deduper.add(planting_id, label, ts)
+            analyses.append({
+                'planting_id': planting_id,
+                'image_path': d.get('image_path'),
+                'detected_disease': label,
+                'disease_confidence': d.get('detection_score', 0),
+                'overall_health_score': d.get('overall_health_score'),
+                'analysis_date': ts
+            })
+            actions.append({'user_id': self.user_id, 'planting_id': planting_id,
+                            'action_type': 'automatic_detection', 'details': json.dumps(d)})
             stats['image_analyses'] += 1
             stats['user_actions'] += 1
 
         # Process manual detections / crop observations
         for m in payload.get('cropDetections', []):
-            planting_id = m.get('planting_id')
-            if not planting_id:
-                stats['skipped'] += 1
-                continue
-
-            crop = UserCrop.query.get(planting_id)
-            if not crop or crop.user_id != user_id:
+            planting_id = parse_planting_id(m.get('planting_id'))
+            if planting_id not in self.owned:
                 stats['skipped'] += 1
                 continue
-
-            try:
-                obs_date = datetime.fromisoformat(m.get('timestamp')).date() if m.get('timestamp') else datetime.utcnow().date()
-            except Exception:
-                obs_date = datetime.utcnow().date()
-
-            observation = ManualObservation(
-                planting_id=planting_id,
-                observation_date=obs_date,
-                observation_type='visual',
-                pest_presence=m.get('pest_level'),
-                disease_symptoms=m.get('disease'),
-                notes=m.get('notes'),
-                image_path=m.get('image_path')
-            )
-            db.session.add(observation)
-
-            user_action = UserAction(
-                user_id=user_id,
-                planting_id=planting_id,
-                action_type='manual_observation',
-                details=json.dumps(m)
-            )
-            db.session.add(user_action)
+            observations.append({
+                'planting_id': planting_id,
+                'observation_date': parse_sync_timestamp(m.get('timestamp')).date(),
+                'observation_type': 'visual',
+                'pest_presence': m.get('pest_level'),
+                'disease_symptoms': m.get('disease'),
+                'notes': m.get('notes'),
+                'image_path': m.get('image_path')
+            })
+            actions.append({'user_id': self.user_id, 'planting_id': planting_id,
+                            'action_type': 'manual_observation', 'details': json.dumps(m)})
             stats['manual_observations'] += 1
             stats['user_actions'] += 1
 
         # Process quick actions
         for q in payload.get('quickActions', []):
-            planting_id = q.get('planting_id')
-            ua = UserAction(
-                user_id=user_id,
-                planting_id=planting_id,
-                action_type=q.get('type', 'quick_action'),
-                details=json.dumps(q)
-            )
-            db.session.add(ua)
+            actions.append({'user_id': self.user_id, 'planting_id': q.get('planting_id'),
+                            'action_type': q.get('type', 'quick_action'), 'details': json.dumps(q)})
             stats['user_actions'] += 1
 
-        # Process user crops (plantings) if provided
-        for c in payload.get('userCrops', []):
-            # If planting_id is provided and exists, skip to avoid collision
-            planting_id = c.get('planting_id')
-            if planting_id and UserCrop.query.get(planting_id):
+        # Process user crops (plantings); a planting_id that already exists is skipped
+        new_crops = payload.get('userCrops', [])
+        requested = {parse_planting_id(c.get('planting_id')) for c in new_crops} - {None}
+        existing = {pid for (pid,) in db.session.query(UserCrop.planting_id).filter(UserCrop.planting_id.in_(requested))} \
+            if requested else set()
+        for c in new_crops:
+            if parse_planting_id(c.get('planting_id')) in existing:
                 stats['skipped'] += 1
                 continue
-
-            # Create a minimal record tied to the user
-            try:
-                planting_date = datetime.fromisoformat(c.get('planting_date')).date() if c.get('planting_date') else datetime.utcnow().date()
-            except Exception:
-                planting_date = datetime.utcnow().date()
-
-            new_crop = UserCrop(
-                user_id=user_id,
-                crop_type=c.get('crop_type', 'Unknown'),
-                planting_date=planting_date,
-                expected_harvest_date=c.get('expected_harvest_date')
-            )
-            db.session.add(new_crop)
+            expected = c.get('expected_harvest_date')
+            crops.append({
+                'user_id': self.user_id,
+                'crop_type': c.get('crop_type', 'Unknown'),
+                'planting_date': parse_sync_timestamp(c.get('planting_date')).date(),
+                'expected_harvest_date': parse_sync_timestamp(expected).date() if expected else None
+            })
             stats['user_crops'] += 1
 
+        self._insert(ImageAnalysis, analyses)
+        self._insert(ManualObservation, observations)
+        self._insert(UserAction, actions)
+        self._insert(UserCrop, crops)
+        return stats
+
+SYNC_STREAM_CHUNK = int(os.getenv('SYNC_STREAM_CHUNK', '500'))
+SYNC_KINDS = ('detectionLogs', 'cropDetections', 'quickActions', 'userCrops')
+
+def get_sync_checkpoint(user_id, stream_id):
+    return db.session.get(SyncCheckpoint, (user_id, stream_id)) or \
+        SyncCheckpoint(user_id=user_id, stream_id=stream_id, last_seq=0, records=0)
+
+def stream_sync_records(user_id, stream_id, lines, chunk_size=None):
+    """Import NDJSON sync lines ({"seq": n, "kind": "detectionLogs", "record": {...}}) in
+    chunks. Each chunk is committed together with the stream's checkpoint, so a client
+    that resends the whole stream after a failure only imports records past the cursor.
+    Past the cursor, seqs must increase; a record whose seq goes backwards gets an error
+    line and is skipped. Yields one NDJSON line per event (resume, checkpoint, error, summary)."""
+    chunk_size = chunk_size or SYNC_STREAM_CHUNK
+    importer = SyncImporter(user_id)
+    checkpoint = get_sync_checkpoint(user_id, stream_id)
+    cursor = acknowledged = checkpoint.last_seq
+    yield json.dumps({'type': 'resume', 'stream_id': stream_id, 'cursor': cursor}) + '\n'
+
+    chunk = {kind: [] for kind in SYNC_KINDS}
+    pending = 0
+    pending_seq = cursor
+    counts = {'received': 0, 'already_acknowledged': 0, 'invalid': 0, 'out_of_order': 0, 'chunks': 0}
+
+    def flush():
+        """Commit the pending chunk with the checkpoint; returns (NDJSON line, ok)"""
+        nonlocal chunk, pending, cursor
+        before = dict(importer.stats)
+        try:
+            importer.import_payload(chunk)
+            checkpoint.last_seq = pending_seq
+            checkpoint.records += pending
+            checkpoint.updated_at = datetime.utcnow()
+            db.session.add(checkpoint)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return json.dumps({'type': 'error', 'error': str(e), 'cursor': cursor}) + '\n', False
+        line = json.dumps({
+            'type': 'checkpoint',
+            'cursor': pending_seq,
+            'records': pending,
+            'imported': {k: v - before[k] for k, v in importer.stats.items()}
+        }) + '\n'
+        cursor = pending_seq
+        counts['chunks'] += 1
+        chunk = {kind: [] for kind in SYNC_KINDS}
+        pending = 0
+        return line, True
+
+    for line_no, raw in enumerate(lines, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        counts['received'] += 1
+        try:
+            item = json.loads(raw)
+            seq = int(item['seq'])
+            kind = item['kind']
+            if kind not in SYNC_KINDS:
+                raise ValueError(f"unknown kind '{kind}'")
+        except (ValueError, KeyError, TypeError) as e:
+            counts['invalid'] += 1
+            yield json.dumps({'type': 'error', 'line': line_no, 'error': f'invalid record: {e}'}) + '\n'
+            continue
+
+        if seq <= acknowledged:
+            counts['already_acknowledged'] += 1
+            continue
+        if seq <= pending_seq:
+            counts['out_of_order'] += 1
+            yield json.dumps({'type': 'error', 'line': line_no, 'seq': seq,
+                              'error': f'seq {seq} is not after {pending_seq}'}) + '\n'
+            continue
+        chunk[kind].append(item.get('record') or {})
+        pending += 1
+        pending_seq = seq
+
+        if pending >= chunk_size:
+            line, ok = flush()
+            yield line
+            if not ok:
+                return
+
+    if pending:
+        line, ok = flush()
+        yield line
+        if not ok:
+            return
+
+    yield json.dumps(dict(counts, type='summary', cursor=cursor, imported=importer.stats)) + '\n'
+
+@app.route('/api/user/<int:user_id>/sync', methods=['POST'])
+def user_sync(user_id):
+    """Accept local client data (detections, observations, quick actions, plantings) and merge into server DB.
+
+    Send Content-Type application/x-ndjson with an X-Sync-Stream id to stream records
+    instead of one JSON document (see stream_sync_records).
+    """
+    try:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if request.mimetype == 'application/x-ndjson':
+            stream_id = request.headers.get('X-Sync-Stream') or request.args.get('stream_id')
+            if not stream_id or len(stream_id) > 64:
+                return jsonify({'error': 'X-Sync-Stream header (max 64 chars) required for streamed sync'}), 400
+            # request.stream is unbuffered; iterating it directly reads one byte per call
+            lines = io.BufferedReader(request.stream, buffer_size=64 * 1024)
+            return Response(stream_with_context(stream_sync_records(user_id, stream_id, lines)),
+                            mimetype='application/x-ndjson')
+
+        importer = SyncImporter(user_id)
+        stats = importer.import_payload(request.json or {})
         db.session.commit()
         return jsonify({'success': True, 'imported': stats})
 
@@ -1687,12 +2446,120 @@ def user_sync(user_id):
         return jsonify({'error': str(e)}), 500
 
 
+# Delta download: one high-water mark (last primary key seen) per table.
+# These tables are append-only (nothing updates or deletes their rows), so
+# "changed since" is "id greater than". Mutable per-user state - crop status
+# and progress, implemented recommendations, notification read flags - is NOT
+# part of the delta, as a new id is never issued when such a row changes.
+# Clients refresh it from /api/user/<id>/dashboard with If-None-Match: the
+# snapshot's ETag changes whenever one of those rows is committed.
+SYNC_DELTA_LIMIT = int(os.getenv('SYNC_DELTA_LIMIT', '500'))
+SYNC_DELTA_MAX_LIMIT = 5000
+SYNC_DELTA_TABLES = ('user_actions', 'image_analyses', 'manual_observations')
+
+def parse_sync_cursor(value):
+    """'<action_id>.<analysis_id>.<observation_id>' -> dict; empty means from the start"""
+    if not value:
+        return {table: 0 for table in SYNC_DELTA_TABLES}
+    parts = [int(p) for p in value.split('.')]
+    if len(parts) != len(SYNC_DELTA_TABLES) or min(parts) < 0:
+        raise ValueError('bad cursor')
+    return dict(zip(SYNC_DELTA_TABLES, parts))
+
+def format_sync_cursor(cursor):
+    return '.'.join(str(cursor[table]) for table in SYNC_DELTA_TABLES)
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+def delta_sync(user_id, cursor, limit):
+    """Rows added past each table's high-water mark, one query per table, in a columnar
+    {'columns': [...], 'rows': [[...], ...]} encoding. has_more means call again
+    with the returned cursor. Only covers the append-only SYNC_DELTA_TABLES."""
+    plantings = db.select(UserCrop.planting_id).where(UserCrop.user_id == user_id).scalar_subquery()
+    specs = {
+        'user_actions': (
+            UserAction.action_id,
+            db.session.query(UserAction.action_id, UserAction.planting_id, UserAction.action_type,
+                             UserAction.details, UserAction.created_at)
+            .filter(UserAction.user_id == user_id),
+            ('action_id', 'planting_id', 'action_type', 'details', 'created_at'),
+            lambda r: [r[0], r[1], r[2], json.loads(r[3]) if r[3] else None, _iso(r[4])]
+        ),
+        'image_analyses': (
+            ImageAnalysis.analysis_id,
+            db.session.query(ImageAnalysis.analysis_id, ImageAnalysis.planting_id, ImageAnalysis.image_path,
+                             ImageAnalysis.detected_disease, ImageAnalysis.disease_confidence,
+                             ImageAnalysis.overall_health_score, ImageAnalysis.analysis_date)
+            .filter(ImageAnalysis.planting_id.in_(plantings)),
+            ('analysis_id', 'planting_id', 'image_path', 'detected_disease', 'disease_confidence',
+             'overall_health_score', 'analysis_date'),
+            lambda r: [r[0], r[1], r[2], r[3], r[4], r[5], _iso(r[6])]
+        ),
+        'manual_observations': (
+            ManualObservation.observation_id,
+            db.session.query(ManualObservation.observation_id, ManualObservation.planting_id,
+                             ManualObservation.observation_date, ManualObservation.pest_presence,
+                             ManualObservation.disease_symptoms, ManualObservation.notes, ManualObservation.image_path)
+            .filter(ManualObservation.planting_id.in_(plantings)),
+            ('observation_id', 'planting_id', 'observation_date', 'pest_presence', 'disease_symptoms',
+             'notes', 'image_path'),
+            lambda r: [r[0], r[1], _iso(r[2]), r[3], r[4], r[5], r[6]]
+        ),
+    }
+
+    tables = {}
+    next_cursor = dict(cursor)
+    has_more = False
+    for table in SYNC_DELTA_TABLES:
+        id_column, query, columns, encode = specs[table]
+        rows = query.filter(id_column > cursor[table]).order_by(id_column).limit(limit + 1).all()
+        if len(rows) > limit:
+            has_more = True
+            rows = rows[:limit]
+        if rows:
+            next_cursor[table] = rows[-1][0]
+        tables[table] = {'columns': columns, 'rows': [encode(r) for r in rows]}
+
+    return {
+        'cursor': format_sync_cursor(next_cursor),
+        'has_more': has_more,
+        'tables': tables
+    }
+
+@app.route('/api/user/<int:user_id>/sync/checkpoint', methods=['GET'])
+def get_user_sync_checkpoint(user_id):
+    """Cursor of a streamed sync upload; the client resends records after it"""
+    stream_id = request.headers.get('X-Sync-Stream') or request.args.get('stream_id')
+    if not stream_id:
+        return jsonify({'error': 'stream_id required'}), 400
+    checkpoint = get_sync_checkpoint(user_id, stream_id)
+    return jsonify({
+        'stream_id': stream_id,
+        'cursor': checkpoint.last_seq,
+        'records': checkpoint.records,
+        'updated_at': checkpoint.updated_at.isoformat() if checkpoint.updated_at else None
+    })
+
 @app.route('/api/user/<int:user_id>/sync', methods=['GET'])
 def get_user_sync(user_id):
-    """Return recent user-side data so the frontend can populate local storage on login."""
+    """Return recent user-side data so the frontend can populate local storage on login.
+
+    With ?cursor=... only rows added since the device's last sync are returned (see delta_sync);
+    crop, recommendation and notification state comes from the dashboard endpoint instead.
+    """
     user = User.query.get(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
+    wait_for_activity_log(user_id)
+
+    if 'cursor' in request.args:
+        try:
+            cursor = parse_sync_cursor(request.args.get('cursor'))
+            limit = max(1, min(int(request.args.get('limit', SYNC_DELTA_LIMIT)), SYNC_DELTA_MAX_LIMIT))
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor or limit'}), 400
+        return jsonify(delta_sync(user_id, cursor, limit))
 
     # Recent user actions
     actions = UserAction.query.filter_by(user_id=user_id).order_by(UserAction.created_at.desc()).limit(200).all()
@@ -1756,19 +2623,10 @@ def implement_recommendation(planting_id, recommendation_id):
         db.session.commit()
 
         # Log user action for implementation
-        try:
-            crop = UserCrop.query.get(planting_id)
-            if crop:
-                user_action = UserAction(
-                    user_id=crop.user_id,
-                    planting_id=planting_id,
-                    action_type='recommendation_implemented',
-                    details=json.dumps({'recommendation_id': recommendation.recommendation_id, 'action': recommendation.action_type})
-                )
-                db.session.add(user_action)
-                db.session.commit()
-        except Exception:
-            db.session.rollback()
+        crop = UserCrop.query.get(planting_id)
+        if crop:
+            activity_log.record(crop.user_id, 'recommendation_implemented', planting_id,
+                                {'recommendation_id': recommendation.recommendation_id, 'action': recommendation.action_type})
         
         return jsonify({
             'success': True,
@@ -1805,130 +2663,398 @@ def add_user_action_endpoint(user_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Action history is paged newest-first with a keyset cursor on (created_at, action_id):
+# each page is an index range scan instead of a growing LIMIT. The stored details
+# text is already JSON, so rows are written out with it spliced in verbatim.
+ACTIONS_PAGE_LIMIT = int(os.getenv('ACTIONS_PAGE_LIMIT', '100'))
+ACTIONS_MAX_LIMIT = int(os.getenv('ACTIONS_MAX_LIMIT', '1000'))
+ACTIONS_EXPORT_BATCH = 1000
+
+def parse_actions_cursor(value):
+    """'<created_at iso>~<action_id>' -> (datetime, int)"""
+    created_at, action_id = value.rsplit('~', 1)
+    return datetime.fromisoformat(created_at), int(action_id)
+
+def format_actions_cursor(created_at, action_id):
+    return f'{created_at.isoformat()}~{action_id}'
+
+def action_row_json(row):
+    """One (action_id, user_id, planting_id, action_type, details, created_at) row as JSON text.
+
+    details is spliced in as stored: every writer (activity_log.record, the sync importer,
+    POST /actions) stores it JSON-encoded.
+    """
+    return '{"action_id":%d,"user_id":%d,"planting_id":%s,"action_type":%s,"details":%s,"created_at":%s}' % (
+        row[0], row[1], json.dumps(row[2]), json.dumps(row[3]), row[4] or 'null',
+        json.dumps(row[5].isoformat() if row[5] else None)
+    )
+
+def query_actions_page(user_id, limit, cursor=None, since=None):
+    """Up to limit rows older than cursor, newest first, as plain tuples"""
+    q = db.session.query(UserAction.action_id, UserAction.user_id, UserAction.planting_id,
+                         UserAction.action_type, UserAction.details, UserAction.created_at) \
+        .filter(UserAction.user_id == user_id)
+    if since is not None:
+        q = q.filter(UserAction.created_at >= since)
+    if cursor is not None:
+        q = q.filter(db.tuple_(UserAction.created_at, UserAction.action_id) < db.tuple_(*cursor))
+    return q.order_by(UserAction.created_at.desc(), UserAction.action_id.desc()).limit(limit).all()
+
+def parse_actions_args(args):
+    """(cursor, since) from query args; raises ValueError on a malformed value"""
+    cursor = parse_actions_cursor(args['cursor']) if args.get('cursor') else None
+    since = datetime.fromisoformat(args['since']) if args.get('since') else None
+    return cursor, since
+
+def stream_actions_export(user_id, cursor, since, fmt):
+    """Every matching action, fetched in keyset batches and written as NDJSON or one JSON array"""
+    if fmt == 'json':
+        yield '{"actions":['
+    first = True
+    while True:
+        rows = query_actions_page(user_id, ACTIONS_EXPORT_BATCH, cursor, since)
+        if rows:
+            if fmt == 'json':
+                yield ('' if first else ',') + ','.join(action_row_json(r) for r in rows)
+            else:
+                yield ''.join(action_row_json(r) + '\n' for r in rows)
+            first = False
+            cursor = (rows[-1][5], rows[-1][0])
+        if len(rows) < ACTIONS_EXPORT_BATCH:
+            break
+    if fmt == 'json':
+        yield ']}'
+
 @app.route('/api/user/<int:user_id>/actions', methods=['GET'])
 def get_user_actions(user_id):
-    """Return user actions (with optional limit or since parameter)"""
+    """Return one page of user actions, newest first.
+
+    ?limit= (capped at ACTIONS_MAX_LIMIT), ?since= and ?cursor= (the next_cursor of the previous page).
+    """
     try:
         user = User.query.get(user_id)
         if not user:
             return jsonify({'error': 'User not found'}), 404
-        limit = int(request.args.get('limit', 100))
-        since = request.args.get('since')
-        q = UserAction.query.filter_by(user_id=user_id).order_by(UserAction.created_at.desc())
-        if since:
-            try:
-                since_dt = datetime.fromisoformat(since)
-                q = q.filter(UserAction.created_at >= since_dt)
-            except Exception:
-                pass
-        actions = q.limit(limit).all()
-        return jsonify({'actions': [a.as_dict() for a in actions]})
+        wait_for_activity_log(user_id)
+        try:
+            limit = max(1, min(int(request.args.get('limit', ACTIONS_PAGE_LIMIT)), ACTIONS_MAX_LIMIT))
+            cursor, since = parse_actions_args(request.args)
+        except ValueError:
+            return jsonify({'error': 'Invalid limit, since or cursor'}), 400
+
+        rows = query_actions_page(user_id, limit + 1, cursor, since)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = format_actions_cursor(rows[-1][5], rows[-1][0]) if has_more else None
+        body = '{"actions":[%s],"has_more":%s,"next_cursor":%s}' % (
+            ','.join(action_row_json(r) for r in rows), json.dumps(has_more), json.dumps(next_cursor))
+        return Response(body, mimetype='application/json')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/user/<int:user_id>/actions/export', methods=['GET'])
+def export_user_actions(user_id):
+    """Stream the full action history (?format=ndjson, the default, or json), newest first"""
+    user = User.query.get(user_id)
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    wait_for_activity_log(user_id)
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'json'):
+        return jsonify({'error': "format must be 'ndjson' or 'json'"}), 400
+    try:
+        cursor, since = parse_actions_args(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid since or cursor'}), 400
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(stream_with_context(stream_actions_export(user_id, cursor, since, fmt)), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename=user-{user_id}-actions.{fmt}'})
+
+
+@app.route('/api/user/<int:user_id>/notifications', methods=['GET'])
+def get_user_notifications(user_id):
+    """Newest unread notifications (?limit=, max NOTIFICATIONS_MAX_LIMIT) and the unread count"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), NOTIFICATIONS_MAX_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit'}), 400
+    rows, unread_count = notification_service.recent_unread(user_id, limit)
+    return jsonify({
+        'unread_count': unread_count,
+        'notifications': [{
+            'id': n.notification_id,
+            'planting_id': n.planting_id,
+            'type': n.notification_type,
+            'title': n.title,
+            'message': n.message,
+            'time': n.created_at.isoformat(),
+            'scheduled_for': n.scheduled_for.isoformat() if n.scheduled_for else None
+        } for n in rows]
+    })
+
+@app.route('/api/user/<int:user_id>/notifications/unread-count', methods=['GET'])
+def get_unread_notification_count(user_id):
+    return jsonify({'unread_count': notification_service.unread_count(user_id)})
+
+@app.route('/api/user/<int:user_id>/notifications/read', methods=['POST'])
+def mark_notifications_read(user_id):
+    """Bulk mark-as-read: {"ids": [...]} or {"all": true}"""
+    data = request.get_json(silent=True) or {}
+    ids = data.get('ids')
+    if data.get('all') is True:
+        ids = None
+    elif not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return jsonify({'error': "Provide 'ids' (list of notification ids) or 'all': true"}), 400
+    try:
+        marked = notification_service.mark_read(user_id, ids)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    return jsonify({'success': True, 'marked': marked, 'unread_count': notification_service.unread_count(user_id)})
+
+
+# Push topic -> tables whose changes can alter its payload
+PUSH_TOPICS = {
+    'crop_status': {'user_crops', 'manual_observations', 'crops_master', 'growth_milestones'},
+    'notifications': {'notifications'},
+    'recommendations': {'recommendations', 'user_crops'}
+}
+
+def push_payload(topic, user_id, planting_id=None):
+    """Current state for one push topic (read-only, unlike GET /progress)"""
+    if topic == 'notifications':
+        rows, unread_count = notification_service.recent_unread(user_id, 10)
+        return {
+            'unread_count': unread_count,
+            'latest': [{'id': n.notification_id, 'type': n.notification_type, 'title': n.title,
+                        'message': n.message, 'time': n.created_at.isoformat()} for n in rows]
+        }
+
+    crops = UserCrop.query.filter_by(user_id=user_id, is_active=True)
+    if planting_id:
+        crops = crops.filter_by(planting_id=planting_id)
+    crops = crops.order_by(UserCrop.planting_id).all()
+    if topic == 'recommendations':
+        recs = Recommendation.query.filter(
+            Recommendation.planting_id.in_([c.planting_id for c in crops]),
+            Recommendation.implemented == False
+        ).order_by(Recommendation.recommendation_date.desc(), Recommendation.recommendation_id.desc()).limit(20).all()
+        return [{
+            'recommendation_id': r.recommendation_id,
+            'planting_id': r.planting_id,
+            'action': r.action_type,
+            'priority': r.priority,
+            'reasoning': r.reasoning,
+            'date': r.recommendation_date.isoformat() if r.recommendation_date else None
+        } for r in recs]
+
+    status = compute_crop_status_batch(
+        [c.planting_date for c in crops], [c.crop_type for c in crops],
+        pest_levels=[c.pest_pressure_level for c in crops], disease_flags=[c.disease_detected for c in crops],
+        last_observation_dates=[c.last_observation_date for c in crops]
+    )
+    return [{
+        'planting_id': c.planting_id,
+        'crop_type': c.crop_type,
+        'days_elapsed': int(status['days_elapsed'][i]),
+        'days_remaining': int(status['days_remaining'][i]),
+        'progress_percentage': float(status['progress'][i]),
+        'growth_stage': status['stage'][i],
+        'health_score': float(status['health_score'][i]),
+        'pest_level': c.pest_pressure_level,
+        'disease': c.disease_detected
+    } for i, c in enumerate(crops)]
+
+def stream_user_events(user_id, planting_id, subscription):
+    """SSE stream: every topic once, then only topics whose payload changed, plus heartbeats"""
+    sent = {}
+    event_id = 0
+    today = datetime.now().date()
+    topics = set(PUSH_TOPICS)
+    try:
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        while True:
+            for topic in sorted(topics):
+                payload = push_payload(topic, user_id, planting_id)
+                if payload != sent.get(topic):
+                    sent[topic] = payload
+                    event_id += 1
+                    yield f'id: {event_id}\nevent: {topic}\ndata: {json.dumps(payload)}\n\n'
+            db.session.close()  # no pooled connection or read snapshot held while idle
+
+            changed = subscription.wait(SSE_HEARTBEAT_SECONDS)
+            if datetime.now().date() != today:
+                today = datetime.now().date()
+                changed.add('user_crops')  # progress moves at midnight without any write
+            if not changed:
+                yield ': heartbeat\n\n'
+            topics = {topic for topic, tables in PUSH_TOPICS.items() if tables & changed}
+    finally:
+        subscription.close()
+
+def open_event_stream(user_id, planting_id=None):
+    try:
+        subscription = event_hub.connect(user_id)
+    except TooManyConnections as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '30'}
+    db.session.close()
+    response = Response(stream_with_context(stream_user_events(user_id, planting_id, subscription)),
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(subscription.close)  # also covers a stream closed before it started
+    return response
+
+@app.route('/api/user/<int:user_id>/events', methods=['GET'])
+def user_events(user_id):
+    """Server-Sent Events: crop_status, recommendations and notifications when they change"""
+    if not User.query.get(user_id):
+        return jsonify({'error': 'User not found'}), 404
+    return open_event_stream(user_id, request.args.get('planting_id', type=int))
+
+@app.route('/api/crop/<int:planting_id>/events', methods=['GET'])
+def crop_events(planting_id):
+    """Server-Sent Events for one planting (replaces polling /api/crop/<id>/progress)"""
+    crop = UserCrop.query.get(planting_id)
+    if not crop:
+        return jsonify({'error': 'Crop not found'}), 404
+    return open_event_stream(crop.user_id, planting_id)
 
 
 @app.route('/api/user/<int:user_id>/dashboard', methods=['GET'])
 def get_user_dashboard(user_id):
-    """Get complete dashboard data for user"""
+    """Get complete dashboard data for user (cached per user, supports If-None-Match)"""
     try:
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'User not found'}), 404
+        cached = dashboard_cache.get(user_id) if dashboard_cache else None
+        if cached:
+            body, etag = cached
+        else:
+            generation = dashboard_cache.generation(user_id) if dashboard_cache else None
+            user = User.query.get(user_id)
+            if not user:
+                return jsonify({'error': 'User not found'}), 404
+            body = app.json.dumps(build_user_dashboard(user))
+            if dashboard_cache:
+                etag = dashboard_cache.put(user_id, body, generation)
+            else:
+                etag = DashboardCache.make_etag(body)
+
+        response = app.response_class(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.headers['X-Dashboard-Cache'] = 'hit' if cached else 'miss'
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def build_user_dashboard(user):
+    """Assemble the dashboard payload for one user"""
+    user_id = user.user_id
+
+    # Active crops with their total growth days (one joined query)
+    active_rows = db.session.query(UserCrop, CropMaster.total_growth_days).outerjoin(
+        CropMaster, CropMaster.crop_type == UserCrop.crop_type
+    ).filter(
+        UserCrop.user_id == user_id, UserCrop.is_active == True
+    ).order_by(UserCrop.planting_id).all()
+    active_crops = [crop for crop, _ in active_rows]
+
+    # Two most recent pending recommendations per crop (one windowed query)
+    recs_by_crop = {}
+    if active_crops:
+        ranked = db.session.query(
+            Recommendation,
+            db.func.row_number().over(
+                partition_by=Recommendation.planting_id,
+                order_by=(Recommendation.recommendation_date.desc(), Recommendation.recommendation_id.desc())
+            ).label('rn')
+        ).filter(
+            Recommendation.planting_id.in_([c.planting_id for c in active_crops]),
+            Recommendation.implemented == False
+        ).subquery()
+        ranked_rec = db.aliased(Recommendation, ranked)
+        for rec in db.session.query(ranked_rec).filter(ranked.c.rn <= 2).order_by(ranked.c.planting_id, ranked.c.rn):
+            recs_by_crop.setdefault(rec.planting_id, []).append(rec)
+
+    # Progress for all crops in one vectorised pass
+    status = compute_crop_status_batch(
+        [crop.planting_date for crop in active_crops], [crop.crop_type for crop in active_crops],
+        total_days=[total for _, total in active_rows]
+    )
+    
+    crops_data = []
+    for i, crop in enumerate(active_crops):
+        progress = float(status['progress'][i])
         
-        # Get active crops
-        active_crops = UserCrop.query.filter_by(
-            user_id=user_id, is_active=True
-        ).all()
+        # Latest pending recommendation
+        crop_recs = recs_by_crop.get(crop.planting_id, [])
+        latest_rec = crop_recs[0] if crop_recs else None
         
-        crops_data = []
-        for crop in active_crops:
-            # Calculate progress
-            crop_master = CropMaster.query.filter_by(crop_type=crop.crop_type).first()
-            total_days = crop_master.total_growth_days if crop_master else 120
-            progress = calculate_growth_progress(crop.planting_date, total_days)
-            
-            # Get latest recommendation
-            latest_rec = Recommendation.query.filter_by(
-                planting_id=crop.planting_id,
-                implemented=False
-            ).order_by(Recommendation.recommendation_date.desc()).first()
-            
-            crops_data.append({
+        crops_data.append({
+            'planting_id': crop.planting_id,
+            'crop_type': crop.crop_type,
+            'planting_date': crop.planting_date.isoformat(),
+            'progress': progress,
+            'growth_stage': crop.current_growth_stage,
+            'days_remaining': crop.days_remaining,
+            'health_score': crop.health_score,
+            'latest_action': latest_rec.action_type if latest_rec else 'monitor',
+            'pest_level': crop.pest_pressure_level,
+            'disease': crop.disease_detected
+        })
+    
+    # Get weather data
+    weather_data = {}
+    if user.location_lat and user.location_lon:
+        current, forecast = weather_service.get_weather_and_forecast(user.location_lat, user.location_lon)
+        weather_data = {
+            'current': current,
+            'forecast': forecast[:3]
+        }
+    
+    # Get notifications (unread count comes from the in-memory counter)
+    notifications, unread_count = notification_service.recent_unread(user_id, 10)
+    
+    # Get pending recommendations
+    pending_recs = []
+    for crop in active_crops:
+        for rec in recs_by_crop.get(crop.planting_id, []):
+            pending_recs.append({
                 'planting_id': crop.planting_id,
                 'crop_type': crop.crop_type,
-                'planting_date': crop.planting_date.isoformat(),
-                'progress': progress,
-                'growth_stage': crop.current_growth_stage,
-                'days_remaining': crop.days_remaining,
-                'health_score': crop.health_score,
-                'latest_action': latest_rec.action_type if latest_rec else 'monitor',
-                'pest_level': crop.pest_pressure_level,
-                'disease': crop.disease_detected
+                'action': rec.action_type,
+                'reasoning': rec.reasoning,
+                'priority': rec.priority,
+                'date': rec.recommendation_date.isoformat()
             })
-        
-        # Get weather data
-        weather_data = {}
-        if user.location_lat and user.location_lon:
-            current = weather_service.get_weather(user.location_lat, user.location_lon)
-            forecast = weather_service.get_forecast(user.location_lat, user.location_lon)
-            weather_data = {
-                'current': current,
-                'forecast': forecast[:3]
-            }
-        
-        # Get notifications
-        notifications = Notification.query.filter_by(
-            user_id=user_id, is_read=False
-        ).order_by(Notification.created_at.desc()).limit(10).all()
-        
-        # Get pending recommendations
-        pending_recs = []
-        for crop in active_crops:
-            recs = Recommendation.query.filter_by(
-                planting_id=crop.planting_id,
-                implemented=False
-            ).order_by(Recommendation.recommendation_date.desc()).limit(2).all()
-            
-            for rec in recs:
-                pending_recs.append({
-                    'planting_id': crop.planting_id,
-                    'crop_type': crop.crop_type,
-                    'action': rec.action_type,
-                    'reasoning': rec.reasoning,
-                    'priority': rec.priority,
-                    'date': rec.recommendation_date.isoformat()
-                })
-        
-        # Sort by priority
-        priority_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
-        pending_recs.sort(key=lambda x: priority_order.get(x['priority'], 4))
-        
-        return jsonify({
-            'user': {
-                'username': user.username,
-                'location': user.location_name,
-                'joined': user.created_at.isoformat()
-            },
-            'active_crops': crops_data,
-            'weather': weather_data,
-            'pending_recommendations': pending_recs[:5],
-            'notifications': [{
-                'id': n.notification_id,
-                'type': n.notification_type,
-                'title': n.title,
-                'message': n.message,
-                'time': n.created_at.isoformat()
-            } for n in notifications],
-            'summary': {
-                'total_crops': len(active_crops),
-                'avg_progress': np.mean([c['progress'] for c in crops_data]) if crops_data else 0,
-                'avg_health': np.mean([c['health_score'] for c in crops_data]) if crops_data else 100,
-                'alerts': len([c for c in crops_data if c['pest_level'] in ['medium', 'high'] or c['disease']])
-            }
-        })
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    
+    # Sort by priority
+    priority_order = {'critical': 0, 'high': 1, 'medium': 2, 'low': 3}
+    pending_recs.sort(key=lambda x: priority_order.get(x['priority'], 4))
+    
+    return {
+        'user': {
+            'username': user.username,
+            'location': user.location_name,
+            'joined': user.created_at.isoformat()
+        },
+        'active_crops': crops_data,
+        'weather': weather_data,
+        'pending_recommendations': pending_recs[:5],
+        'notifications': [{
+            'id': n.notification_id,
+            'type': n.notification_type,
+            'title': n.title,
+            'message': n.message,
+            'time': n.created_at.isoformat()
+        } for n in notifications],
+        'summary': {
+            'total_crops': len(active_crops),
+            'avg_progress': np.mean([c['progress'] for c in crops_data]) if crops_data else 0,
+            'avg_health': np.mean([c['health_score'] for c in crops_data]) if crops_data else 100,
+            'alerts': len([c for c in crops_data if c['pest_level'] in ['medium', 'high'] or c['disease']]),
+            'unread_notifications': unread_count
+        }
+    }
 
 # ============================================
 # HELPER FUNCTIONS
@@ -1967,17 +3093,14 @@ def create_initial_recommendations(planting_id, crop_type):
 
 def calculate_water_amount(crop_type, growth_stage, features):
     """Calculate optimal water amount"""
-    crop = CropMaster.query.filter_by(crop_type=crop_type).first()
+    crop = crop_reference.crop(crop_type)
     if not crop:
         return 10.0
     
-    base_water = crop.water_need_l_per_week
+    base_water = crop['water_need_l_per_week']
     
     # Adjust for growth stage
-    milestone = GrowthMilestone.query.filter_by(
-        crop_type=crop_type, growth_stage=growth_stage
-    ).first()
-    multiplier = milestone.water_requirement_multiplier if milestone else 1.0
+    multiplier = crop_reference.water_multiplier(crop_type, growth_stage)
     
     # Adjust for weather/temperature
     temp_factor = 1.0
@@ -2132,21 +3255,17 @@ def determine_weather_impact(current_weather):
 
 def get_next_milestone(crop_type, days_elapsed):
     """Get next growth milestone"""
-    milestones = GrowthMilestone.query.filter_by(
-        crop_type=crop_type
-    ).order_by('days_from_planting').all()
-    
-    if not milestones:
+    if not crop_reference.milestones(crop_type):
         return None
     
-    for milestone in milestones:
-        if milestone.days_from_planting > days_elapsed:
-            return {
-                'stage': milestone.growth_stage,
-                'days_until': milestone.days_from_planting - days_elapsed,
-                'ideal_temp': f"{milestone.ideal_temp_min}-{milestone.ideal_temp_max}°C",
-                'key_tasks': milestone.key_tasks or 'Monitor growth and health'
-            }
+    milestone = crop_reference.next_milestone(crop_type, days_elapsed)
+    if milestone:
+        return {
+            'stage': milestone['growth_stage'],
+            'days_until': milestone['days_from_planting'] - days_elapsed,
+            'ideal_temp': f"{milestone['ideal_temp_min']}-{milestone['ideal_temp_max']}°C",
+            'key_tasks': milestone['key_tasks'] or 'Monitor growth and health'
+        }
     
     return {'stage': 'harvest', 'days_until': 0, 'key_tasks': 'Prepare for harvest'}
 
@@ -2169,8 +3288,9 @@ def get_crop_season(crop_type):
 def initialize_database():
     """Initialize database with sample data"""
     with app.app_context():
-        # Create tables
+        # Create tables, then bring existing databases up to date
         db.create_all()
+        apply_migrations(db.engine, MIGRATIONS)
         
         # Check if crops already exist
         if CropMaster.query.count() == 0:
@@ -2227,6 +3347,12 @@ def initialize_database():
             db.session.commit()
             print("Database initialized successfully!")
 
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create tables, apply pending schema migrations and load the crop reference data"""
+    initialize_database()
+
 # -------------------------
 # Authentication Endpoints
 # -------------------------
@@ -2255,9 +3381,7 @@ def register_user():
         db.session.commit()
 
         # Record registration action
-        ua = UserAction(user_id=user.user_id, action_type='register', details=json.dumps({'username': username}))
-        db.session.add(ua)
-        db.session.commit()
+        activity_log.record(user.user_id, 'register', details={'username': username})
 
         return jsonify({'success': True, 'user': {'user_id': user.user_id, 'username': user.username, 'email': user.email}}), 201
 
@@ -2284,12 +3408,7 @@ def login_user():
             return jsonify({'error': 'Invalid credentials'}), 401
 
         # Record login action
-        try:
-            ua = UserAction(user_id=user.user_id, action_type='login', details=json.dumps({'ip': request.remote_addr}))
-            db.session.add(ua)
-            db.session.commit()
-        except Exception:
-            db.session.rollback()
+        activity_log.record(user.user_id, 'login', details={'ip': request.remote_addr})
 
         return jsonify({'success': True, 'user': {'user_id': user.user_id, 'username': user.username, 'email': user.email, 'location_lat': user.location_lat, 'location_lon': user.location_lon, 'location_name': user.location_name}})
 
@@ -2460,16 +3579,15 @@ if __name__ == '__main__':
     print("=" * 50)
     print("🌱 Smart Crop System Backend ")
     print("=" * 50)
-    print(f"SVM Model: {'✅ Loaded' if ml_models.svm_model else '⚠️ Rule-based'}")
-    print(f"Random Forest Model: {'✅ Loaded' if ml_models.random_forest_model else '❌ Not loaded'}")
-    print(f"Decision Tree Model: {'✅ Loaded' if ml_models.decision_tree_model else '❌ Not loaded'}")
-    print(f"Keras H5 Model: {'✅ Loaded' if crop_model else '❌ Not loaded'}")
+    print(f"Model loading: {MODEL_WARMUP} (state reported by /api/health)")
     print(f"Database: ✅ Connected")
     print(f"Weather Service: ✅ Ready")
     print("=" * 50)
     print("🌾 Available API Endpoints:")
     print("  GET  /api/health - Health check")
-    print("  POST /api/predict - Image analysis (H5 model)")
+    print("  POST /api/predict - Image analysis (crop CNN)")
+    print("  POST /api/predict/batch - Multi-image / zip analysis (NDJSON stream)")
+    print("  GET  /api/predict/stats - Inference batcher metrics")
     print("  POST /api/predict-fertilizer - Fertilizer recommendation (Random Forest)")
     print("  POST /api/predict-tasks - Task recommendation (Decision Tree)")
     print("  POST /api/weather - Weather data")
@@ -0,0 +1,96 @@
+# bench_activity_log.py
+# Request-shaped writes from concurrent threads: one commit for the request's
+# own row plus the audit UserAction, either committed inline as before or
+# handed to the buffered activity log. Reports per-request latency and
+# write transactions on the main database.
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_activity.db')
+
+import numpy as np
+from sqlalchemy import event
+
+import app
+from app import db, User, UserCrop, ManualObservation, UserAction
+
+
+def legacy_audit(user_id, planting_id):
+    db.session.add(UserAction(user_id=user_id, planting_id=planting_id, action_type='manual_observation',
+                              details=json.dumps({'pest_presence': 'low'})))
+    db.session.commit()
+
+
+def buffered_audit(user_id, planting_id):
+    app.activity_log.record(user_id, 'manual_observation', planting_id, {'pest_presence': 'low'})
+
+
+def run(audit, threads, per_thread, user_id, planting_id):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        mine = []
+        for _ in range(per_thread):
+            with app.app.app_context():
+                start = time.perf_counter()
+                db.session.add(ManualObservation(planting_id=planting_id, observation_date=datetime.now().date(), pest_presence='low'))
+                db.session.commit()
+                audit(user_id, planting_id)
+                mine.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(mine)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    app.activity_log.flush(timeout=60)
+    return time.perf_counter() - start, np.array(latencies)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='per thread')
+    args = parser.parse_args()
+
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        crop = UserCrop(user_id=user.user_id, crop_type='Tomato', planting_date=datetime.now().date())
+        db.session.add(crop)
+        db.session.commit()
+        user_id, planting_id = user.user_id, crop.planting_id
+        commits = {'count': 0}
+        event.listen(db.engine, 'commit', lambda conn: commits.__setitem__('count', commits['count'] + 1))
+
+    print("=" * 72)
+    print(f"{args.threads} threads x {args.requests} requests, SQLite profile '{app.SQLITE_PROFILE}'")
+    print(f"{'audit write':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'commits':>10}{'actions':>10}")
+    for name, audit in (('inline commit', legacy_audit), ('buffered', buffered_audit)):
+        commits['count'] = 0
+        with app.app.app_context():
+            before = UserAction.query.count()
+        elapsed, lat = run(audit, args.threads, args.requests, user_id, planting_id)
+        with app.app.app_context():
+            written = UserAction.query.count() - before
+        total = args.threads * args.requests
+        print(f"{name:<14}{total / elapsed:>10.0f}{np.percentile(lat, 50):>10.2f}"
+              f"{np.percentile(lat, 99):>10.2f}{commits['count']:>10}{written:>10}")
+    print("=" * 72)
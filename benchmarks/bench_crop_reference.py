@@ -0,0 +1,82 @@
+# bench_crop_reference.py
+# Stage / next-milestone / water lookups for 100k (crop, days_elapsed) pairs:
+# the old per-call GrowthMilestone queries vs. the in-memory index.
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_reference.db')
+
+import numpy as np
+
+import app
+from app import GrowthMilestone
+
+
+def legacy_stage(days_elapsed, crop_type):
+    """determine_growth_stage as it was: one query per call"""
+    milestones = GrowthMilestone.query.filter_by(crop_type=crop_type).order_by('days_from_planting').all()
+    if not milestones:
+        if days_elapsed < 15:
+            return 'seedling'
+        elif days_elapsed < 50:
+            return 'vegetative'
+        elif days_elapsed < 90:
+            return 'flowering'
+        return 'mature'
+    current_stage = 'seedling'
+    for milestone in milestones:
+        if days_elapsed >= milestone.days_from_planting:
+            current_stage = milestone.growth_stage
+    return current_stage
+
+
+def timed(fn, pairs):
+    start = time.perf_counter()
+    out = [fn(days, crop) for crop, days in pairs]
+    return time.perf_counter() - start, out
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pairs', type=int, default=100000)
+    parser.add_argument('--legacy-pairs', type=int, default=5000,
+                        help='the query path is timed on a subset and scaled')
+    args = parser.parse_args()
+
+    app.initialize_database()
+    rng = np.random.default_rng(0)
+    crops = ['Tomato', 'Rice', 'Wheat', 'Maize', 'Potato', 'Soybean', 'Unknown']
+    pairs = list(zip(rng.choice(crops, args.pairs).tolist(), rng.integers(0, 160, args.pairs).tolist()))
+
+    with app.app.app_context():
+        app.crop_reference.reload()
+        legacy_s, legacy_out = timed(legacy_stage, pairs[:args.legacy_pairs])
+        index_s, index_out = timed(app.determine_growth_stage, pairs)
+        assert index_out[:args.legacy_pairs] == legacy_out
+
+        start = time.perf_counter()
+        for crop, days in pairs:
+            app.get_next_milestone(crop, days)
+        next_s = time.perf_counter() - start
+        start = time.perf_counter()
+        for crop, days in pairs:
+            app.calculate_water_amount(crop, 'flowering', {'temperature_category': 'warm'})
+        water_s = time.perf_counter() - start
+
+    scale = args.pairs / args.legacy_pairs
+    print("=" * 60)
+    print(f"{args.pairs} (crop, days_elapsed) pairs")
+    print(f"{'path':<32}{'total (s)':>12}{'per call (us)':>16}")
+    print(f"{'stage, query per call (scaled)':<32}{legacy_s * scale:>12.2f}{legacy_s / args.legacy_pairs * 1e6:>16.1f}")
+    print(f"{'stage, index':<32}{index_s:>12.3f}{index_s / args.pairs * 1e6:>16.2f}")
+    print(f"{'next milestone, index':<32}{next_s:>12.3f}{next_s / args.pairs * 1e6:>16.2f}")
+    print(f"{'water amount, index':<32}{water_s:>12.3f}{water_s / args.pairs * 1e6:>16.2f}")
+    print(f"speed-up (stage): {legacy_s * scale / index_s:.0f}x, index version {app.crop_reference.version}")
+    print("=" * 60)
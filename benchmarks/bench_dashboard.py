@@ -0,0 +1,75 @@
+# bench_dashboard.py
+# GET /api/user/<id>/dashboard latency and SQL statement count vs. number of
+# active crops, on a scratch SQLite database (weather calls stubbed out).
+import os
+import sys
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DASHBOARD_CACHE_TTL'] = '0'  # measure the uncached build
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_dashboard.db')
+
+import numpy as np
+from sqlalchemy import event
+
+import app
+from app import db, User, CropMaster, UserCrop, Recommendation, Notification
+
+
+def seed(n_crops):
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(CropMaster(crop_type='Tomato', total_growth_days=110))
+        user = User(username='bench', email='bench@example.com', password_hash='x',
+                    location_lat=10.0, location_lon=76.3)
+        db.session.add(user)
+        db.session.flush()
+        today = datetime.now().date()
+        for i in range(n_crops):
+            crop = UserCrop(user_id=user.user_id, crop_type='Tomato', planting_date=today - timedelta(days=i % 90))
+            db.session.add(crop)
+            db.session.flush()
+            for d in range(5):
+                db.session.add(Recommendation(planting_id=crop.planting_id, recommendation_date=today - timedelta(days=d),
+                                              action_type='monitor', priority='medium'))
+        for i in range(20):
+            db.session.add(Notification(user_id=user.user_id, title='n', message='m'))
+        db.session.commit()
+        return user.user_id
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app.weather_service.get_weather = lambda lat, lon: {'temperature': 25, 'weather_category': 'sunny'}
+    app.weather_service.get_forecast = lambda lat, lon: []
+    client = app.app.test_client()
+
+    statements = {'count': 0}
+    with app.app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a: statements.__setitem__('count', statements['count'] + 1))
+
+    print("=" * 60)
+    print(f"{'crops':>6}{'queries':>10}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for n in (1, 10, 50, 100, 250):
+        user_id = seed(n)
+        client.get(f'/api/user/{user_id}/dashboard')  # warm up
+        statements['count'] = 0
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            client.get(f'/api/user/{user_id}/dashboard')
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"{n:>6}{statements['count'] // args.repeat:>10}"
+              f"{np.percentile(timings, 50):>12.2f}{np.percentile(timings, 95):>12.2f}")
+    print("=" * 60)
@@ -0,0 +1,80 @@
+# bench_decision_engine.py
+# 10k plantings through SmartCropDecisionEngine.predict_action (one call per row)
+# vs. predict_action_batch (one scale + one predict_proba), on the rule-based
+# fallback path and on an SVM trained on the engine's 6-feature layout.
+import os
+import sys
+import io
+import time
+import argparse
+import contextlib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+
+import app
+from sklearn.svm import SVC
+from sklearn.preprocessing import StandardScaler
+
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    weathers = ['sunny', 'cloudy', 'rainy', 'storm']
+    temps = ['cold', 'cool', 'optimal', 'warm', 'hot']
+    rows = []
+    for _ in range(n):
+        rows.append({
+            'visual_health': int(rng.integers(0, 4)),
+            'pest_pressure': int(rng.integers(0, 4)),
+            'growth_stage': int(rng.integers(0, 4)),
+            'days_elapsed': int(rng.integers(0, 150)),
+            'weather': int(rng.integers(0, 4)),
+            'temperature': int(rng.integers(0, 5)),
+            'weather_forecast': weathers[int(rng.integers(0, 4))],
+            'temperature_category': temps[int(rng.integers(0, 5))]
+        })
+    return rows
+
+
+def fit_svm(engine, rows):
+    """SVM on the 6-feature vector predict_action builds, labelled by the rule engine"""
+    X = np.array([[r['visual_health'], r['pest_pressure'], r['growth_stage'],
+                   min(r['days_elapsed'] / 100, 1), r['weather'], r['temperature']] for r in rows])
+    y = [int(engine.encode_action(engine.rule_based_decision(r)[0])) for r in rows]
+    scaler = StandardScaler().fit(X)
+    engine.scaler = scaler
+    engine.svm_model = SVC(probability=True, random_state=42).fit(scaler.transform(X), y)
+
+
+def compare(engine, rows, label):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        loop = [engine.predict_action(r) for r in rows]
+        loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actions, confidences, _ = engine.predict_action_batch(rows)
+    batch_time = time.perf_counter() - start
+
+    agreement = np.mean([l[0] == a for l, a in zip(loop, actions)])
+    print(f"{label:<12} loop {loop_time:8.3f}s  batch {batch_time:7.3f}s  "
+          f"speedup {loop_time / batch_time:6.1f}x  action agreement {agreement:.3f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    args = parser.parse_args()
+
+    engine = app.get_decision_engine()
+    rows = make_rows(args.rows)
+
+    print("=" * 80)
+    engine.svm_model = None
+    compare(engine, rows, 'rule-based')
+    fit_svm(engine, make_rows(2000, seed=1))
+    compare(engine, rows, 'svm')
+    print("=" * 80)
@@ -0,0 +1,91 @@
+# bench_image_preprocess.py
+# Per-image time and allocation of the /api/predict preprocessing paths on
+# test_images/:
+#   keras float64   img_to_array(img) / 255.0 + np.expand_dims (the original route)
+#   float32 copy    np.asarray(img, float32) / 255.0 (app.image_to_array)
+#   buffers         image_preprocess without JPEG draft decoding
+#   buffers+draft   image_preprocess as served
+# "peak KB" is the tracemalloc peak for one image, i.e. Python/numpy
+# allocations; Pillow's C-side bitmaps are not traced, which is why the JPEG
+# draft shows up in time rather than in this column.
+import io
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import numpy as np
+from PIL import Image
+
+import image_preprocess
+from model_export import image_paths
+
+
+def keras_float64(data):
+    img = Image.open(io.BytesIO(data)).convert('RGB').resize((224, 224))
+    arr = np.array(img, dtype=np.float64) / 255.0  # what keras img_to_array(img) / 255.0 produced
+    return np.expand_dims(arr, axis=0)
+
+
+def float32_copy(data):
+    img = Image.open(io.BytesIO(data)).convert('RGB').resize((224, 224))
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def buffers(data):
+    return image_preprocess.preprocess(io.BytesIO(data), draft=False)
+
+
+def buffers_draft(data):
+    return image_preprocess.preprocess(io.BytesIO(data))
+
+
+PATHS = [('keras float64', keras_float64), ('float32 copy', float32_copy),
+         ('buffers', buffers), ('buffers+draft', buffers_draft)]
+
+
+def measure(fn, images, repeat):
+    fn(images[0])  # warm-up (allocates the per-thread buffers)
+    tracemalloc.start()
+    peaks = []
+    for data in images:
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        fn(data)
+        peaks.append(tracemalloc.get_traced_memory()[1] - start)
+    tracemalloc.stop()
+
+    timings = []
+    for i in range(repeat):
+        t = time.perf_counter()
+        fn(images[i % len(images)])
+        timings.append((time.perf_counter() - t) * 1000)
+    return float(np.median(timings)), float(np.percentile(timings, 99)), max(peaks) / 1024
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--images', default='test_images')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    images = []
+    for path in image_paths(args.images):
+        with open(path, 'rb') as f:
+            images.append(f.read())
+    sizes = [Image.open(io.BytesIO(d)).size for d in images]
+    print(f"{len(images)} image(s) from {args.images}: {sizes[:3]}{' ...' if len(sizes) > 3 else ''}")
+    reference = float32_copy(images[0])
+
+    print("=" * 72)
+    print(f"{'path':<16}{'p50 ms':>10}{'p99 ms':>10}{'peak KB':>12}{'mean |Δ| vs float32':>22}")
+    for name, fn in PATHS:
+        p50, p99, peak_kb = measure(fn, images, args.repeat)
+        diff = float(np.mean(np.abs(np.asarray(fn(images[0]), dtype=np.float32).reshape(reference.shape) - reference)))
+        print(f"{name:<16}{p50:>10.2f}{p99:>10.2f}{peak_kb:>12.0f}{diff:>22.4f}")
+    print("=" * 72)
@@ -0,0 +1,88 @@
+# bench_inference_backends.py
+# Load time, resident memory and latency of each crop CNN backend (Keras H5,
+# TFLite, ONNX, INT8 TFLite) on test_images/. Every backend runs in a fresh
+# interpreter so RSS reflects only that runtime. Backends whose artifact or
+# runtime is missing are reported and skipped; export them first with
+# model_export.py and model_quantize.py.
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import numpy as np
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(backend_name, h5, repeat, batch_size):
+    from inference_backends import load_backend
+    from model_export import image_paths, load_image_batch
+
+    images = load_image_batch(image_paths('test_images'))
+    baseline = rss_mb()
+    start = time.perf_counter()
+    backend = load_backend(backend_name, h5)
+    load_s = time.perf_counter() - start
+    batch = np.concatenate([images] * (batch_size // len(images) + 1))[:batch_size]
+
+    backend.predict(images[:1])  # warm-up
+    single, batched = [], []
+    for i in range(repeat):
+        t = time.perf_counter()
+        backend.predict(images[i % len(images):i % len(images) + 1])
+        single.append((time.perf_counter() - t) * 1000)
+    for _ in range(max(3, repeat // 10)):
+        t = time.perf_counter()
+        backend.predict(batch)
+        batched.append((time.perf_counter() - t) * 1000 / batch_size)
+    print(json.dumps({
+        'backend': backend.name, 'load_s': load_s, 'rss_mb': rss_mb() - baseline,
+        'p50_ms': float(np.percentile(single, 50)), 'p99_ms': float(np.percentile(single, 99)),
+        'batch_ms_per_image': float(np.median(batched))
+    }))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--h5', default=os.path.join('models', 'crop_disease_pest_model.h5'))
+    parser.add_argument('--backends', default='keras,tflite,onnx,tflite_int8')
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.h5, args.repeat, args.batch_size)
+        sys.exit(0)
+
+    print("=" * 78)
+    print(f"{'backend':<10}{'load s':>9}{'RSS MB':>10}{'p50 ms':>10}{'p99 ms':>10}{'batch ms/img':>16}")
+    for name in args.backends.split(','):
+        proc = subprocess.run([sys.executable, __file__, '--child', name, '--h5', args.h5,
+                               '--repeat', str(args.repeat), '--batch-size', str(args.batch_size)],
+                              capture_output=True, text=True)
+        lines = [l for l in proc.stdout.splitlines() if l.startswith('{')]
+        if proc.returncode != 0 or not lines:
+            error = (proc.stderr.strip().splitlines() or ['failed'])[-1]
+            print(f"{name:<10}  skipped: {error[:60]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{r['backend']:<10}{r['load_s']:>9.2f}{r['rss_mb']:>10.0f}{r['p50_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['batch_ms_per_image']:>16.2f}")
+    print("=" * 78)
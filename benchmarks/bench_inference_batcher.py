@@ -0,0 +1,81 @@
+# bench_inference_batcher.py
+# Throughput of single-image predict calls vs. the micro-batching queue under
+# concurrent clients. Uses the Keras H5 model when available, otherwise a
+# synthetic model with a fixed per-call overhead.
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from inference_batcher import InferenceBatcher
+
+
+def load_predict_fn():
+    model_path = os.path.join('models', 'crop_disease_pest_model.h5')
+    try:
+        from tensorflow.keras.models import load_model
+        model = load_model(model_path)
+        print(f"✅ Using Keras model {model_path}")
+        return lambda batch: model.predict(batch, verbose=0)
+    except Exception as e:
+        print(f"⚠️ Keras model unavailable ({e}), using synthetic model")
+
+        device = threading.Lock()  # one forward pass at a time, like a single CPU model
+
+        def synthetic(batch):
+            with device:
+                time.sleep(0.004 + 0.0005 * len(batch))  # fixed call overhead + per-image cost
+            return np.random.rand(len(batch), 20).astype(np.float32)
+        return synthetic
+
+
+def run(clients, requests_per_client, max_batch_size, max_wait_ms):
+    predict_fn = load_predict_fn()
+    image = np.random.rand(224, 224, 3).astype(np.float32)
+    total = clients * requests_per_client
+
+    def direct(_):
+        for _ in range(requests_per_client):
+            predict_fn(image[np.newaxis])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(direct, range(clients)))
+    direct_time = time.perf_counter() - start
+
+    batcher = InferenceBatcher(predict_fn, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    def batched(_):
+        for _ in range(requests_per_client):
+            batcher.predict(image)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(batched, range(clients)))
+    batched_time = time.perf_counter() - start
+    stats = batcher.stats()
+    batcher.stop()
+
+    print("=" * 50)
+    print(f"Clients: {clients}, requests: {total}")
+    print(f"Direct : {total / direct_time:8.1f} img/s")
+    print(f"Batched: {total / batched_time:8.1f} img/s (avg batch {stats['avg_batch_size']})")
+    print(f"Batch-size histogram: {stats['batch_size_histogram']}")
+    for stage, s in stats['latency'].items():
+        if s['count']:
+            print(f"  {stage:<11} p50={s['p50_ms']:.2f}ms p95={s['p95_ms']:.2f}ms")
+    print("=" * 50)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=20)
+    parser.add_argument('--max-batch-size', type=int, default=16)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    args = parser.parse_args()
+    run(args.clients, args.requests, args.max_batch_size, args.max_wait_ms)
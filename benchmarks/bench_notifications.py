@@ -0,0 +1,79 @@
+# bench_notifications.py
+# Creating alerts and reading unread counts for a user with a long
+# notification history: inline add + commit vs. the outbox, and
+# COUNT(*) over the unread index vs. the in-memory counter.
+import os
+import sys
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_notifications.db')
+
+from sqlalchemy import insert
+
+import app
+from app import db, User, Notification, notification_service
+
+
+def seed(history, unread_every):
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='busy', email='busy@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        start = datetime(2024, 1, 1)
+        db.session.execute(insert(Notification), [
+            {'user_id': user.user_id, 'notification_type': 'alert', 'title': 'Crop Issue Detected', 'message': 'm',
+             'is_read': i % unread_every != 0, 'created_at': start + timedelta(minutes=i)}
+            for i in range(history)])
+        db.session.commit()
+        return user.user_id
+
+
+def per_call_ms(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - start) * 1000 / n
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--history', type=int, default=100000)
+    parser.add_argument('--unread-every', type=int, default=3)
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    user_id = seed(args.history, args.unread_every)
+
+    def inline_create():
+        with app.app.app_context():
+            db.session.add(Notification(user_id=user_id, notification_type='alert', title='t', message='m', is_read=False))
+            db.session.commit()
+
+    def outbox_create():
+        notification_service.notify(user_id, 'alert', 't', 'm')
+
+    def count_query():
+        with app.app.app_context():
+            Notification.query.filter_by(user_id=user_id, is_read=False).count()
+
+    print("=" * 60)
+    print(f"{args.history:,} notifications, {args.history // args.unread_every:,} unread")
+    print(f"{'create (inline commit)':<32}{per_call_ms(inline_create, args.calls):>10.3f} ms")
+    print(f"{'create (outbox)':<32}{per_call_ms(outbox_create, args.calls):>10.3f} ms")
+    start = time.perf_counter()
+    notification_service.flush(timeout=60)
+    print(f"{'  outbox drain':<32}{(time.perf_counter() - start) * 1000:>10.1f} ms total, "
+          f"{notification_service.stats()['batches']} batches")
+    print(f"{'unread count (COUNT query)':<32}{per_call_ms(count_query, args.calls):>10.3f} ms")
+    notification_service.unread_count(user_id)
+    print(f"{'unread count (counter)':<32}{per_call_ms(lambda: notification_service.unread_count(user_id), args.calls):>10.3f} ms")
+    print("=" * 60)
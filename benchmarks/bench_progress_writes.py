@@ -0,0 +1,143 @@
+# bench_progress_writes.py
+# Concurrent GET /api/crop/<id>/progress pollers plus one observation writer.
+# Compares the old handler (UPDATE autoflushed before the reads and the
+# weather call, committed at the end) with the current one (dirty check,
+# short write after the reads). Reports UPDATE count, how long the write
+# lock was held and the writer's latency.
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_progress.db')
+
+import numpy as np
+from flask import jsonify
+from sqlalchemy import event
+
+import app
+from app import (db, User, UserCrop, ManualObservation, Recommendation, weather_service,
+                 calculate_growth_progress, determine_growth_stage, calculate_health_score, crop_reference)
+
+
+@app.app.route('/bench/legacy-progress/<int:planting_id>')
+def legacy_progress(planting_id):
+    """The progress handler as it was: assign, read (autoflush), weather, commit"""
+    crop = UserCrop.query.get(planting_id)
+    total_days = crop_reference.total_growth_days(crop.crop_type, 120)
+    days_elapsed = max(0, (datetime.now().date() - crop.planting_date).days)
+    crop.days_elapsed = days_elapsed
+    crop.days_remaining = max(0, total_days - days_elapsed)
+    crop.growth_progress = calculate_growth_progress(crop.planting_date, total_days)
+    crop.current_growth_stage = determine_growth_stage(days_elapsed, crop.crop_type)
+    crop.health_score = calculate_health_score(crop)
+    ManualObservation.query.filter_by(planting_id=planting_id).order_by(ManualObservation.observation_date.desc()).first()
+    Recommendation.query.filter_by(planting_id=planting_id, implemented=False).first()
+    user = User.query.get(crop.user_id)
+    weather_service.get_weather(user.location_lat, user.location_lon)
+    db.session.commit()
+    return jsonify({'planting_id': planting_id})
+
+
+def seed(n_crops):
+    """Plantings whose stored derived fields are out of date (as after midnight)"""
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash='x', location_lat=10.0, location_lon=76.3)
+        db.session.add(user)
+        db.session.flush()
+        today = datetime.now().date()
+        for i in range(n_crops):
+            db.session.add(UserCrop(user_id=user.user_id, crop_type='Tomato', planting_date=today - timedelta(days=i % 100),
+                                    days_elapsed=0, growth_progress=0.0, health_score=100.0))
+        db.session.commit()
+        return user.user_id, [c.planting_id for c in UserCrop.query.all()]
+
+
+def run(url_template, plantings, pollers, seconds):
+    stop = time.perf_counter() + seconds
+    counters = {'gets': 0, 'errors': 0}
+    writer_ms = []
+    lock = threading.Lock()
+
+    def poll():
+        client = app.app.test_client()
+        while time.perf_counter() < stop:
+            resp = client.get(url_template.format(random.choice(plantings)))
+            with lock:
+                counters['gets'] += 1
+                counters['errors'] += resp.status_code != 200
+
+    def write():
+        client = app.app.test_client()
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            client.post(f'/api/crop/{random.choice(plantings)}/observation',
+                        json={'observation_type': 'visual', 'visual_health': 'good'})
+            writer_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=poll) for _ in range(pollers)] + [threading.Thread(target=write)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return counters, writer_ms
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--crops', type=int, default=200)
+    parser.add_argument('--pollers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--weather-ms', type=float, default=20.0, help='simulated weather API latency')
+    args = parser.parse_args()
+
+    def slow_weather(lat, lon):
+        time.sleep(args.weather_ms / 1000.0)
+        return {'temperature': 25, 'description': 'clear', 'weather_category': 'sunny'}
+    weather_service.get_weather = slow_weather
+
+    # Write-lock hold time: first UPDATE of a transaction until its COMMIT
+    tracking = {'updates': 0, 'held': []}
+    with app.app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE user_crops'):
+            tracking['updates'] += 1
+            conn.info.setdefault('write_started', time.perf_counter())
+        elif statement.startswith('INSERT'):
+            conn.info.setdefault('write_started', time.perf_counter())
+
+    def finished(conn):
+        started = conn.info.pop('write_started', None)
+        if started is not None:
+            tracking['held'].append((time.perf_counter() - started) * 1000)
+    event.listen(engine, 'commit', finished)
+    event.listen(engine, 'rollback', finished)
+
+    print("=" * 78)
+    print(f"{args.pollers} pollers + 1 observation writer, {args.crops} stale plantings, "
+          f"{args.weather_ms:.0f} ms weather latency, {args.seconds:.0f}s")
+    print(f"{'handler':<10}{'GETs':>8}{'UPDATEs':>10}{'lock p50':>11}{'lock p95':>11}{'writer p50':>13}{'writer p95':>13}")
+    for name, url in (('before', '/bench/legacy-progress/{}'), ('after', '/api/crop/{}/progress')):
+        _, plantings = seed(args.crops)
+        crop_reference.invalidate()
+        tracking['updates'], tracking['held'] = 0, []
+        counters, writer_ms = run(url, plantings, args.pollers, args.seconds)
+        held = tracking['held'] or [0]
+        print(f"{name:<10}{counters['gets']:>8}{tracking['updates']:>10}"
+              f"{np.percentile(held, 50):>9.1f}ms{np.percentile(held, 95):>9.1f}ms"
+              f"{np.percentile(writer_ms, 50):>11.1f}ms{np.percentile(writer_ms, 95):>11.1f}ms")
+    print("=" * 78)
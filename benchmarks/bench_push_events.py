@@ -0,0 +1,85 @@
+# bench_push_events.py
+# One idle dashboard tab over an hour: polling GET /api/crop/<id>/progress
+# every 60 s vs. one SSE stream with a 15 s heartbeat and a few real changes.
+# Heartbeats are sped up; request and query counts are what an hour costs.
+import os
+import sys
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_push.db')
+
+from sqlalchemy import event
+
+import app
+from app import db, User, UserCrop, Recommendation
+
+
+def seed():
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='idle', email='idle@example.com', password_hash='x', location_lat=10.0, location_lon=76.3)
+        db.session.add(user)
+        db.session.flush()
+        crop = UserCrop(user_id=user.user_id, crop_type='Tomato', planting_date=datetime.now().date() - timedelta(days=30))
+        db.session.add(crop)
+        db.session.flush()
+        db.session.add(Recommendation(planting_id=crop.planting_id, action_type='monitor', priority='low',
+                                      recommendation_date=datetime.now().date()))
+        db.session.commit()
+        return crop.planting_id
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--minutes', type=int, default=60)
+    parser.add_argument('--changes', type=int, default=3, help='real updates to the crop during the hour')
+    args = parser.parse_args()
+
+    planting_id = seed()
+    client = app.app.test_client()
+    queries = {'count': 0}
+    with app.app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: queries.__setitem__('count', queries['count'] + 1))
+
+    # Polling: one request per minute
+    polls = args.minutes
+    queries['count'] = 0
+    for _ in range(polls):
+        client.get(f'/api/crop/{planting_id}/progress')
+    poll_queries = queries['count']
+
+    # Push: one request; 4 heartbeats a minute, plus args.changes commits
+    heartbeats = args.minutes * 60 // 15
+    app.SSE_HEARTBEAT_SECONDS = 0.001
+    queries['count'] = 0
+    resp = client.get(f'/api/crop/{planting_id}/events', buffered=False)
+    chunks = iter(resp.response)
+    events = beats = 0
+    change_at = {heartbeats * (i + 1) // (args.changes + 1) for i in range(args.changes)}
+    while beats < heartbeats:
+        chunk = next(chunks)
+        if chunk.startswith(b': heartbeat'):
+            beats += 1
+            if beats in change_at:
+                with app.app.app_context():
+                    crop = UserCrop.query.get(planting_id)
+                    crop.pest_pressure_level = 'high' if crop.pest_pressure_level != 'high' else 'low'
+                    db.session.commit()
+        elif b'event:' in chunk:
+            events += chunk.count(b'event:')
+    resp.close()
+    push_queries = queries['count'] - args.changes * 2  # minus the benchmark's own read + update
+
+    print("=" * 66)
+    print(f"one idle tab, {args.minutes} minutes, {args.changes} real changes")
+    print(f"{'':<18}{'requests':>10}{'queries':>10}{'events':>10}")
+    print(f"{'poll every 60 s':<18}{polls:>10}{poll_queries:>10}{polls:>10}")
+    print(f"{'SSE stream':<18}{1:>10}{push_queries:>10}{events:>10}")
+    print("=" * 66)
@@ -0,0 +1,55 @@
+# bench_startup.py
+# Time-to-first-request for app.py under each MODEL_WARMUP mode, with and
+# without TensorFlow importable. Each run is a fresh interpreter.
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r'''
+import sys, time, json
+t0 = time.perf_counter()
+if {block_tf}:
+    sys.modules['tensorflow'] = None  # behave as if TensorFlow is not installed
+import app
+t_import = time.perf_counter() - t0
+client = app.app.test_client()
+resp = client.get('/api/health')
+t_first = time.perf_counter() - t0
+print(json.dumps({{'import_s': t_import, 'first_request_s': t_first, 'status': resp.status_code,
+                   'models': {{k: v['state'] for k, v in resp.get_json()['models'].items()}}}}))
+'''
+
+
+def run(mode, block_tf):
+    env = dict(os.environ, MODEL_WARMUP=mode)
+    out = subprocess.run(
+        [sys.executable, '-W', 'ignore', '-c', CHILD.format(block_tf=block_tf)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    lines = [l for l in out.stdout.splitlines() if l.startswith('{')]
+    if not lines:
+        print(out.stderr[-2000:])
+        return None
+    return json.loads(lines[-1])
+
+
+if __name__ == '__main__':
+    try:
+        import tensorflow  # noqa: F401
+        tf_installed = True
+    except Exception:
+        tf_installed = False
+    print(f"TensorFlow installed: {tf_installed}")
+    print("=" * 72)
+    print(f"{'mode':<12}{'tensorflow':<12}{'import (s)':>12}{'first req (s)':>15}  states")
+    for block_tf in (False, True):
+        for mode in ('eager', 'background', 'lazy'):
+            r = run(mode, block_tf)
+            if r is None:
+                continue
+            tf_label = 'blocked' if block_tf else ('yes' if tf_installed else 'missing')
+            print(f"{mode:<12}{tf_label:<12}{r['import_s']:>12.3f}{r['first_request_s']:>15.3f}  {r['models']}")
+    print("=" * 72)
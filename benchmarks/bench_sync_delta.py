@@ -0,0 +1,96 @@
+# bench_sync_delta.py
+# Login download for a long-time user: the full GET /api/user/<id>/sync
+# (two queries per crop, up to 200 rows per table per crop) vs. the delta
+# mode with an up-to-date cursor plus a handful of new rows.
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_delta.db')
+
+from sqlalchemy import event, insert
+
+import app
+from app import db, User, UserCrop, UserAction, ImageAnalysis, ManualObservation
+
+
+def seed(crops, rows_per_crop):
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='veteran', email='veteran@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        plantings = []
+        for _ in range(crops):
+            crop = UserCrop(user_id=user.user_id, crop_type='Tomato', planting_date=datetime.now().date())
+            db.session.add(crop)
+            db.session.flush()
+            plantings.append(crop.planting_id)
+        start = datetime(2024, 1, 1)
+        for pid in plantings:
+            db.session.execute(insert(ImageAnalysis), [
+                {'planting_id': pid, 'detected_disease': 'blight', 'analysis_date': start + timedelta(hours=i)}
+                for i in range(rows_per_crop)])
+            db.session.execute(insert(ManualObservation), [
+                {'planting_id': pid, 'observation_date': (start + timedelta(days=i)).date(), 'pest_presence': 'low'}
+                for i in range(rows_per_crop)])
+            db.session.execute(insert(UserAction), [
+                {'user_id': user.user_id, 'planting_id': pid, 'action_type': 'water', 'details': json.dumps({'i': i})}
+                for i in range(rows_per_crop)])
+        db.session.commit()
+        return user.user_id, plantings
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--crops', type=int, default=40)
+    parser.add_argument('--rows-per-crop', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    user_id, plantings = seed(args.crops, args.rows_per_crop)
+    client = app.app.test_client()
+    statements = {'count': 0}
+    with app.app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a: statements.__setitem__('count', statements['count'] + 1))
+
+    # Bring a device up to date, then add a few rows as if synced from elsewhere
+    cursor = ''
+    while True:
+        body = client.get(f'/api/user/{user_id}/sync?cursor={cursor}&limit=5000').get_json()
+        cursor = body['cursor']
+        if not body['has_more']:
+            break
+    with app.app.app_context():
+        for pid in plantings[:5]:
+            db.session.add(UserAction(user_id=user_id, planting_id=pid, action_type='harvest'))
+            db.session.add(ImageAnalysis(planting_id=pid, detected_disease='rust'))
+        db.session.commit()
+
+    def measure(url):
+        timings = []
+        for _ in range(args.repeat):
+            statements['count'] = 0
+            start = time.perf_counter()
+            resp = client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        return sorted(timings)[len(timings) // 2], statements['count'], len(resp.data)
+
+    print("=" * 64)
+    print(f"{args.crops} crops x {args.rows_per_crop} rows per table")
+    print(f"{'request':<26}{'ms (p50)':>10}{'queries':>10}{'bytes':>14}")
+    for name, url in (('full (legacy)', f'/api/user/{user_id}/sync'),
+                      ('delta, 10 new rows', f'/api/user/{user_id}/sync?cursor={cursor}')):
+        ms, queries, size = measure(url)
+        print(f"{name:<26}{ms:>10.1f}{queries:>10}{size:>14,}")
+    print("=" * 64)
@@ -0,0 +1,81 @@
+# bench_sync_stream.py
+# Peak Python memory while importing a sync upload as one JSON document vs.
+# as an NDJSON stream (chunked commits). The body is built before tracing
+# starts; the test client's copy of it is included in both peaks.
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_stream.db')
+
+import app
+from app import db, User, UserCrop
+
+
+def seed():
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        crop = UserCrop(user_id=user.user_id, crop_type='Tomato', planting_date=datetime.now().date())
+        db.session.add(crop)
+        db.session.commit()
+        return user.user_id, crop.planting_id
+
+
+def records(planting_id, n):
+    start = datetime(2025, 1, 1)
+    for i in range(n):
+        yield 'detectionLogs', {'planting_id': planting_id, 'detection_label': 'blight', 'detection_score': 0.7,
+                                'image_path': f'/storage/img_{i}.jpg', 'notes': 'x' * 200,
+                                'timestamp': (start + timedelta(seconds=i * 11)).isoformat()}
+
+
+def measure(post):
+    tracemalloc.start()
+    start = time.perf_counter()
+    resp = post()
+    resp.get_data()  # drain streamed responses
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert resp.status_code == 200
+    return elapsed, peak
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='5000,20000,50000')
+    args = parser.parse_args()
+
+    client = app.app.test_client()
+    print("=" * 72)
+    print(f"{'records':>8}{'body MB':>9}{'json s':>9}{'json peak MB':>14}{'ndjson s':>10}{'ndjson peak MB':>16}")
+    for n in (int(x) for x in args.sizes.split(',')):
+        user_id, planting_id = seed()
+        body = json.dumps({'detectionLogs': [r for _, r in records(planting_id, n)]}).encode()
+        json_s, json_peak = measure(lambda: client.post(f'/api/user/{user_id}/sync', data=body,
+                                                        content_type='application/json'))
+
+        user_id, planting_id = seed()
+        stream = ''.join(json.dumps({'seq': i + 1, 'kind': kind, 'record': r}) + '\n'
+                         for i, (kind, r) in enumerate(records(planting_id, n))).encode()
+        ndjson_s, ndjson_peak = measure(lambda: client.post(
+            f'/api/user/{user_id}/sync', data=stream, content_type='application/x-ndjson',
+            headers={'X-Sync-Stream': 'bench'}))
+
+        mb = 1024 * 1024
+        print(f"{n:>8}{len(body) / mb:>9.1f}{json_s:>9.2f}{json_peak / mb:>14.1f}"
+              f"{ndjson_s:>10.2f}{ndjson_peak / mb:>16.1f}")
+    print("=" * 72)
@@ -0,0 +1,87 @@
+# bench_user_actions.py
+# Reading a long action history: the old single request with a huge ?limit
+# (ORM objects, json.loads per row, jsonify) vs. keyset pages and the
+# streamed NDJSON export with details passed through as stored.
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_actions.db')
+
+from flask import jsonify
+from sqlalchemy import insert
+
+import app
+from app import db, User, UserAction
+
+
+def seed(n):
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='veteran', email='veteran@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        start = datetime(2023, 1, 1)
+        details = {'disease': 'Tomato___Late_blight', 'confidence': 0.93, 'treatment': 'copper spray ' * 5}
+        db.session.execute(insert(UserAction), [
+            {'user_id': user.user_id, 'action_type': 'automatic_detection',
+             'details': json.dumps(dict(details, i=i)), 'created_at': start + timedelta(minutes=i)}
+            for i in range(n)])
+        db.session.commit()
+        return user.user_id
+
+
+def legacy_all(user_id, n):
+    """What GET /actions?limit=<n> did before keyset paging"""
+    with app.app.test_request_context():
+        actions = UserAction.query.filter_by(user_id=user_id).order_by(UserAction.created_at.desc()).limit(n).all()
+        return jsonify({'actions': [a.as_dict() for a in actions]}).get_data()
+
+
+def paged_all(client, user_id, limit):
+    cursor, size = None, 0
+    while True:
+        resp = client.get(f'/api/user/{user_id}/actions?limit={limit}' + (f'&cursor={cursor}' if cursor else ''))
+        size += len(resp.data)
+        cursor = resp.get_json()['next_cursor']
+        if not cursor:
+            return size
+
+
+def best_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--actions', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    user_id = seed(args.actions)
+    client = app.app.test_client()
+    with app.app.app_context():
+        cases = (
+            ('legacy ?limit=N', lambda: legacy_all(user_id, args.actions)),
+            ('keyset pages of 1000', lambda: paged_all(client, user_id, 1000)),
+            ('NDJSON export', lambda: client.get(f'/api/user/{user_id}/actions/export').get_data()),
+        )
+        print("=" * 56)
+        print(f"{args.actions:,} actions for one user")
+        for name, fn in cases:
+            print(f"{name:<28}{best_ms(fn, args.repeat):>12.1f} ms")
+        print("=" * 56)
@@ -0,0 +1,109 @@
+# bench_user_sync.py
+# POST /api/user/<id>/sync with 10k records (detections, observations and
+# quick actions) against the per-record loop the endpoint used to run.
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'bench_sync.db')
+
+from flask import request, jsonify
+from sqlalchemy import event
+
+import app
+from app import db, User, UserCrop, ImageAnalysis, ManualObservation, UserAction
+
+
+@app.app.route('/bench/legacy-sync/<int:user_id>', methods=['POST'])
+def legacy_sync(user_id):
+    """Detection / observation / quick-action handling as it was: queries per record"""
+    payload = request.json or {}
+    for d in payload.get('detectionLogs', []):
+        planting_id = d.get('planting_id')
+        crop = UserCrop.query.get(planting_id)
+        if not crop or crop.user_id != user_id:
+            continue
+        ts = datetime.fromisoformat(d['timestamp'])
+        dup = ImageAnalysis.query.filter_by(planting_id=planting_id, detected_disease=d.get('detection_label')).filter(
+            ImageAnalysis.analysis_date.between(ts - timedelta(seconds=5), ts + timedelta(seconds=5))).first()
+        if dup:
+            continue
+        db.session.add(ImageAnalysis(planting_id=planting_id, detected_disease=d.get('detection_label'),
+                                     disease_confidence=d.get('detection_score', 0), analysis_date=ts))
+        db.session.add(UserAction(user_id=user_id, planting_id=planting_id, action_type='automatic_detection',
+                                  details=json.dumps(d)))
+    for m in payload.get('cropDetections', []):
+        crop = UserCrop.query.get(m.get('planting_id'))
+        if not crop or crop.user_id != user_id:
+            continue
+        db.session.add(ManualObservation(planting_id=m['planting_id'], observation_date=datetime.utcnow().date(),
+                                         observation_type='visual', pest_presence=m.get('pest_level')))
+        db.session.add(UserAction(user_id=user_id, planting_id=m['planting_id'], action_type='manual_observation',
+                                  details=json.dumps(m)))
+    for q in payload.get('quickActions', []):
+        db.session.add(UserAction(user_id=user_id, planting_id=q.get('planting_id'), action_type=q.get('type'),
+                                  details=json.dumps(q)))
+    db.session.commit()
+    return jsonify({'success': True})
+
+
+def seed():
+    with app.app.app_context():
+        db.drop_all()
+        db.create_all()
+        user = User(username='bench', email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        for i in range(20):
+            db.session.add(UserCrop(user_id=user.user_id, crop_type='Tomato', planting_date=datetime.now().date()))
+        db.session.commit()
+        return user.user_id, [c.planting_id for c in UserCrop.query.all()]
+
+
+def make_payload(plantings, records):
+    start = datetime(2025, 1, 1)
+    per_kind = records // 3
+    labels = ['blight', 'rust', 'leaf_spot']
+    return {
+        'detectionLogs': [{'planting_id': plantings[i % len(plantings)], 'detection_label': labels[i % 3],
+                           'detection_score': 0.8, 'timestamp': (start + timedelta(seconds=i * 7)).isoformat()}
+                          for i in range(records - 2 * per_kind)],
+        'cropDetections': [{'planting_id': plantings[i % len(plantings)], 'pest_level': 'low'} for i in range(per_kind)],
+        'quickActions': [{'planting_id': plantings[i % len(plantings)], 'type': 'water'} for i in range(per_kind)]
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=10000)
+    args = parser.parse_args()
+
+    statements = {'count': 0}
+    with app.app.app_context():
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda *a: statements.__setitem__('count', statements['count'] + 1))
+
+    client = app.app.test_client()
+    print("=" * 60)
+    print(f"sync upload of {args.records} records")
+    print(f"{'path':<10}{'seconds':>10}{'records/s':>12}{'statements':>12}{'rows':>10}")
+    for name, url in (('before', '/bench/legacy-sync/{}'), ('after', '/api/user/{}/sync')):
+        user_id, plantings = seed()
+        payload = make_payload(plantings, args.records)
+        statements['count'] = 0
+        start = time.perf_counter()
+        resp = client.post(url.format(user_id), json=payload)
+        elapsed = time.perf_counter() - start
+        assert resp.status_code == 200, resp.data
+        with app.app.app_context():
+            rows = UserAction.query.count()
+        print(f"{name:<10}{elapsed:>10.2f}{args.records / elapsed:>12.0f}{statements['count']:>12}{rows:>10}")
+    print("=" * 60)
@@ -0,0 +1,125 @@
+# load_sqlite_profile.py
+# Concurrent readers (GET /api/crop/<id>/progress) and writers
+# (POST /api/user/<id>/sync) against a scratch SQLite file, once per storage
+# profile. Each profile runs in its own process because the engine is
+# configured when app.py is imported.
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import argparse
+import threading
+import subprocess
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_profile(args):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    os.environ.setdefault('MODEL_WARMUP', 'lazy')
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load.db')
+
+    import numpy as np
+    import app
+    from app import db, User, UserCrop
+
+    app.weather_service.get_weather = lambda lat, lon: {'temperature': 25, 'description': 'clear', 'weather_category': 'sunny'}
+    app.initialize_database()
+    with app.app.app_context():
+        users = []
+        for u in range(args.writers):
+            user = User(username=f'load{u}', email=f'load{u}@example.com', password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            for i in range(10):
+                db.session.add(UserCrop(user_id=user.user_id, crop_type='Tomato',
+                                        planting_date=datetime.now().date() - timedelta(days=i * 7)))
+            users.append(user.user_id)
+        db.session.commit()
+        crops = {uid: [c.planting_id for c in UserCrop.query.filter_by(user_id=uid)] for uid in users}
+    all_crops = [pid for pids in crops.values() for pid in pids]
+
+    stop = time.perf_counter() + args.seconds
+    latencies = {'progress': [], 'sync': []}
+    errors = {'progress': 0, 'sync': 0, 'locked': 0}
+    lock = threading.Lock()
+
+    def record(kind, started, resp):
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies[kind].append(elapsed)
+            if resp.status_code != 200:
+                errors[kind] += 1
+                if b'locked' in resp.data:
+                    errors['locked'] += 1
+
+    def reader():
+        client = app.app.test_client()
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            record('progress', started, client.get(f'/api/crop/{random.choice(all_crops)}/progress'))
+
+    def writer(user_id):
+        client = app.app.test_client()
+        while time.perf_counter() < stop:
+            now = datetime.utcnow()
+            payload = {
+                'cropDetections': [{'planting_id': random.choice(crops[user_id]), 'pest_level': 'low',
+                                    'timestamp': now.isoformat()} for _ in range(args.batch)],
+                'quickActions': [{'planting_id': random.choice(crops[user_id]), 'type': 'water'} for _ in range(args.batch)]
+            }
+            started = time.perf_counter()
+            record('sync', started, client.post(f'/api/user/{user_id}/sync', json=payload))
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(uid,)) for uid in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    result = {'profile': os.environ.get('SQLITE_PROFILE', 'production'), 'errors': errors}
+    for kind, samples in latencies.items():
+        samples = samples or [0]
+        result[kind] = {'count': len(latencies[kind]), 'p50': float(np.percentile(samples, 50)),
+                        'p95': float(np.percentile(samples, 95)), 'max': float(np.max(samples))}
+    print('RESULT ' + json.dumps(result))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--batch', type=int, default=20, help='records of each kind per sync upload')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--profiles', default='default,production')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_profile(args)
+        sys.exit(0)
+
+    print("=" * 84)
+    print(f"{args.readers} progress readers, {args.writers} sync writers ({args.batch}+{args.batch} records), {args.seconds:.0f}s")
+    print(f"{'profile':<12}{'reads':>7}{'read p50':>10}{'read p95':>10}{'syncs':>7}{'sync p50':>10}{'sync p95':>10}"
+          f"{'sync max':>10}{'errors':>8}")
+    for profile in args.profiles.split(','):
+        env = dict(os.environ, SQLITE_PROFILE=profile)
+        cmd = [sys.executable, os.path.abspath(__file__), '--worker', '--readers', str(args.readers),
+               '--writers', str(args.writers), '--batch', str(args.batch), '--seconds', str(args.seconds)]
+        out = subprocess.run(cmd, env=env, capture_output=True, text=True).stdout
+        line = next((l for l in out.splitlines() if l.startswith('RESULT ')), None)
+        if line is None:
+            print(f"{profile:<12} failed")
+            continue
+        r = json.loads(line[len('RESULT '):])
+        p, s = r['progress'], r['sync']
+        errors = r['errors']['progress'] + r['errors']['sync']
+        print(f"{profile:<12}{p['count']:>7}{p['p50']:>8.1f}ms{p['p95']:>8.1f}ms{s['count']:>7}{s['p50']:>8.1f}ms"
+              f"{s['p95']:>8.1f}ms{s['max']:>8.0f}ms{errors:>8}")
+    print("=" * 84)
@@ -0,0 +1,279 @@
+# =========================
+# NIGHTLY BULK RECOMMENDATION JOB
+# =========================
+# Generates a recommendation for every active planting in one pass:
+#   - one query for active plantings + owner location
+#   - one windowed query for the latest observation of each planting
+#   - one weather call per rounded location cell per run (shared by all chunks)
+#   - batched decision-engine inference
+#   - chunked bulk inserts of Recommendation / DecisionPattern / UserAction rows
+# The job_checkpoints row is updated in the same transaction as each chunk's
+# inserts, so an interrupted run resumes exactly after the last committed
+# chunk when started again on the same day, without duplicating rows. Once a
+# day's run has completed, starting it again that day does nothing unless
+# --force is given (which generates a second set of rows for the day).
+#
+# Cron example (02:00 every night):
+#   0 2 * * * cd /path/to/smart-crop-advisory-system && python bulk_recommend.py
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+
+from sqlalchemy import func, insert
+
+from app import (app, db, User, UserCrop, ManualObservation, Recommendation, DecisionPattern, UserAction,
+                 JobCheckpoint, get_decision_engine, weather_service, calculate_water_amount,
+                 recommend_fertilizer_type, recommend_fertilizer_amount)
+
+JOB_NAME = 'bulk_recommend'
+
+HEALTH_NAMES = {0: 'excellent', 1: 'good', 2: 'fair', 3: 'poor'}
+PEST_NAMES = {0: 'none', 1: 'low', 2: 'medium', 3: 'high'}
+STAGE_NAMES = {0: 'seedling', 1: 'vegetative', 2: 'flowering', 3: 'mature'}
+
+
+def completed_run(run_date, job=JOB_NAME):
+    """The checkpoint of a run that already completed on run_date, or None"""
+    checkpoint = db.session.get(JobCheckpoint, job)
+    if checkpoint is None or checkpoint.run_date != run_date or not checkpoint.completed:
+        return None
+    return checkpoint
+
+
+def load_checkpoint(run_date, job=JOB_NAME):
+    """Return the last committed planting_id for today's run (0 if starting fresh)"""
+    checkpoint = db.session.get(JobCheckpoint, job)
+    if checkpoint is None or checkpoint.run_date != run_date or checkpoint.completed:
+        return 0
+    return checkpoint.last_id
+
+
+def save_checkpoint(run_date, last_planting_id, completed=False, job=JOB_NAME):
+    """Stage the checkpoint in the current transaction; the caller's commit makes it durable"""
+    db.session.merge(JobCheckpoint(job=job, run_date=run_date, last_id=last_planting_id,
+                                   completed=completed, updated_at=datetime.utcnow()))
+
+
+def fetch_active_plantings(after_planting_id):
+    """Active plantings with their owner's location, in planting_id order"""
+    return db.session.query(
+        UserCrop.planting_id, UserCrop.user_id, UserCrop.crop_type, UserCrop.current_growth_stage,
+        UserCrop.days_elapsed, User.location_lat, User.location_lon
+    ).join(User, User.user_id == UserCrop.user_id).filter(
+        UserCrop.is_active == True,  # noqa: E712
+        UserCrop.planting_id > after_planting_id
+    ).order_by(UserCrop.planting_id).all()
+
+
+def fetch_latest_observations(planting_ids):
+    """Latest ManualObservation per planting via ROW_NUMBER() in a single query"""
+    if not planting_ids:
+        return {}
+    ranked = db.session.query(
+        ManualObservation.planting_id,
+        ManualObservation.visual_health,
+        ManualObservation.pest_presence,
+        ManualObservation.estimated_moisture,
+        ManualObservation.leaf_color,
+        ManualObservation.disease_symptoms,
+        func.row_number().over(
+            partition_by=ManualObservation.planting_id,
+            order_by=(ManualObservation.observation_date.desc(), ManualObservation.observation_id.desc())
+        ).label('rn')
+    ).filter(ManualObservation.planting_id.in_(planting_ids)).subquery()
+    rows = db.session.query(ranked).filter(ranked.c.rn == 1).all()
+    return {r.planting_id: r for r in rows}
+
+
+def location_cell(lat, lon, precision):
+    if lat is None or lon is None:
+        return None
+    return (round(lat, precision), round(lon, precision))
+
+
+def fetch_weather_by_cell(plantings, precision, weather_by_cell):
+    """Add weather for cells not in weather_by_cell yet (fetched concurrently); returns the calls made.
+
+    weather_by_cell lives for the whole run, so each cell is fetched once even
+    when its plantings are spread over many chunks.
+    """
+    cells = list(dict.fromkeys(
+        cell for cell in (location_cell(p.location_lat, p.location_lon, precision) for p in plantings)
+        if cell is not None and cell not in weather_by_cell
+    ))
+    if cells:
+        weather_by_cell.update(zip(cells, weather_service.get_weather_many(cells)))
+    return len(cells)
+
+
+def build_features(engine, planting, obs, weather):
+    """Same feature dict as the /api/crop/<id>/recommend endpoint"""
+    if weather:
+        weather_category = weather['weather_category']
+        temp_category = weather['temperature_category']
+    else:
+        weather_category = 'sunny'
+        temp_category = 'optimal'
+    return {
+        'visual_health': engine.encode_health(obs.visual_health if obs else 'good'),
+        'pest_pressure': engine.encode_pressure(obs.pest_presence if obs else 'none'),
+        'growth_stage': engine.encode_stage(planting.current_growth_stage),
+        'days_elapsed': planting.days_elapsed,
+        'weather_forecast': weather_category,
+        'temperature_category': temp_category,
+        'estimated_moisture': obs.estimated_moisture if obs else None,
+        'leaf_color': obs.leaf_color if obs else None,
+        'disease_symptoms': obs.disease_symptoms if obs else None
+    }
+
+
+def process_chunk(engine, plantings, precision, today, weather_by_cell):
+    """Insert one chunk's rows and advance the checkpoint in a single transaction"""
+    observations = fetch_latest_observations([p.planting_id for p in plantings])
+    weather_calls = fetch_weather_by_cell(plantings, precision, weather_by_cell)
+
+    features = [
+        build_features(engine, p, observations.get(p.planting_id),
+                       weather_by_cell.get(location_cell(p.location_lat, p.location_lon, precision)))
+        for p in plantings
+    ]
+    actions, confidences, reasonings = engine.predict_action_batch(features)
+    source = 'ai_svm' if engine.svm_model else 'rule_based'
+
+    water_memo = {}
+    recommendations, patterns = [], []
+    for p, f, action, confidence, reasoning in zip(plantings, features, actions, confidences, reasonings):
+        rec = {
+            'planting_id': p.planting_id,
+            'recommendation_date': today,
+            'action_type': action,
+            'priority': 'high' if confidence > 0.8 else 'medium',
+            'reasoning': reasoning,
+            'confidence_score': float(confidence),
+            'source': source
+        }
+        if action == 'irrigate':
+            key = (p.crop_type, p.current_growth_stage, f['temperature_category'], f['estimated_moisture'])
+            if key not in water_memo:
+                water_memo[key] = calculate_water_amount(p.crop_type, p.current_growth_stage, f)
+            rec['watering_amount_l'] = water_memo[key]
+            rec['watering_interval_days'] = 3
+        elif action == 'fertilize':
+            rec['fertilizer_type'] = recommend_fertilizer_type(p.crop_type, p.current_growth_stage)
+            rec['fertilizer_amount_kg'] = recommend_fertilizer_amount(p.crop_type)
+            rec['next_fertilizer_days'] = 30
+        elif action == 'pesticide':
+            rec['pesticide_type'] = 'Organic Neem Oil' if f['pest_pressure'] < 2 else 'Chemical Pesticide'
+            rec['pesticide_interval_days'] = 14
+        recommendations.append(rec)
+
+        patterns.append({
+            'crop_type': p.crop_type,
+            'visual_health': HEALTH_NAMES.get(f['visual_health'], 'good'),
+            'pest_presence': PEST_NAMES.get(f['pest_pressure'], 'none'),
+            'growth_stage': STAGE_NAMES.get(f['growth_stage'], 'vegetative'),
+            'days_elapsed': f['days_elapsed'] if f['days_elapsed'] is not None else 30,
+            'weather_forecast': f['weather_forecast'],
+            'temperature_category': f['temperature_category'],
+            'recommended_action': action,
+            'outcome_score': 0.8,
+            'recorded_at': datetime.utcnow()
+        })
+
+    # Recommendation ids are needed for the activity log entries
+    rec_ids = db.session.scalars(
+        insert(Recommendation).returning(Recommendation.recommendation_id, sort_by_parameter_order=True),
+        recommendations
+    ).all()
+    db.session.execute(insert(DecisionPattern), patterns)
+    now = datetime.utcnow()
+    db.session.execute(insert(UserAction), [{
+        'user_id': p.user_id,
+        'planting_id': p.planting_id,
+        'action_type': 'recommendation_generated',
+        'details': json.dumps({'recommendation_id': rec_id, 'action': rec['action_type'],
+                               'confidence': rec['confidence_score'], 'job': 'bulk_recommend'}),
+        'created_at': now
+    } for p, rec, rec_id in zip(plantings, recommendations, rec_ids)])
+    save_checkpoint(today, plantings[-1].planting_id)
+    db.session.commit()
+    return len(recommendations), weather_calls
+
+
+def run_bulk_recommendations(chunk_size=500, precision=1, resume=True, force=False):
+    """Generate recommendations for all active plantings; returns a stats dict.
+
+    If today's run already completed, nothing is generated (stats has
+    already_completed=True and the finished run's checkpoint) unless force is set.
+    """
+    today = datetime.now().date()
+    started = time.perf_counter()
+    stats = {'plantings': 0, 'rows_inserted': 0, 'weather_calls': 0, 'chunks': 0, 'resumed_after': 0,
+             'already_completed': False}
+
+    with app.app_context():
+        JobCheckpoint.__table__.create(db.engine, checkfirst=True)  # databases created before this table
+        finished = completed_run(today)
+        if finished is not None and not force:
+            print(f"⏭️ Today's run already completed at {finished.updated_at} (use --force to run it again)")
+            stats.update(already_completed=True, last_id=finished.last_id, completed_at=finished.updated_at,
+                         seconds=0, rows_per_second=0)
+            return stats
+
+        engine = get_decision_engine()
+        last_id = load_checkpoint(today) if resume else 0
+        stats['resumed_after'] = last_id
+        if last_id:
+            print(f"↩️ Resuming today's run after planting_id {last_id}")
+
+        plantings = fetch_active_plantings(last_id)
+        weather_by_cell = {}
+        for i in range(0, len(plantings), chunk_size):
+            chunk = plantings[i:i + chunk_size]
+            try:
+                count, weather_calls = process_chunk(engine, chunk, precision, today, weather_by_cell)
+            except Exception:
+                db.session.rollback()
+                raise
+            last_id = chunk[-1].planting_id
+
+            stats['chunks'] += 1
+            stats['plantings'] += count
+            stats['rows_inserted'] += count * 3  # recommendation + decision pattern + user action
+            stats['weather_calls'] += weather_calls
+            elapsed = time.perf_counter() - started
+            print(f"  chunk {stats['chunks']}: {stats['plantings']}/{len(plantings)} plantings "
+                  f"({stats['rows_inserted'] / elapsed:.0f} rows/s)")
+
+        save_checkpoint(today, last_id, completed=True)
+        db.session.commit()
+
+    elapsed = time.perf_counter() - started
+    stats['seconds'] = round(elapsed, 3)
+    stats['rows_per_second'] = round(stats['rows_inserted'] / elapsed, 1) if elapsed else 0
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate recommendations for all active plantings')
+    parser.add_argument('--chunk-size', type=int, default=500, help='plantings per transaction')
+    parser.add_argument('--precision', type=int, default=1,
+                        help='decimal places for lat/lon weather cells (1 ~ 11 km)')
+    parser.add_argument('--no-resume', action='store_true', help='ignore an unfinished run from today')
+    parser.add_argument('--force', action='store_true',
+                        help='run again even if today\'s run already completed (duplicates its rows)')
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("🌾 Bulk recommendation job")
+    print("=" * 50)
+    result = run_bulk_recommendations(args.chunk_size, args.precision, resume=not args.no_resume,
+                                      force=args.force)
+    print("=" * 50)
+    print(f"✅ {result['plantings']} plantings, {result['rows_inserted']} rows in {result['seconds']}s "
+          f"({result['rows_per_second']} rows/s), {result['weather_calls']} weather calls")
+    print("=" * 50)
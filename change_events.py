@@ -0,0 +1,119 @@
+# =========================
+# PER-USER CHANGE TRACKING (SQLALCHEMY SESSION EVENTS)
+# =========================
+# Records which users' rows were inserted/updated/deleted in a session and,
+# once the transaction commits, tells subscribers {user_id: {table, ...}}.
+# A user_id of None means "could not tell which user" (e.g. a bulk UPDATE),
+# and subscribers should treat it as affecting everyone.
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+ALL_USERS = None
+
+
+class UserChangeTracker:
+    """Collects per-user changes for the watched models and publishes them after commit.
+
+    planting_owner(planting_ids) must return {planting_id: user_id}; it is used for
+    rows such as recommendations that only reference a planting. Resolved owners are
+    kept for the max_owners most recently seen plantings.
+    """
+
+    def __init__(self, models, planting_owner, max_owners=10000):
+        self.models = tuple(models)
+        self.tables = {m.__tablename__ for m in self.models}
+        self.planting_owner = planting_owner
+        self.max_owners = max_owners
+        self._subscribers = []
+        self._owner_cache = OrderedDict()  # planting ownership never changes
+        self._owner_lock = threading.Lock()
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _remember_owners(self, owners):
+        with self._owner_lock:
+            for planting_id, user_id in owners.items():
+                self._owner_cache[planting_id] = user_id
+                self._owner_cache.move_to_end(planting_id)
+            while len(self._owner_cache) > self.max_owners:
+                self._owner_cache.popitem(last=False)
+
+    # ---------- collection ----------
+    @staticmethod
+    def _pending(session):
+        return session.info.setdefault('user_changes', [])
+
+    def _record(self, session, table, user_id=None, planting_id=None):
+        if table == 'user_crops' and user_id is not None and planting_id is not None:
+            self._remember_owners({planting_id: user_id})
+        if user_id is None and planting_id is None:
+            self._pending(session).append((ALL_USERS, None, table))
+        else:
+            self._pending(session).append((user_id, planting_id, table))
+
+    def _after_flush(self, session, flush_context):
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if not isinstance(obj, self.models):
+                continue
+            if obj in session.dirty and not session.is_modified(obj):
+                continue
+            self._record(session, obj.__tablename__,
+                         getattr(obj, 'user_id', None), getattr(obj, 'planting_id', None))
+
+    def _do_orm_execute(self, state):
+        # Bulk INSERT/UPDATE/DELETE statements bypass flush events
+        if not (state.is_insert or state.is_update or state.is_delete):
+            return
+        mapper = state.bind_mapper
+        if mapper is None or mapper.local_table.name not in self.tables:
+            return
+        table = mapper.local_table.name
+        params = state.parameters
+        if state.is_insert and params:
+            for p in (params if isinstance(params, (list, tuple)) else [params]):
+                self._record(state.session, table, p.get('user_id'), p.get('planting_id'))
+        else:
+            self._record(state.session, table)
+
+    # ---------- publication ----------
+    def _resolve(self, pending):
+        unknown = {pid for uid, pid, _ in pending if uid is None and pid is not None and pid not in self._owner_cache}
+        resolved = {}
+        if unknown:
+            try:
+                resolved = self.planting_owner(unknown)
+            except Exception as e:
+                print(f"Change tracker could not resolve plantings: {e}")
+
+        changes = {}
+        for uid, pid, table in pending:
+            if uid is None and pid is not None:
+                uid = resolved.get(pid, self._owner_cache.get(pid, ALL_USERS))
+            changes.setdefault(uid, set()).add(table)
+        if resolved:
+            self._remember_owners(resolved)
+        return changes
+
+    def _after_commit(self, session):
+        pending = session.info.pop('user_changes', None)
+        if not pending or not self._subscribers:
+            return
+        changes = self._resolve(pending)
+        for callback in self._subscribers:
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Change subscriber error: {e}")
+
+    def _after_rollback(self, session):
+        session.info.pop('user_changes', None)
+
+    def install(self, session_target):
+        """Attach to a Session class, sessionmaker or scoped_session"""
+        event.listen(session_target, 'after_flush', self._after_flush)
+        event.listen(session_target, 'do_orm_execute', self._do_orm_execute)
+        event.listen(session_target, 'after_commit', self._after_commit)
+        event.listen(session_target, 'after_soft_rollback', lambda session, previous: self._after_rollback(session))
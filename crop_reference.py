@@ -0,0 +1,118 @@
+# =========================
+# IN-MEMORY CROP REFERENCE INDEX
+# =========================
+# CropMaster and GrowthMilestone rows change almost never, so they are read
+# once into memory. Milestone day offsets are kept sorted per crop and stage
+# lookups are a binary search instead of a query. invalidate() makes the next
+# lookup reload; version increases on every load. A load that fails leaves the
+# index stale, so the next lookup tries again.
+import time
+import threading
+from bisect import bisect_right
+
+import numpy as np
+
+# Used for crops without milestone rows (same thresholds as before)
+DEFAULT_STAGE_DAYS = (0, 15, 50, 90)
+DEFAULT_STAGES = ('seedling', 'vegetative', 'flowering', 'mature')
+
+
+class _Snapshot:
+    __slots__ = ('crops', 'milestones', 'days', 'multipliers')
+
+    def __init__(self, crops=(), milestones=()):
+        self.crops = {c['crop_type']: c for c in crops}
+        self.milestones = {}   # crop_type -> milestone dicts sorted by day
+        self.multipliers = {}  # (crop_type, stage) -> water_requirement_multiplier
+        for m in milestones:
+            self.milestones.setdefault(m['crop_type'], []).append(m)
+            self.multipliers.setdefault((m['crop_type'], m['growth_stage']), m['water_requirement_multiplier'])
+        for rows in self.milestones.values():
+            rows.sort(key=lambda m: m['days_from_planting'])  # stable: ties keep load order
+        self.days = {crop: [m['days_from_planting'] for m in rows] for crop, rows in self.milestones.items()}
+
+
+class CropReferenceIndex:
+    """loader() must return (crops, milestones): lists of CropMaster-like and
+    GrowthMilestone-like dicts. Readers always see one complete snapshot."""
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.version = 0
+        self.loaded_at = None
+        self._snapshot = _Snapshot()
+        self._stale = True
+        self._lock = threading.RLock()  # one load at a time
+
+    # ---------- loading ----------
+    def reload(self):
+        with self._lock:
+            self._stale = False  # an invalidate() during the load marks it stale again
+            try:
+                crops, milestones = self.loader()
+                snapshot = _Snapshot(crops, milestones)
+            except Exception:
+                self._stale = True
+                raise
+            self._snapshot = snapshot
+            self.version += 1
+            self.loaded_at = time.time()
+
+    def invalidate(self):
+        self._stale = True
+
+    def _current(self):
+        if self._stale:
+            with self._lock:
+                if self._stale:  # concurrent readers wait for the load already running
+                    self.reload()
+        return self._snapshot
+
+    # ---------- lookups ----------
+    def crop(self, crop_type):
+        """CropMaster fields as a dict, or None"""
+        return self._current().crops.get(crop_type)
+
+    def total_growth_days(self, crop_type, default):
+        crop = self.crop(crop_type)
+        return crop['total_growth_days'] if crop and crop['total_growth_days'] else default
+
+    def stage(self, crop_type, days_elapsed):
+        """Latest milestone stage reached after days_elapsed"""
+        snap = self._current()
+        days = snap.days.get(crop_type)
+        if not days:
+            return DEFAULT_STAGES[max(0, bisect_right(DEFAULT_STAGE_DAYS, days_elapsed) - 1)]
+        i = bisect_right(days, days_elapsed)
+        return snap.milestones[crop_type][i - 1]['growth_stage'] if i else 'seedling'
+
+    def milestones(self, crop_type):
+        """Milestone dicts for a crop ordered by days_from_planting"""
+        return self._current().milestones.get(crop_type, [])
+
+    def next_milestone(self, crop_type, days_elapsed):
+        """First milestone strictly after days_elapsed, or None"""
+        snap = self._current()
+        days = snap.days.get(crop_type, [])
+        i = bisect_right(days, days_elapsed)
+        return snap.milestones[crop_type][i] if i < len(days) else None
+
+    def water_multiplier(self, crop_type, growth_stage):
+        return self._current().multipliers.get((crop_type, growth_stage), 1.0)
+
+    def milestone_arrays(self, crop_type):
+        """(sorted day offsets, stage names) as numpy arrays for vectorised callers"""
+        snap = self._current()
+        days = snap.days.get(crop_type)
+        if not days:
+            return np.array(DEFAULT_STAGE_DAYS), np.array(DEFAULT_STAGES, dtype=object)
+        return np.array(days), np.array([m['growth_stage'] for m in snap.milestones[crop_type]], dtype=object)
+
+    def stats(self):
+        snap = self._snapshot
+        return {
+            'version': self.version,
+            'loaded_at': self.loaded_at,
+            'crops': len(snap.crops),
+            'crops_with_milestones': len(snap.milestones)
+        }
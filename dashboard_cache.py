@@ -0,0 +1,81 @@
+# =========================
+# PER-USER DASHBOARD SNAPSHOTS
+# =========================
+# Holds the serialized /api/user/<id>/dashboard body per user together with
+# an ETag. Snapshots are dropped when one of the user's rows changes (see
+# change_events.UserChangeTracker) or after ttl_seconds, since weather and
+# day-based progress also move on their own.
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from change_events import ALL_USERS
+
+
+class DashboardCache:
+    def __init__(self, ttl_seconds=600, max_entries=10000):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # user_id -> (body, etag, stored_at)
+        self._generations = {}         # user_id -> invalidation counter
+        self._global_generation = 0
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'invalidations': 0, 'stale_puts': 0}
+
+    @staticmethod
+    def make_etag(body):
+        return hashlib.sha1(body if isinstance(body, bytes) else body.encode('utf-8')).hexdigest()[:20]
+
+    def generation(self, user_id):
+        """Token to pass to put(): a snapshot built across an invalidation is discarded"""
+        with self._lock:
+            return (self._global_generation, self._generations.get(user_id, 0))
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or (self.ttl and time.time() - entry[2] > self.ttl):
+                if entry is not None:
+                    del self._entries[user_id]
+                self.counters['misses'] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.counters['hits'] += 1
+            return entry[0], entry[1]
+
+    def put(self, user_id, body, generation):
+        etag = self.make_etag(body)
+        with self._lock:
+            if generation != (self._global_generation, self._generations.get(user_id, 0)):
+                self.counters['stale_puts'] += 1
+                return etag
+            self._entries[user_id] = (body, etag, time.time())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+            self.counters['invalidations'] += 1
+
+    def invalidate_all(self):
+        with self._lock:
+            self._global_generation += 1
+            self._entries.clear()
+            self.counters['invalidations'] += 1
+
+    def on_changes(self, changes):
+        """UserChangeTracker subscriber"""
+        if ALL_USERS in changes:
+            self.invalidate_all()
+            return
+        for user_id in changes:
+            self.invalidate(user_id)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
@@ -0,0 +1,96 @@
+# =========================
+# PER-USER PUSH EVENTS (IN-PROCESS PUB/SUB)
+# =========================
+# Open Server-Sent Events streams subscribe here for one user. Publishers
+# (the change tracker after each commit, the notification service) call
+# on_changes({user_id: {table, ...}}); each subscription just accumulates
+# the changed table names and is woken, so a burst of commits becomes one
+# wake-up and a slow stream never builds a backlog. The stream itself decides
+# what to re-read and whether the client needs an event.
+import threading
+
+from change_events import ALL_USERS
+
+
+class TooManyConnections(Exception):
+    """Raised by connect() when the global or per-user stream cap is reached"""
+
+
+class Subscription:
+    def __init__(self, hub, user_id):
+        self.hub = hub
+        self.user_id = user_id
+        self._pending = set()
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def _push(self, tables):
+        with self._cond:
+            self._pending |= tables
+            self._cond.notify()
+
+    def wait(self, timeout):
+        """Tables changed since the last call; an empty set if timeout passed without changes"""
+        with self._cond:
+            if not self._pending:
+                self._cond.wait(timeout)
+            tables, self._pending = self._pending, set()
+            return tables
+
+    def close(self):
+        self.hub._remove(self)
+
+
+class EventHub:
+    def __init__(self, max_connections=200, max_per_user=5):
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self._subs = {}  # user_id -> [Subscription]
+        self._count = 0
+        self._lock = threading.Lock()
+        self.counters = {'connected': 0, 'rejected': 0, 'published': 0}
+
+    def connect(self, user_id):
+        with self._lock:
+            mine = self._subs.setdefault(user_id, [])
+            if self._count >= self.max_connections or len(mine) >= self.max_per_user:
+                self.counters['rejected'] += 1
+                if not mine:
+                    del self._subs[user_id]
+                raise TooManyConnections(f'stream limit reached ({self._count} open, {len(mine)} for this user)')
+            sub = Subscription(self, user_id)
+            mine.append(sub)
+            self._count += 1
+            self.counters['connected'] += 1
+            return sub
+
+    def _remove(self, sub):
+        with self._lock:
+            if sub.closed:
+                return
+            sub.closed = True
+            mine = self._subs.get(sub.user_id, [])
+            mine.remove(sub)
+            if not mine:
+                del self._subs[sub.user_id]
+            self._count -= 1
+
+    def on_changes(self, changes):
+        """Subscriber for UserChangeTracker / NotificationService"""
+        with self._lock:
+            if not self._subs:
+                return
+            targets = []
+            for user_id, tables in changes.items():
+                if user_id is ALL_USERS:
+                    targets.extend((sub, tables) for subs in self._subs.values() for sub in subs)
+                else:
+                    targets.extend((sub, tables) for sub in self._subs.get(user_id, ()))
+            self.counters['published'] += len(targets)
+        for sub, tables in targets:
+            sub._push(set(tables))
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, open=self._count, users=len(self._subs),
+                        max_connections=self.max_connections, max_per_user=self.max_per_user)
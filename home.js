@@ -20,6 +20,7 @@ const crops = [
 let currentUser = null;
 let currentPlantingId = null;
 let progressUpdateInterval = null;
+let progressEventSource = null;
 
 let highlightedPlantingId = null;
 let showTasksAndProgress = false;
@@ -2749,9 +2750,31 @@ async function confirmPlanting(cropName) {
 function startProgressTracking() {
     if (progressUpdateInterval) {
         clearInterval(progressUpdateInterval);
+        progressUpdateInterval = null;
+    }
+    if (progressEventSource) {
+        progressEventSource.close();
+        progressEventSource = null;
     }
     
     updateProgress();
+    
+    // The backend pushes crop status when it changes; poll only without EventSource or if the stream fails
+    if (window.EventSource && currentPlantingId) {
+        const plantingId = currentPlantingId;
+        progressEventSource = new EventSource(`${API_BASE_URL}/crop/${plantingId}/events`);
+        progressEventSource.addEventListener('crop_status', (event) => {
+            const status = JSON.parse(event.data).find(c => c.planting_id === plantingId);
+            if (status && currentPlantingId === plantingId) updateProgressFromAPI(status);
+        });
+        progressEventSource.onerror = () => {
+            if (progressEventSource && progressEventSource.readyState === EventSource.CLOSED) {
+                progressEventSource = null;
+                if (!progressUpdateInterval) progressUpdateInterval = setInterval(updateProgress, 60000);
+            }
+        };
+        return;
+    }
     progressUpdateInterval = setInterval(updateProgress, 60000);
 }
 
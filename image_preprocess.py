@@ -0,0 +1,95 @@
+# =========================
+# IMAGE PREPROCESSING FOR THE CROP CNN
+# =========================
+# Turns an uploaded image into the (224, 224, 3) float32 array in [0, 1] the
+# CNN expects, with as few full-size copies as possible:
+#   - JPEGs are opened in draft mode, so libjpeg scales by 1/2, 1/4 or 1/8 while
+#     decoding instead of producing the full-resolution bitmap first
+#   - the resized image is pasted straight into a per-thread uint8 buffer
+#     (a PIL image sharing the numpy array's memory), not copied out via tobytes
+#   - the uint8 -> float32 scaling writes into a caller-supplied array (a row
+#     of the batch being assembled) or a per-thread float buffer
+# A request thread therefore allocates nothing on the numpy side per image
+# after its first one.
+import threading
+
+import numpy as np
+from PIL import Image
+
+TARGET_SIZE = (224, 224)  # (width, height)
+SHAPE = (TARGET_SIZE[1], TARGET_SIZE[0], 3)
+
+_local = threading.local()
+
+
+def _paste_writes_through():
+    """True if pasting into a frombuffer() image writes into the numpy array (checked once at import)"""
+    pixels = np.zeros((1, 1, 4), dtype=np.uint8)
+    canvas = Image.frombuffer('RGBA', (1, 1), pixels, 'raw', 'RGBA', 0, 1)
+    canvas.readonly = 0
+    canvas.paste(Image.new('RGB', (1, 1), (1, 2, 3)))
+    return pixels[0, 0, :3].tolist() == [1, 2, 3]
+
+
+# PIL keeps RGB pixels 4 bytes wide, so the shared canvas is RGBA and the
+# model reads the first 3 channels. Falls back to one copy on Pillow builds
+# where frombuffer() memory is not shared.
+SHARED_CANVAS = _paste_writes_through()
+
+
+def _staging():
+    """This thread's (uint8 RGBA buffer, PIL canvas over it, float32 buffer)"""
+    staging = getattr(_local, 'staging', None)
+    if staging is None:
+        pixels = np.zeros((SHAPE[0], SHAPE[1], 4), dtype=np.uint8)
+        canvas = Image.frombuffer('RGBA', TARGET_SIZE, pixels, 'raw', 'RGBA', 0, 1)
+        canvas.readonly = 0  # paste into pixels instead of copying the image on first write
+        staging = _local.staging = (pixels, canvas, np.empty(SHAPE, dtype=np.float32))
+    return staging
+
+
+def open_image(source, draft=True):
+    """Open a path / file object (or pass a PIL image through) with JPEG draft decoding requested.
+
+    Draft only takes effect before the pixels are loaded, so call this first
+    when the same image is also hashed or inspected.
+    """
+    img = source if isinstance(source, Image.Image) else Image.open(source)
+    if draft and img.format == 'JPEG':
+        img.draft('RGB', TARGET_SIZE)  # never smaller than the target size
+    return img
+
+
+def decode(source, draft=True):
+    """(224, 224, 3) uint8 RGB view of this thread's buffer; the next decode on the thread overwrites it"""
+    img = open_image(source, draft)
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    if img.size != TARGET_SIZE:
+        img = img.resize(TARGET_SIZE)
+    pixels, canvas, _ = _staging()
+    if SHARED_CANVAS:
+        canvas.paste(img)
+    else:
+        pixels[..., :3] = np.asarray(img)
+    return pixels[..., :3]
+
+
+def preprocess(source, out=None, draft=True):
+    """(224, 224, 3) float32 image in [0, 1].
+
+    Written into out when given (e.g. one row of a batch array); otherwise
+    into this thread's float buffer, valid until the thread's next call.
+    """
+    if out is None:
+        out = _staging()[2]
+    np.divide(decode(source, draft), np.float32(255), out=out)
+    return out
+
+
+def preprocess_batch(sources, draft=True):
+    """(N, 224, 224, 3) float32 batch, each image decoded straight into its row"""
+    batch = np.empty((len(sources),) + SHAPE, dtype=np.float32)
+    for source, row in zip(sources, batch):
+        preprocess(source, out=row, draft=draft)
+    return batch
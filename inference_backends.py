@@ -0,0 +1,143 @@
+# =========================
+# CNN INFERENCE BACKENDS
+# =========================
+# The crop disease CNN can be served from the Keras H5 file (needs full
+# TensorFlow in every worker) or from an artifact exported by model_export.py:
+# a .tflite file run by the TFLite interpreter, or an .onnx file run by
+# onnxruntime. Every backend takes a float32 (N, 224, 224, 3) batch scaled to
+# [0, 1] and returns (N, num_classes) probabilities, so callers and the
+# InferenceBatcher do not care which one is loaded.
+#
+# 'tflite_int8' serves the full-integer model written by model_quantize.py.
+# It trades a little accuracy for speed on low-core CPUs, so 'auto' never
+# picks it; set INFERENCE_BACKEND=tflite_int8 after checking its report.
+import os
+import threading
+
+import numpy as np
+
+ARTIFACT_EXTENSIONS = {'keras': '.h5', 'tflite': '.tflite', 'onnx': '.onnx', 'tflite_int8': '.int8.tflite'}
+AUTO_ORDER = ('tflite', 'onnx', 'keras')  # lightest runtime first
+
+
+def artifact_path(h5_path, backend):
+    """Path of the backend's artifact next to the H5 model (models/x.h5 -> models/x.tflite)"""
+    return os.path.splitext(h5_path)[0] + ARTIFACT_EXTENSIONS[backend]
+
+
+def _tflite_interpreter_class():
+    """Interpreter from the standalone tflite-runtime wheel, else from TensorFlow"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        from tensorflow.lite import Interpreter
+    return Interpreter
+
+
+class KerasBackend:
+    name = 'keras'
+
+    def __init__(self, path, num_threads=None):
+        from tensorflow.keras.models import load_model
+        self.path = path
+        self.model = load_model(path)
+
+    def predict(self, batch):
+        return self.model.predict(np.asarray(batch, dtype=np.float32), verbose=0)
+
+
+def quantize(batch, detail):
+    """Float batch -> the integer dtype of a quantized TFLite input (unchanged for float inputs)"""
+    scale, zero_point = detail['quantization']
+    if not scale:
+        return np.asarray(batch, dtype=detail['dtype'])
+    info = np.iinfo(detail['dtype'])
+    return np.clip(np.round(np.asarray(batch, dtype=np.float32) / scale + zero_point),
+                   info.min, info.max).astype(detail['dtype'])
+
+
+def dequantize(values, detail):
+    """Integer TFLite output -> float32 (a float output is just copied out of the interpreter)"""
+    scale, zero_point = detail['quantization']
+    if not scale:
+        return np.array(values, dtype=np.float32)
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+class TFLiteBackend:
+    """One interpreter; invocations are serialised because an Interpreter is not thread-safe.
+
+    Quantized (uint8/int8) inputs and outputs are converted with the tensors'
+    scale and zero point, so the int8 model takes and returns the same floats.
+    """
+    name = 'tflite'
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.interpreter = _tflite_interpreter_class()(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        self._lock = threading.Lock()
+
+    def _resize(self, n):
+        shape = list(self._input['shape'])
+        shape[0] = n
+        self.interpreter.resize_tensor_input(self._input['index'], shape)
+        self.interpreter.allocate_tensors()
+        self._batch_size = n
+
+    def predict(self, batch):
+        batch = quantize(batch, self._input)
+        with self._lock:
+            if len(batch) != self._batch_size:
+                self._resize(len(batch))
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            return dequantize(self.interpreter.get_tensor(self._output['index']), self._output)
+
+
+class TFLiteInt8Backend(TFLiteBackend):
+    name = 'tflite_int8'
+
+
+class ONNXBackend:
+    name = 'onnx'
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+        self.path = path
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def predict(self, batch):
+        return self.session.run(None, {self._input_name: np.asarray(batch, dtype=np.float32)})[0]
+
+
+BACKEND_CLASSES = {'keras': KerasBackend, 'tflite': TFLiteBackend, 'onnx': ONNXBackend,
+                   'tflite_int8': TFLiteInt8Backend}
+
+
+def load_backend(name, h5_path, num_threads=None):
+    """Load backend 'keras', 'tflite', 'onnx' or 'tflite_int8' for the model at h5_path.
+
+    'auto' tries AUTO_ORDER and returns the first backend whose artifact exists
+    and whose runtime imports; RuntimeError lists why each one was skipped.
+    """
+    if name != 'auto' and name not in BACKEND_CLASSES:
+        raise ValueError(f"Unknown inference backend '{name}', expected 'auto' or one of {sorted(BACKEND_CLASSES)}")
+    errors = []
+    for candidate in (AUTO_ORDER if name == 'auto' else (name,)):
+        path = artifact_path(h5_path, candidate)
+        if not os.path.exists(path):
+            errors.append(f'{candidate}: {path} missing')
+            continue
+        try:
+            return BACKEND_CLASSES[candidate](path, num_threads=num_threads)
+        except Exception as e:
+            errors.append(f'{candidate}: {e}')
+    raise RuntimeError('No inference backend available (' + '; '.join(errors) + ')')
@@ -0,0 +1,184 @@
+# =========================
+# DYNAMIC BATCHING FOR IMAGE INFERENCE
+# =========================
+# Collects single-image requests from concurrent Flask threads for a few
+# milliseconds, runs one batched forward pass and hands each caller its row.
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatcherStopped(RuntimeError):
+    """Set on futures still queued when InferenceBatcher.stop() is called"""
+
+
+class _PendingRequest:
+    __slots__ = ('array', 'future', 'enqueued_at')
+
+    def __init__(self, array):
+        self.array = array
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class InferenceBatcher:
+    """Micro-batching queue in front of a model's predict function.
+
+    predict_fn receives an (N, H, W, C) array and must return an (N, num_classes)
+    array of probabilities. Requests are grouped until max_batch_size is reached
+    or max_wait_ms has passed since the first request of the batch arrived.
+    """
+
+    STAGES = ('queue_wait', 'assembly', 'inference', 'total')
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0,
+                 max_queue_size=256, latency_window=1024):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be >= 1')
+        self.predict_fn = predict_fn
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+        # Metrics
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = {}
+        self._latencies = {stage: deque(maxlen=latency_window) for stage in self.STAGES}
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+
+    # ---------- lifecycle ----------
+    def start(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._stopped.clear()
+                self._worker = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+                self._worker.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the worker; requests still queued fail with BatcherStopped instead of timing out"""
+        self._stopped.set()
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+        self._worker = None
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if not request.future.done():
+                request.future.set_exception(BatcherStopped('inference batcher stopped'))
+
+    # ---------- client API ----------
+    def submit(self, array):
+        """Queue a single preprocessed image (H, W, C) or (1, H, W, C); returns a Future."""
+        array = np.asarray(array)
+        if array.ndim == 4:
+            if array.shape[0] != 1:
+                raise ValueError('submit() expects a single image, use predict_fn directly for batches')
+            array = array[0]
+        self.start()
+        request = _PendingRequest(array)
+        self._queue.put(request)
+        return request.future
+
+    def predict(self, array, timeout=30.0):
+        """Blocking helper: returns the probability row for one image."""
+        return self.submit(array).result(timeout=timeout)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    # ---------- worker ----------
+    def _collect_batch(self):
+        try:
+            first = self._queue.get(timeout=0.1)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._collect_batch()
+            if batch:
+                self._process(batch)
+
+    def _process(self, batch):
+        started = time.perf_counter()
+        try:
+            stacked = np.stack([r.array for r in batch])
+            assembled = time.perf_counter()
+            preds = np.asarray(self.predict_fn(stacked))
+            finished = time.perf_counter()
+            if preds.ndim == 0 or len(preds) != len(batch):
+                raise ValueError(f'predict_fn returned {0 if preds.ndim == 0 else len(preds)} rows '
+                                 f'for a batch of {len(batch)}')
+        except Exception as e:
+            for r in batch:
+                r.future.set_exception(e)
+            with self._stats_lock:
+                self._errors += 1
+            return
+
+        for i, r in enumerate(batch):
+            r.future.set_result(preds[i])
+
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._batch_sizes[len(batch)] = self._batch_sizes.get(len(batch), 0) + 1
+            self._latencies['assembly'].append(assembled - started)
+            self._latencies['inference'].append(finished - assembled)
+            for r in batch:
+                self._latencies['queue_wait'].append(started - r.enqueued_at)
+                self._latencies['total'].append(finished - r.enqueued_at)
+
+    # ---------- metrics ----------
+    def stats(self):
+        """Queue depth, batch-size histogram and per-stage latency (milliseconds)."""
+        with self._stats_lock:
+            latency = {}
+            for stage, samples in self._latencies.items():
+                if samples:
+                    ms = np.array(samples) * 1000.0
+                    latency[stage] = {
+                        'count': len(ms),
+                        'avg_ms': round(float(ms.mean()), 3),
+                        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+                        'max_ms': round(float(ms.max()), 3)
+                    }
+                else:
+                    latency[stage] = {'count': 0}
+
+            return {
+                'queue_depth': self.queue_depth(),
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000.0,
+                'requests': self._requests,
+                'batches': self._batches,
+                'errors': self._errors,
+                'avg_batch_size': round(self._requests / self._batches, 3) if self._batches else 0,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                'latency': latency
+            }
@@ -0,0 +1,98 @@
+# =========================
+# CNN EXPORT: KERAS H5 -> TFLITE / ONNX
+# =========================
+# Converts models/crop_disease_pest_model.h5 into artifacts that the
+# lightweight backends in inference_backends.py serve, then checks that their
+# top-3 predictions on test_images/ match the Keras model.
+#
+#   python model_export.py                     # both formats
+#   python model_export.py --formats tflite
+#
+# Needs TensorFlow (and tf2onnx for ONNX) on the machine doing the export
+# only; the web workers then need just tflite-runtime or onnxruntime.
+import os
+import argparse
+
+import numpy as np
+
+from inference_backends import BACKEND_CLASSES, artifact_path
+
+DEFAULT_H5 = os.path.join('models', 'crop_disease_pest_model.h5')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+
+
+def export_tflite(model, out_path):
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    with open(out_path, 'wb') as f:
+        f.write(converter.convert())
+    return out_path
+
+
+def export_onnx(model, out_path, opset=13):
+    import tensorflow as tf
+    import tf2onnx
+    spec = (tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32, name='input'),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=opset, output_path=out_path)
+    return out_path
+
+
+EXPORTERS = {'tflite': export_tflite, 'onnx': export_onnx}
+
+
+# ---------- parity ----------
+def image_paths(directory):
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def load_image_batch(paths):
+    """Same preprocessing as /api/predict (image_preprocess): RGB, 224x224, float32 in [0, 1]"""
+    from image_preprocess import preprocess_batch
+    return preprocess_batch(paths)
+
+
+def top_k_agreement(reference, candidate, k=3):
+    """Compare two (N, classes) probability arrays row by row.
+
+    Returns top-1 agreement, the share of rows with the same top-k classes in
+    the same order, and the largest absolute probability difference.
+    """
+    ref_top = np.argsort(-reference, axis=1)[:, :k]
+    cand_top = np.argsort(-candidate, axis=1)[:, :k]
+    return {
+        'images': len(reference),
+        'top1_agreement': float(np.mean(ref_top[:, 0] == cand_top[:, 0])),
+        f'top{k}_agreement': float(np.mean(np.all(ref_top == cand_top, axis=1))),
+        'max_abs_diff': float(np.max(np.abs(reference - candidate)))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the crop disease CNN for the lightweight runtimes')
+    parser.add_argument('--h5', default=DEFAULT_H5)
+    parser.add_argument('--formats', default='tflite,onnx')
+    parser.add_argument('--images', default='test_images')
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.h5)
+    batch = load_image_batch(image_paths(args.images))
+    reference = model.predict(batch, verbose=0)
+
+    for fmt in [f.strip() for f in args.formats.split(',') if f.strip()]:
+        out_path = artifact_path(args.h5, fmt)
+        try:
+            EXPORTERS[fmt](model, out_path)
+        except Exception as e:
+            print(f"❌ {fmt} export failed: {e}")
+            continue
+        size_mb = os.path.getsize(out_path) / 1e6
+        parity = top_k_agreement(reference, BACKEND_CLASSES[fmt](out_path).predict(batch))
+        print(f"✅ {fmt}: {out_path} ({size_mb:.1f} MB) parity on {parity['images']} images: "
+              f"top-1 {parity['top1_agreement']:.0%}, top-3 {parity['top3_agreement']:.0%}, "
+              f"max |Δp| {parity['max_abs_diff']:.2e}")
+
+
+if __name__ == '__main__':
+    main()
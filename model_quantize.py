@@ -0,0 +1,197 @@
+# =========================
+# CNN POST-TRAINING INT8 QUANTIZATION
+# =========================
+# Turns the float32 MobileNetV2 classifier saved by cnn_model.py into a
+# full-integer TFLite model (models/crop_disease_pest_model.int8.tflite) for
+# low-core edge servers, then reports what it costs and what it buys:
+#   - accuracy per class label on images the CNN never trained on, float vs int8
+#   - single-image p50/p99 latency of both models on the same thread count
+#
+#   python model_quantize.py                          # 10 calibration + 30 eval images per class
+#   python model_quantize.py --threads 2 --report models/int8_report.json
+#
+# Both samples come from the Keras validation slice of dataset/: cnn_model.py
+# trains with validation_split=0.2, and flow_from_directory holds out the
+# first 20% of each class folder's sorted file names as subset='validation'.
+# Calibration images are a seeded, per-class sample of that slice (so rare
+# classes such as Potato___healthy still shape the activation ranges); the
+# evaluation sample is drawn from the rest of the slice only. Pass the split
+# the model was trained with if it was not 0.2. Serve the result with
+# INFERENCE_BACKEND=tflite_int8.
+import os
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+
+from inference_backends import artifact_path, load_backend
+from model_export import DEFAULT_H5, image_paths, load_image_batch
+
+DEFAULT_DATASET = 'dataset'
+VALIDATION_SPLIT = 0.2  # ImageDataGenerator(validation_split=...) in cnn_model.py
+EVAL_CHUNK = 32  # images preprocessed and predicted at a time
+
+
+# ---------- data ----------
+def validation_slice(paths, validation_split=VALIDATION_SPLIT):
+    """The files flow_from_directory(subset='validation') serves from one class folder.
+
+    Keras takes the first int(validation_split * n) of the sorted file names
+    for validation and trains on the rest.
+    """
+    return sorted(paths)[:int(validation_split * len(paths))]
+
+
+def calibration_split(dataset_dir, calibration_per_class=10, eval_per_class=30, seed=0,
+                      validation_split=VALIDATION_SPLIT):
+    """Seeded per-class sample of the validation slice of dataset_dir.
+
+    Returns (class_names, calibration, evaluation); both lists hold
+    (path, label_index) pairs and never share an image, and neither contains
+    an image the CNN was trained on. Class indices follow the sorted folder
+    names, like flow_from_directory in cnn_model.py.
+    """
+    class_names = sorted(d for d in os.listdir(dataset_dir) if os.path.isdir(os.path.join(dataset_dir, d)))
+    rng = random.Random(seed)
+    calibration, evaluation = [], []
+    for label, name in enumerate(class_names):
+        paths = validation_slice(image_paths(os.path.join(dataset_dir, name)), validation_split)
+        rng.shuffle(paths)
+        calibration.extend((p, label) for p in paths[:calibration_per_class])
+        evaluation.extend((p, label) for p in paths[calibration_per_class:calibration_per_class + eval_per_class])
+    rng.shuffle(calibration)
+    return class_names, calibration, evaluation
+
+
+def representative_dataset(paths):
+    """Generator for TFLiteConverter.representative_dataset: one [1, 224, 224, 3] float32 input per image"""
+    def generate():
+        for path in paths:
+            yield [load_image_batch([path])]
+    return generate
+
+
+def export_tflite_int8(model, out_path, calibration_paths):
+    """Full-integer conversion; uint8 input/output, activation ranges from calibration_paths"""
+    import tensorflow as tf
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset(calibration_paths)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.uint8
+    converter.inference_output_type = tf.uint8
+    with open(out_path, 'wb') as f:
+        f.write(converter.convert())
+    return out_path
+
+
+# ---------- report ----------
+def predict_labels(backend, paths):
+    """argmax class of every image, preprocessing EVAL_CHUNK images at a time"""
+    labels = []
+    for start in range(0, len(paths), EVAL_CHUNK):
+        probs = backend.predict(load_image_batch(paths[start:start + EVAL_CHUNK]))
+        labels.extend(np.argmax(probs, axis=1).tolist())
+    return np.array(labels)
+
+
+def accuracy_report(labels, float_pred, int8_pred, class_names):
+    """Per-class and overall accuracy of both models plus the int8 - float delta"""
+    labels, float_pred, int8_pred = np.asarray(labels), np.asarray(float_pred), np.asarray(int8_pred)
+    per_class = {}
+    for index, name in enumerate(class_names):
+        mask = labels == index
+        if not mask.any():
+            continue
+        float_acc = float(np.mean(float_pred[mask] == index))
+        int8_acc = float(np.mean(int8_pred[mask] == index))
+        per_class[name] = {'images': int(mask.sum()), 'float': float_acc, 'int8': int8_acc,
+                           'delta': int8_acc - float_acc}
+    float_acc = float(np.mean(float_pred == labels)) if len(labels) else 0.0
+    int8_acc = float(np.mean(int8_pred == labels)) if len(labels) else 0.0
+    return {
+        'images': int(len(labels)),
+        'float': float_acc,
+        'int8': int8_acc,
+        'delta': int8_acc - float_acc,
+        'agreement': float(np.mean(float_pred == int8_pred)) if len(labels) else 0.0,
+        'per_class': per_class
+    }
+
+
+def latency_ms(backend, images, runs=100):
+    """Single-image latency percentiles after one warm-up call"""
+    backend.predict(images[:1])
+    timings = []
+    for i in range(runs):
+        image = images[i % len(images):i % len(images) + 1]
+        start = time.perf_counter()
+        backend.predict(image)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {'p50': float(np.percentile(timings, 50)), 'p99': float(np.percentile(timings, 99))}
+
+
+def print_report(report):
+    accuracy, latency = report['accuracy'], report['latency_ms']
+    print(f"\n{'class':<46}{'n':>5}{'float':>9}{'int8':>9}{'delta':>9}")
+    for name, row in accuracy['per_class'].items():
+        print(f"{name:<46}{row['images']:>5}{row['float']:>9.1%}{row['int8']:>9.1%}{row['delta'] * 100:>+8.1f}p")
+    print(f"{'overall':<46}{accuracy['images']:>5}{accuracy['float']:>9.1%}{accuracy['int8']:>9.1%}"
+          f"{accuracy['delta'] * 100:>+8.1f}p")
+    print(f"📊 Top-1 agreement float vs int8: {accuracy['agreement']:.1%}")
+    print(f"⏱️ Latency on {report['threads']} thread(s): "
+          f"{report['baseline']} p50 {latency['float']['p50']:.1f} ms / p99 {latency['float']['p99']:.1f} ms, "
+          f"int8 p50 {latency['int8']['p50']:.1f} ms / p99 {latency['int8']['p99']:.1f} ms")
+    print(f"💾 Size: {report['size_mb']['float']:.1f} MB -> {report['size_mb']['int8']:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Post-training INT8 quantization of the crop disease CNN')
+    parser.add_argument('--h5', default=DEFAULT_H5)
+    parser.add_argument('--dataset', default=DEFAULT_DATASET)
+    parser.add_argument('--calibration-per-class', type=int, default=10)
+    parser.add_argument('--eval-per-class', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--validation-split', type=float, default=VALIDATION_SPLIT,
+                        help='validation_split the model was trained with; only that slice is sampled')
+    parser.add_argument('--baseline', default='auto', help='float backend to compare against (auto, keras, tflite, onnx)')
+    parser.add_argument('--threads', type=int, default=1, help='interpreter threads for the latency comparison')
+    parser.add_argument('--runs', type=int, default=100)
+    parser.add_argument('--report', help='also write the report as JSON to this path')
+    args = parser.parse_args()
+
+    class_names, calibration, evaluation = calibration_split(
+        args.dataset, args.calibration_per_class, args.eval_per_class, args.seed, args.validation_split)
+    print(f"📂 {len(class_names)} classes: {len(calibration)} calibration / {len(evaluation)} evaluation images "
+          f"from the {args.validation_split:.0%} validation slice")
+
+    from tensorflow.keras.models import load_model
+    out_path = artifact_path(args.h5, 'tflite_int8')
+    export_tflite_int8(load_model(args.h5), out_path, [p for p, _ in calibration])
+    print(f"✅ INT8 model written to {out_path}")
+
+    baseline = load_backend(args.baseline, args.h5, num_threads=args.threads)
+    quantized = load_backend('tflite_int8', args.h5, num_threads=args.threads)
+    paths, labels = [p for p, _ in evaluation], [label for _, label in evaluation]
+    images = load_image_batch(paths[:EVAL_CHUNK])
+    report = {
+        'baseline': baseline.name,
+        'threads': args.threads,
+        'calibration_images': len(calibration),
+        'accuracy': accuracy_report(labels, predict_labels(baseline, paths), predict_labels(quantized, paths),
+                                    class_names),
+        'latency_ms': {'float': latency_ms(baseline, images, args.runs),
+                       'int8': latency_ms(quantized, images, args.runs)},
+        'size_mb': {'float': os.path.getsize(baseline.path) / 1e6, 'int8': os.path.getsize(out_path) / 1e6}
+    }
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📝 Report written to {args.report}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# =========================
+# MODEL REGISTRY (LAZY / BACKGROUND LOADING)
+# =========================
+# Models are registered by name with a loader callable. Nothing is loaded at
+# import time: a model is loaded on first get() or by a background warm-up
+# thread, so the web app can start serving non-model endpoints immediately.
+import threading
+import time
+
+REGISTERED = 'registered'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class _ModelEntry:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.state = REGISTERED
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+
+class ModelRegistry:
+    """Thread-safe name -> model registry with load-once semantics."""
+
+    def __init__(self):
+        self._entries = {}
+
+    def register(self, name, loader):
+        self._entries[name] = _ModelEntry(name, loader)
+
+    def names(self):
+        return list(self._entries)
+
+    def _load(self, entry):
+        # Only one thread runs the loader; others wait on entry.done
+        with entry.lock:
+            if entry.state in (READY, FAILED):
+                return
+            entry.state = LOADING
+            started = time.perf_counter()
+            try:
+                entry.value = entry.loader()
+                entry.state = READY
+            except Exception as e:
+                print(f"❌ Failed to load model '{entry.name}': {e}")
+                entry.error = str(e)
+                entry.state = FAILED
+            finally:
+                entry.load_seconds = round(time.perf_counter() - started, 3)
+                entry.done.set()
+
+    def get(self, name, wait=True, timeout=None):
+        """Return the loaded model (None if it failed to load).
+
+        With wait=False a model that is not ready yet returns None instead of
+        blocking the caller.
+        """
+        entry = self._entries[name]
+        if entry.state == READY:
+            return entry.value
+        if entry.state == FAILED:
+            return None
+        if not wait:
+            return None
+        if entry.state == LOADING:
+            entry.done.wait(timeout)
+        else:
+            self._load(entry)
+        return entry.value if entry.state == READY else None
+
+    def reload(self, name):
+        """Drop a loaded (or failed) model so the next get() loads it again, e.g. after its file changed"""
+        entry = self._entries[name]
+        with entry.lock:  # waits for a load in progress to finish
+            entry.state = REGISTERED
+            entry.value = None
+            entry.error = None
+            entry.done = threading.Event()
+
+    def state(self, name):
+        return self._entries[name].state
+
+    def is_ready(self, name):
+        return self._entries[name].state == READY
+
+    def status(self):
+        """Per-model {'state', 'load_seconds', 'error'} for health endpoints"""
+        return {
+            name: {
+                'state': e.state,
+                'load_seconds': e.load_seconds,
+                'error': e.error
+            }
+            for name, e in self._entries.items()
+        }
+
+    def warm_up(self, names=None, background=True):
+        """Load the given models (default: all) in order, optionally in a daemon thread."""
+        names = list(names or self._entries)
+
+        def run():
+            for name in names:
+                self.get(name)
+
+        if not background:
+            run()
+            return None
+        thread = threading.Thread(target=run, name='model-warmup', daemon=True)
+        thread.start()
+        return thread
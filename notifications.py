@@ -0,0 +1,356 @@
+# =========================
+# NOTIFICATION SERVICE
+# =========================
+# Request handlers call notify() after their own commit; rows go on an
+# in-process outbox and one writer thread inserts them in batches; a batch
+# that keeps failing is retried with backoff and then put back on the outbox.
+# Unread counts are kept per user in memory: loaded once (piggybacked on the
+# first list query), then adjusted by the writer, by mark_read() and when a
+# scheduled notification comes due, so reading the count is usually not a
+# COUNT(*). Other worker processes change the same rows without telling this
+# one, so a loaded count is only trusted for count_ttl seconds.
+#
+# The lock only guards that bookkeeping; queries and commits run outside it.
+# Writes mark their users busy for the duration and bump the users' generation
+# when done, and a count load is only kept if neither happened while its query
+# ran (otherwise it is returned but loaded again next time).
+#
+# A notification with scheduled_for in the future is stored right away (so it
+# survives restarts) but stays invisible until then; a heap ordered by
+# scheduled_for wakes a scheduler thread that counts it as delivered and tells
+# subscribers. Subscribers get the same {user_id: {'notifications'}} shape as
+# change_events.UserChangeTracker.
+import heapq
+import itertools
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import func, or_, select
+
+from change_events import ALL_USERS
+
+TABLE = 'notifications'
+
+
+def local_midnight_utc(day):
+    """Naive UTC datetime of 00:00 server-local time on day, for scheduled_for"""
+    return datetime.combine(day, datetime.min.time()).astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class NotificationService:
+    def __init__(self, engine, table, max_queue=10000, batch_size=200, flush_interval=0.2,
+                 count_ttl=30, insert_attempts=3, retry_delay=0.5):
+        self.engine = engine
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.count_ttl = count_ttl
+        self.insert_attempts = insert_attempts
+        self.retry_delay = retry_delay
+        self._outbox = queue.Queue(maxsize=max_queue)
+        self._heap = []  # (scheduled_for, seq, user_id)
+        self._seq = itertools.count()
+        self._schedule_cv = threading.Condition()
+        self._unread = {}  # user_id -> (count, counted_at)
+        self._busy = {}  # user_id -> writes in progress
+        self._generation = {}  # user_id -> writes finished, for count loads to compare
+        self._epoch = 0  # bumped when every user's counts are dropped
+        self._lock = threading.Lock()  # never held across a database call
+        self._done = threading.Condition()
+        self._enqueued = 0
+        self._written = 0
+        self._started = False
+        self._subscribers = []
+        self.counters = {
+            'queued': 0, 'inserted': 0, 'batches': 0, 'inline_inserts': 0, 'insert_errors': 0, 'requeued': 0,
+            'lost': 0,
+            'scheduled': 0, 'delivered_scheduled': 0, 'marked_read': 0, 'count_loads': 0
+        }
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def _publish(self, user_ids):
+        if not user_ids:
+            return
+        changes = {uid: {TABLE} for uid in user_ids}
+        for callback in self._subscribers:
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Notification subscriber error: {e}")
+
+    def _delivered(self, now):
+        return or_(self.table.c.scheduled_for.is_(None), self.table.c.scheduled_for <= now)
+
+    # ---------- threads ----------
+    def start(self):
+        """Start the writer and scheduler and pick up scheduled rows still pending in the database"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        try:
+            now = datetime.utcnow()
+            with self.engine.connect() as conn:
+                pending = conn.execute(
+                    select(self.table.c.scheduled_for, self.table.c.user_id)
+                    .where(self.table.c.scheduled_for > now, self.table.c.is_read == False)
+                ).all()
+            for scheduled_for, user_id in pending:
+                self._schedule(scheduled_for, user_id)
+        except Exception as e:
+            print(f"⚠️ Could not load scheduled notifications: {e}")
+        threading.Thread(target=self._run_writer, name='notification-writer', daemon=True).start()
+        threading.Thread(target=self._run_scheduler, name='notification-scheduler', daemon=True).start()
+
+    def _run_writer(self):
+        while True:
+            batch = [self._outbox.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._outbox.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            requeued = self._insert(batch)
+            with self._done:
+                self._written += len(batch) - requeued  # requeued rows count once they are finally handled
+                self._done.notify_all()
+
+    def _run_scheduler(self):
+        while True:
+            with self._schedule_cv:
+                while not self._heap:
+                    self._schedule_cv.wait()
+                due, _, user_id = self._heap[0]
+                delay = (due - datetime.utcnow()).total_seconds()
+                if delay > 0:
+                    self._schedule_cv.wait(delay)  # woken early when an earlier item is pushed
+                    continue
+                heapq.heappop(self._heap)
+            with self._lock:
+                entry = self._unread.get(user_id)
+                if entry is not None and due > entry[1]:  # loaded counts already include rows due by then
+                    self._unread[user_id] = (entry[0] + 1, entry[1])
+                self._generation[user_id] = self._generation.get(user_id, 0) + 1
+                self.counters['delivered_scheduled'] += 1
+            self._publish({user_id})
+
+    def _schedule(self, scheduled_for, user_id):
+        with self._schedule_cv:
+            heapq.heappush(self._heap, (scheduled_for, next(self._seq), user_id))
+            self.counters['scheduled'] += 1
+            self._schedule_cv.notify()
+
+    # ---------- writes ----------
+    def notify(self, user_id, notification_type, title, message, planting_id=None, scheduled_for=None):
+        """Queue a notification; scheduled_for (UTC) delays its delivery"""
+        row = {
+            'user_id': user_id,
+            'planting_id': planting_id,
+            'notification_type': notification_type,
+            'title': title,
+            'message': message,
+            'is_read': False,
+            'created_at': datetime.utcnow(),
+            'scheduled_for': scheduled_for
+        }
+        self.start()
+        with self._done:
+            self.counters['queued'] += 1
+            try:
+                self._outbox.put_nowait(row)
+                self._enqueued += 1
+                return
+            except queue.Full:
+                self.counters['inline_inserts'] += 1
+        if self._insert([row]):
+            with self._done:
+                self._enqueued += 1  # now the writer's to handle
+
+    def _insert(self, rows):
+        """Insert with retries; returns how many rows went back on the outbox"""
+        for attempt in range(1, self.insert_attempts + 1):
+            try:
+                delivered = self._try_insert(rows)
+            except Exception as e:
+                with self._lock:
+                    self.counters['insert_errors'] += 1
+                error = e
+                if attempt < self.insert_attempts:
+                    time.sleep(self.retry_delay * attempt)
+                continue
+            self._publish(delivered)
+            return 0
+
+        # Still failing: back on the outbox behind newer rows, unless it is full
+        requeued = 0
+        with self._done:
+            for row in rows:
+                try:
+                    self._outbox.put_nowait(row)
+                except queue.Full:
+                    break
+                requeued += 1
+            self.counters['requeued'] += requeued
+            self.counters['lost'] += len(rows) - requeued
+        print(f"⚠️ Notification insert failed ({error}); requeued {requeued}, dropped {len(rows) - requeued}")
+        return requeued
+
+    def _begin_write(self, user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._busy[user_id] = self._busy.get(user_id, 0) + 1
+
+    def _end_write(self, user_ids, deltas):
+        """Apply {user_id: unread change} to loaded counts and release the users"""
+        with self._lock:
+            for user_id in user_ids:
+                busy = self._busy.pop(user_id) - 1
+                if busy:
+                    self._busy[user_id] = busy
+                self._generation[user_id] = self._generation.get(user_id, 0) + 1
+                entry = self._unread.get(user_id)
+                if entry is not None and deltas.get(user_id):
+                    self._unread[user_id] = (max(0, entry[0] + deltas[user_id]), entry[1])
+
+    def _try_insert(self, rows):
+        """Insert rows and apply their counter changes; returns the users whose rows are visible now"""
+        users = {row['user_id'] for row in rows}
+        deltas = {}
+        self._begin_write(users)
+        try:
+            with self.engine.begin() as conn:
+                conn.execute(self.table.insert(), rows)
+            now = datetime.utcnow()
+            for row in rows:
+                if row['scheduled_for'] and row['scheduled_for'] > now:
+                    self._schedule(row['scheduled_for'], row['user_id'])
+                    continue
+                deltas[row['user_id']] = deltas.get(row['user_id'], 0) + 1
+            with self._lock:
+                self.counters['inserted'] += len(rows)
+                self.counters['batches'] += 1
+        finally:
+            self._end_write(users, deltas)
+        return set(deltas)
+
+    def mark_read(self, user_id, notification_ids=None):
+        """Mark the user's delivered unread notifications (all, or only notification_ids) as read.
+
+        Returns how many rows changed.
+        """
+        self.start()
+        t = self.table
+        now = datetime.utcnow()
+        stmt = t.update().where(t.c.user_id == user_id, t.c.is_read == False, self._delivered(now))
+        if notification_ids is not None:
+            stmt = stmt.where(t.c.notification_id.in_(list(notification_ids)))
+        changed = 0
+        self._begin_write({user_id})
+        try:
+            with self.engine.begin() as conn:
+                changed = conn.execute(stmt.values(is_read=True)).rowcount
+            with self._lock:
+                self.counters['marked_read'] += changed
+        finally:
+            self._end_write({user_id}, {user_id: -changed})
+        if changed:
+            self._publish({user_id})
+        return changed
+
+    # ---------- reads ----------
+    def _loaded_count(self, user_id, now):
+        """(count, counted_at) if loaded less than count_ttl seconds ago; call with _lock held"""
+        entry = self._unread.get(user_id)
+        if entry is not None and (now - entry[1]).total_seconds() > self.count_ttl:
+            del self._unread[user_id]
+            return None
+        return entry
+
+    def _lookup(self, user_id, now):
+        """(loaded count or None, generation to hand to _store_count)"""
+        with self._lock:
+            entry = self._loaded_count(user_id, now)
+            return (entry[0] if entry else None), (self._epoch, self._generation.get(user_id, 0))
+
+    def _store_count(self, user_id, generation, count, now):
+        """Keep a count loaded at now unless a write for the user ran in the meantime"""
+        with self._lock:
+            self.counters['count_loads'] += 1
+            if not self._busy.get(user_id) and generation == (self._epoch, self._generation.get(user_id, 0)):
+                self._unread[user_id] = (count, now)
+
+    def unread_count(self, user_id):
+        self.start()
+        now = datetime.utcnow()
+        count, generation = self._lookup(user_id, now)
+        if count is None:
+            t = self.table
+            with self.engine.connect() as conn:
+                count = conn.execute(
+                    select(func.count()).where(t.c.user_id == user_id, t.c.is_read == False,
+                                               self._delivered(now))
+                ).scalar()
+            self._store_count(user_id, generation, count, now)
+        return count
+
+    def recent_unread(self, user_id, limit=10):
+        """(newest delivered unread rows, unread count); a cold count is loaded by the same query"""
+        self.start()
+        t = self.table
+        columns = [t.c.notification_id, t.c.planting_id, t.c.notification_type, t.c.title, t.c.message,
+                   t.c.created_at, t.c.scheduled_for]
+        now = datetime.utcnow()
+        count, generation = self._lookup(user_id, now)
+        if count is None:
+            columns.append(func.count().over().label('unread_total'))
+        stmt = select(*columns).where(t.c.user_id == user_id, t.c.is_read == False,
+                                      self._delivered(now)) \
+            .order_by(t.c.created_at.desc(), t.c.notification_id.desc()).limit(limit)
+        with self.engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+        if count is None:
+            count = rows[0][-1] if rows else 0
+            self._store_count(user_id, generation, count, now)
+        return rows, count
+
+    # ---------- maintenance ----------
+    def on_changes(self, changes):
+        """Change-tracker subscriber: notification rows written through the ORM make counts stale"""
+        with self._lock:
+            for user_id, tables in changes.items():
+                if TABLE not in tables:
+                    continue
+                if user_id is ALL_USERS:
+                    self._unread.clear()
+                    self._epoch += 1
+                else:
+                    self._unread.pop(user_id, None)
+                    self._generation[user_id] = self._generation.get(user_id, 0) + 1
+
+    def clear(self):
+        """Forget loaded counts and pending schedule (e.g. after the database was recreated)"""
+        with self._lock:
+            self._unread.clear()
+            self._epoch += 1
+        with self._schedule_cv:
+            self._heap.clear()
+
+    def flush(self, timeout=5.0):
+        """Wait until every notification queued before the call is in the database; False on timeout"""
+        with self._done:
+            target = self._enqueued
+            return self._done.wait_for(lambda: self._written >= target, timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            users = len(self._unread)
+        return dict(self.counters, outbox=self._outbox.qsize(), pending_scheduled=len(self._heap),
+                    users_with_counts=users, batch_size=self.batch_size)
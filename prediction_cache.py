@@ -0,0 +1,421 @@
+# =========================
+# PREDICTION CACHE FOR IMAGE UPLOADS
+# =========================
+# Content-addressed cache in front of the CNN: exact matches by SHA-256 of the
+# uploaded bytes, near-duplicates by a 64-bit perceptual (difference) hash.
+# Entries expire by TTL, are evicted LRU once the size bound is reached and are
+# dropped whenever the model file changes.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# A 64-bit hash split into 4 bands of 16 bits: two hashes within Hamming
+# distance 3 always share at least one band, so bands work as a lookup index.
+PHASH_BANDS = 4
+PHASH_BAND_BITS = 16
+
+
+def content_key(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def perceptual_hash(img):
+    """64-bit difference hash of a PIL image (robust to re-encoding and resizing)"""
+    from PIL import Image
+    small = img.convert('L').resize((9, 8), Image.BILINEAR)
+    px = np.asarray(small, dtype=np.int16)
+    bits = (px[:, 1:] > px[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return value
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def phash_bands(phash):
+    mask = (1 << PHASH_BAND_BITS) - 1
+    return [(phash >> (i * PHASH_BAND_BITS)) & mask for i in range(PHASH_BANDS)]
+
+
+def model_version(model_path):
+    """Version stamp of the model file: changes whenever the H5 is replaced"""
+    try:
+        st = os.stat(model_path)
+        return f'{st.st_mtime_ns}-{st.st_size}'
+    except OSError:
+        return 'missing'
+
+
+# ============================================
+# BACKENDS
+# ============================================
+
+class MemoryCacheBackend:
+    """In-process LRU dict (one copy per worker)"""
+
+    def __init__(self):
+        self._entries = OrderedDict()  # key -> (value, phash, size, stored_at)
+        self._bands = {}               # (band_index, band_value) -> set(keys)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        value, phash, size, _ = self._entries.pop(key)
+        self._size -= size
+        if phash is not None:
+            for i, band in enumerate(phash_bands(phash)):
+                keys = self._bands.get((i, band))
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._bands[(i, band)]
+
+    def get(self, key, ttl):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if ttl and time.time() - entry[3] > ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def find_similar(self, phash, max_distance, ttl, prefix=''):
+        """Closest entry within max_distance bits whose key starts with prefix (the model version)"""
+        with self._lock:
+            candidates = set()
+            for i, band in enumerate(phash_bands(phash)):
+                candidates.update(self._bands.get((i, band), ()))
+            best = None
+            for key in candidates:
+                if not key.startswith(prefix):
+                    continue
+                value, other, _, stored_at = self._entries[key]
+                if ttl and time.time() - stored_at > ttl:
+                    continue
+                distance = hamming_distance(phash, other)
+                if distance <= max_distance and (best is None or distance < best[0]):
+                    best = (distance, key, value)
+            if best is None:
+                return None
+            self._entries.move_to_end(best[1])
+            return best[2]
+
+    def put(self, key, phash, value, size, max_bytes):
+        evicted = 0
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, phash, size, time.time())
+            self._size += size
+            if phash is not None:
+                for i, band in enumerate(phash_bands(phash)):
+                    self._bands.setdefault((i, band), set()).add(key)
+            while self._size > max_bytes and len(self._entries) > 1:
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+            self._size = 0
+
+    def set_model_version(self, version):
+        """Called when the model file changes; returns True if entries were dropped"""
+        self.clear()
+        return True
+
+    def usage(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size}
+
+
+class SQLiteCacheBackend:
+    """On-disk cache shared by all Flask workers on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS prediction_cache (
+                cache_key TEXT PRIMARY KEY,
+                phash INTEGER,
+                band0 INTEGER, band1 INTEGER, band2 INTEGER, band3 INTEGER,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_pc_band0 ON prediction_cache (band0);
+            CREATE INDEX IF NOT EXISTS ix_pc_band1 ON prediction_cache (band1);
+            CREATE INDEX IF NOT EXISTS ix_pc_band2 ON prediction_cache (band2);
+            CREATE INDEX IF NOT EXISTS ix_pc_band3 ON prediction_cache (band3);
+            CREATE INDEX IF NOT EXISTS ix_pc_last_access ON prediction_cache (last_access);
+            CREATE TABLE IF NOT EXISTS prediction_cache_meta (
+                name TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _signed(phash):
+        # SQLite integers are signed 64-bit
+        return phash - (1 << 64) if phash >= (1 << 63) else phash
+
+    @staticmethod
+    def _unsigned(phash):
+        return phash + (1 << 64) if phash < 0 else phash
+
+    def get(self, key, ttl):
+        conn = self._conn()
+        row = conn.execute('SELECT value, stored_at FROM prediction_cache WHERE cache_key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if ttl and now - row[1] > ttl:
+            conn.execute('DELETE FROM prediction_cache WHERE cache_key = ?', (key,))
+            return None
+        conn.execute('UPDATE prediction_cache SET last_access = ? WHERE cache_key = ?', (now, key))
+        return json.loads(row[0])
+
+    def find_similar(self, phash, max_distance, ttl, prefix=''):
+        conn = self._conn()
+        bands = phash_bands(phash)
+        min_stored = time.time() - ttl if ttl else 0
+        # A worker still on the previous model can store rows after another worker
+        # cleared the table, so only rows with this version's key prefix count
+        rows = conn.execute(
+            'SELECT cache_key, phash, value FROM prediction_cache '
+            'WHERE (band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?) AND stored_at >= ? '
+            'AND substr(cache_key, 1, ?) = ?',
+            (*bands, min_stored, len(prefix), prefix)
+        ).fetchall()
+        best = None
+        for key, other, value in rows:
+            distance = hamming_distance(phash, self._unsigned(other))
+            if distance <= max_distance and (best is None or distance < best[0]):
+                best = (distance, key, value)
+        if best is None:
+            return None
+        conn.execute('UPDATE prediction_cache SET last_access = ? WHERE cache_key = ?', (time.time(), best[1]))
+        return json.loads(best[2])
+
+    def put(self, key, phash, value, size, max_bytes):
+        conn = self._conn()
+        now = time.time()
+        bands = phash_bands(phash) if phash is not None else [None] * PHASH_BANDS
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO prediction_cache '
+                '(cache_key, phash, band0, band1, band2, band3, value, size, stored_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, self._signed(phash) if phash is not None else None, *bands,
+                 json.dumps(value), size, now, now)
+            )
+            evicted = 0
+            total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM prediction_cache').fetchone()[0]
+            if total > max_bytes:
+                # Drop least recently used rows until back under the bound
+                for old_key, old_size in conn.execute(
+                        'SELECT cache_key, size FROM prediction_cache WHERE cache_key != ? ORDER BY last_access',
+                        (key,)).fetchall():
+                    if total <= max_bytes:
+                        break
+                    conn.execute('DELETE FROM prediction_cache WHERE cache_key = ?', (old_key,))
+                    total -= old_size
+                    evicted += 1
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return evicted
+
+    def clear(self):
+        self._conn().execute('DELETE FROM prediction_cache')
+
+    def set_model_version(self, version):
+        """Clear the shared table only if no other worker has already done so for this version"""
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT value FROM prediction_cache_meta WHERE name = 'model_version'").fetchone()
+            changed = row is None or row[0] != version
+            if changed:
+                conn.execute('DELETE FROM prediction_cache')
+                conn.execute("INSERT OR REPLACE INTO prediction_cache_meta (name, value) VALUES ('model_version', ?)",
+                             (version,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return changed
+
+    def usage(self):
+        entries, size = self._conn().execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM prediction_cache').fetchone()
+        return {'entries': entries, 'bytes': size}
+
+
+# ============================================
+# CACHE FRONT-END
+# ============================================
+
+class PredictionCache:
+    """Exact + near-duplicate prediction cache bound to one model file.
+
+    Cache keys include the model version, so replacing the model file invalidates
+    every entry (the backend is cleared the first time the change is seen) and
+    on_model_change is called so the caller can reload the model itself;
+    otherwise the old in-memory model would refill the cache under the new key.
+
+    With model_path=None the cache stays disabled until bind_model() is called
+    with the file the loaded backend actually serves.
+    """
+
+    def __init__(self, backend, model_path, ttl_seconds=3600, max_mb=64,
+                 use_phash=True, phash_distance=3, on_model_change=None):
+        self.backend = backend
+        self.model_path = model_path
+        self.on_model_change = on_model_change
+        self.ttl = ttl_seconds
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.use_phash = use_phash
+        self.phash_distance = min(phash_distance, PHASH_BANDS - 1)
+        self._lock = threading.Lock()
+        self.counters = {'exact_hits': 0, 'phash_hits': 0, 'misses': 0,
+                         'stores': 0, 'evictions': 0, 'invalidations': 0, 'stale_puts': 0}
+        self._version = None
+        self._check_model_version()
+
+    @property
+    def version(self):
+        """Model version of the current keys; pass it to put() for results computed after reading it"""
+        return self._version
+
+    def bind_model(self, model_path):
+        """Key entries on model_path from now on (the model was just loaded from it, so no reload)"""
+        version = model_version(model_path)
+        with self._lock:
+            self.model_path = model_path
+            if version != self._version:
+                if self.backend.set_model_version(version) and self._version is not None:
+                    self.counters['invalidations'] += 1
+                self._version = version
+
+    def _check_model_version(self):
+        if self.model_path is None:
+            return
+        version = model_version(self.model_path)
+        if version == self._version:
+            return
+        changed = False
+        with self._lock:
+            if version != self._version:
+                if self.backend.set_model_version(version) and self._version is not None:
+                    self.counters['invalidations'] += 1
+                changed = self._version is not None
+                self._version = version
+        if changed and self.on_model_change:
+            self.on_model_change()
+
+    def _key(self, data):
+        return f'{self._version}:{content_key(data)}'
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def get(self, data):
+        """Exact lookup by SHA-256 of the uploaded bytes"""
+        self._check_model_version()
+        if self._version is None:
+            return None
+        value = self.backend.get(self._key(data), self.ttl)
+        if value is not None:
+            self._count('exact_hits')
+        return value
+
+    def get_similar(self, phash):
+        """Near-duplicate lookup; counts a miss when nothing is found"""
+        if phash is not None and self.use_phash and self._version is not None:
+            value = self.backend.find_similar(phash, self.phash_distance, self.ttl, prefix=f'{self._version}:')
+            if value is not None:
+                self._count('phash_hits')
+                return value
+        self._count('misses')
+        return None
+
+    def put(self, data, value, phash=None, version=None):
+        """Store a result; skipped if version (read before predicting) is no longer current"""
+        if self._version is None:
+            return
+        if version is not None and version != self._version:
+            self._count('stale_puts')
+            return
+        size = len(json.dumps(value)) + len(data) // 1024  # payload + small per-image overhead
+        evicted = self.backend.put(self._key(data), phash if self.use_phash else None,
+                                   value, size, self.max_bytes)
+        self._count('stores')
+        if evicted:
+            self._count('evictions', evicted)
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+        lookups = counters['exact_hits'] + counters['phash_hits'] + counters['misses']
+        counters['hit_rate'] = round((counters['exact_hits'] + counters['phash_hits']) / lookups, 4) if lookups else 0
+        counters.update(self.backend.usage())
+        counters['backend'] = type(self.backend).__name__
+        counters['max_bytes'] = self.max_bytes
+        counters['model_version'] = self._version
+        counters['model_path'] = self.model_path
+        return counters
+
+
+def create_prediction_cache(model_path=None, on_model_change=None):
+    """Build the cache from environment settings (PREDICTION_CACHE=memory|sqlite|off)"""
+    kind = os.getenv('PREDICTION_CACHE', 'memory').lower()
+    if kind in ('off', 'none', '0'):
+        return None
+    if kind == 'sqlite':
+        backend = SQLiteCacheBackend(os.getenv('PREDICTION_CACHE_PATH', os.path.join('instance', 'prediction_cache.db')))
+    else:
+        backend = MemoryCacheBackend()
+    return PredictionCache(
+        backend,
+        model_path,
+        ttl_seconds=float(os.getenv('PREDICTION_CACHE_TTL', 3600)),
+        max_mb=float(os.getenv('PREDICTION_CACHE_MB', 64)),
+        use_phash=os.getenv('PREDICTION_CACHE_PHASH', '1') not in ('0', 'false', 'no'),
+        phash_distance=int(os.getenv('PREDICTION_CACHE_PHASH_DISTANCE', 3)),
+        on_model_change=on_model_change
+    )
@@ -0,0 +1,50 @@
+# =========================
+# SCHEMA MIGRATIONS
+# =========================
+# db.create_all() only creates missing tables, so changes to existing tables
+# (new indexes, columns) are shipped as numbered migrations. Applied versions
+# are recorded in the schema_migrations table; each migration runs in its own
+# transaction and must be safe to run against a freshly created schema too.
+from datetime import datetime
+
+from sqlalchemy import text
+
+CREATE_TABLE = (
+    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+    "version INTEGER PRIMARY KEY, description TEXT, applied_at TEXT)"
+)
+
+
+def applied_versions(engine):
+    with engine.begin() as conn:
+        conn.execute(text(CREATE_TABLE))
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def apply_migrations(engine, migrations):
+    """Run pending (version, description, fn(conn)) migrations in version order.
+
+    Returns the versions applied by this call.
+    """
+    done = applied_versions(engine)
+    applied = []
+    for version, description, migrate in sorted(migrations, key=lambda m: m[0]):
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {'v': version, 'd': description, 't': datetime.utcnow().isoformat()}
+            )
+        print(f"✅ Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
+
+
+def create_indexes(*indexes):
+    """Migration step creating model-declared indexes that do not exist yet"""
+    def migrate(conn):
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+    return migrate
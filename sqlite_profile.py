@@ -0,0 +1,86 @@
+# =========================
+# SQLITE STORAGE PROFILES
+# =========================
+# Per-connection PRAGMAs and pool settings for the Flask-SQLAlchemy engine.
+# 'production' turns on WAL so readers never block the writer, waits on a
+# busy database instead of failing with "database is locked", and relaxes
+# fsync to once per WAL checkpoint (synchronous=NORMAL is still crash-safe in
+# WAL mode). 'default' leaves SQLite's own settings alone. WAL is persistent
+# in the database file, so it is opt-in (SQLITE_PROFILE=production) rather
+# than applied to whatever database file the app happens to open.
+import os
+
+from sqlalchemy import event
+
+PROFILES = {
+    'default': {},
+    'production': {
+        'journal_mode': 'WAL',
+        'busy_timeout': 5000,          # ms
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,      # negative = KiB, i.e. 64 MB
+        'temp_store': 'MEMORY'
+    }
+}
+
+
+def is_file_sqlite(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') not in ('sqlite:', 'sqlite:/')
+
+
+def profile_pragmas(profile):
+    """PRAGMAs for a profile, each overridable with SQLITE_<NAME> (e.g. SQLITE_BUSY_TIMEOUT)"""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown SQLite profile '{profile}', expected one of {sorted(PROFILES)}")
+    pragmas = dict(PROFILES[profile])
+    for name in list(pragmas):
+        override = os.getenv(f'SQLITE_{name.upper()}')
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+
+def engine_options(uri, profile):
+    """SQLALCHEMY_ENGINE_OPTIONS for the profile (empty for non-file databases)"""
+    if not is_file_sqlite(uri) or profile == 'default':
+        return {}
+    busy_ms = int(profile_pragmas(profile).get('busy_timeout', 5000))
+    return {
+        # One connection per worker thread, checked out per request; WAL lets them read concurrently
+        'pool_size': int(os.getenv('SQLITE_POOL_SIZE', '10')),
+        'max_overflow': int(os.getenv('SQLITE_MAX_OVERFLOW', '20')),
+        'pool_timeout': int(os.getenv('SQLITE_POOL_TIMEOUT', '30')),
+        'connect_args': {'check_same_thread': False, 'timeout': busy_ms / 1000.0}
+    }
+
+
+def install(engine, profile):
+    """Apply the profile's PRAGMAs to every new DBAPI connection of engine"""
+    if engine.dialect.name != 'sqlite' or not is_file_sqlite(str(engine.url)):
+        return {}
+    pragmas = profile_pragmas(profile)
+    if not pragmas:
+        return {}
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+    return pragmas
+
+
+def current_settings(engine):
+    """Effective PRAGMA values on a pooled connection (for health checks and tests)"""
+    if engine.dialect.name != 'sqlite':
+        return {}
+    with engine.connect() as conn:
+        return {
+            name: conn.exec_driver_sql(f'PRAGMA {name}').scalar()
+            for name in ('journal_mode', 'busy_timeout', 'synchronous', 'mmap_size', 'cache_size', 'temp_store')
+        }
@@ -0,0 +1,137 @@
+# activity_log_test.py
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+import app
+from app import db, UserAction
+from activity_log import ActivityLog, ArchivingSink, DatabaseSink, MonthlySQLiteSink
+
+
+class SlowSink:
+    """Records batches; blocks writes until released"""
+
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+
+    def write(self, rows):
+        self.release.wait(5)
+        self.batches.append(list(rows))
+
+
+def test_login_is_logged_in_the_background_without_an_extra_commit(fresh_db):
+    client = app.app.test_client()
+    assert client.post('/api/register', json={'username': 'ann', 'email': 'ann@example.com',
+                                              'password': 'secret123'}).status_code == 201
+    commits = []
+
+    def on_commit(session):
+        commits.append(session)
+
+    event.listen(db.session, 'after_commit', on_commit)
+    try:
+        assert client.post('/api/login', json={'username': 'ann', 'password': 'secret123'}).status_code == 200
+    finally:
+        event.remove(db.session, 'after_commit', on_commit)
+    assert commits == []
+    assert app.activity_log.flush()
+    with app.app.app_context():
+        assert [a.action_type for a in UserAction.query.order_by(UserAction.action_id)] == ['register', 'login']
+        assert UserAction.query.filter_by(action_type='login').one().as_dict()['details'] == {'ip': '127.0.0.1'}
+
+
+def test_own_actions_are_readable_right_after_recording(fresh_db, monkeypatch):
+    with app.app.app_context():
+        sink = DatabaseSink(db.engine, UserAction.__table__)
+    log = ActivityLog(sink, flush_interval=30)  # would hold the rows for 30 s without a flush
+    monkeypatch.setattr(app, 'activity_log', log)
+    client = app.app.test_client()
+    user_id = client.post('/api/register', json={'username': 'bo', 'email': 'bo@example.com',
+                                                 'password': 'secret123'}).get_json()['user']['user_id']
+    assert client.post('/api/login', json={'username': 'bo', 'password': 'secret123'}).status_code == 200
+    assert log.pending(user_id)
+
+    actions = client.get(f'/api/user/{user_id}/actions').get_json()['actions']
+    assert [a['action_type'] for a in actions] == ['login', 'register']
+    assert not log.pending(user_id) and log.stats()['batches'] == 1
+
+
+def test_monthly_files_are_an_archive_behind_user_actions(tmp_path):
+    primary, archive = SlowSink(), MonthlySQLiteSink(str(tmp_path))
+    primary.release.set()
+    sink = ArchivingSink(primary, archive)
+    log = ActivityLog(sink, flush_interval=0)
+    log.record(3, 'login', created_at=datetime(2025, 3, 1))
+    assert log.flush()
+    assert [r['action_type'] for b in primary.batches for r in b] == ['login']
+    assert archive.partitions() == ['2025-03']
+    archive.close()
+
+    # A failing archive never loses or duplicates the primary rows
+    archive.write = lambda rows: 1 / 0
+    log.record(3, 'logout', created_at=datetime(2025, 3, 2))
+    assert log.flush()
+    assert [r['action_type'] for b in primary.batches for r in b] == ['login', 'logout']
+    assert sink.archive_errors == 1 and log.stats()['lost'] == 0
+
+
+def test_rows_are_written_in_batches():
+    sink = SlowSink()
+    sink.release.set()
+    log = ActivityLog(sink, batch_size=20, flush_interval=0.2)
+    for i in range(50):
+        log.record(1, 'water', details={'i': i})
+    assert log.flush()
+    assert [len(b) for b in sink.batches] == [20, 20, 10]
+    assert [r['details'] for b in sink.batches for r in b] == [f'{{"i": {i}}}' for i in range(50)]
+
+
+def test_details_are_always_stored_as_json():
+    sink = SlowSink()
+    sink.release.set()
+    log = ActivityLog(sink, flush_interval=0)
+    for details in (None, '{"ip": "10.0.0.1"}', 'watered "row 3"', ['a', 1], '42'):
+        log.record(1, 'note', details=details)
+    assert log.flush()
+    stored = [r['details'] for b in sink.batches for r in b]
+    assert stored == [None, '{"ip": "10.0.0.1"}', '"watered \\"row 3\\""', '["a", 1]', '42']
+    assert json.loads(stored[2]) == 'watered "row 3"'
+
+
+def test_full_queue_writes_inline_instead_of_dropping():
+    sink = SlowSink()
+    log = ActivityLog(sink, max_queue=3, batch_size=1, flush_interval=0)
+    log.record(1, 'water')
+    while log.stats()['queued']:
+        pass  # the writer has taken the first row and is blocked in write()
+    for _ in range(3):
+        log.record(1, 'water')
+    threading.Timer(0.1, sink.release.set).start()
+    log.record(1, 'water')  # queue full: written by the caller once the sink frees up
+    assert log.flush()
+    stats = log.stats()
+    assert stats['inline_writes'] == 1
+    assert stats['recorded'] == stats['written'] == 5 and stats['lost'] == 0
+
+
+def test_monthly_sink_partitions_by_created_at(tmp_path):
+    sink = MonthlySQLiteSink(str(tmp_path), fsync='always')
+    log = ActivityLog(sink, flush_interval=0.01)
+    log.record(7, 'login', details={'ip': '10.0.0.1'}, created_at=datetime(2025, 1, 31, 23, 59))
+    log.record(7, 'login', created_at=datetime(2025, 2, 1, 0, 1))
+    log.record(8, 'register', planting_id=None, details='{"username": "b"}', created_at=datetime(2025, 2, 3))
+    assert log.flush()
+    assert sink.partitions() == ['2025-01', '2025-02']
+    conn = sqlite3.connect(sink.path('2025-02'))
+    rows = conn.execute('SELECT user_id, action_type, details, created_at FROM user_actions ORDER BY action_id').fetchall()
+    assert rows == [(7, 'login', None, '2025-02-01 00:01:00.000000'),
+                    (8, 'register', '{"username": "b"}', '2025-02-03 00:00:00.000000')]
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    sink.close()
+    with pytest.raises(ValueError):
+        MonthlySQLiteSink(str(tmp_path), fsync='sometimes')
@@ -0,0 +1,109 @@
+# bulk_recommend_test.py
+from datetime import datetime, timedelta
+
+import pytest
+
+import app
+import bulk_recommend
+from app import db, User, UserCrop, ManualObservation, Recommendation, DecisionPattern, UserAction
+
+
+def seed(n_users=3, crops_per_user=4):
+    with app.app.app_context():
+        for u in range(n_users):
+            user = User(username=f'farmer{u}', email=f'farmer{u}@example.com', password_hash='x',
+                        location_lat=10.01 + u * 0.001, location_lon=76.3)  # same weather cell
+            db.session.add(user)
+            db.session.flush()
+            for c in range(crops_per_user):
+                crop = UserCrop(user_id=user.user_id, crop_type='Tomato',
+                                planting_date=datetime.now().date() - timedelta(days=30),
+                                current_growth_stage='vegetative', days_elapsed=30)
+                db.session.add(crop)
+                db.session.flush()
+                for d, pests in ((5, 'none'), (1, 'high')):
+                    db.session.add(ManualObservation(planting_id=crop.planting_id,
+                                                     observation_date=datetime.now().date() - timedelta(days=d),
+                                                     visual_health='good', pest_presence=pests))
+        db.session.commit()
+
+
+def test_bulk_job_and_resume(monkeypatch, fresh_db):
+    calls = []
+
+    def fake_weather(lat, lon):
+        calls.append((lat, lon))
+        return {'weather_category': 'sunny', 'temperature_category': 'optimal'}
+
+    monkeypatch.setattr(app.weather_service, 'get_weather', fake_weather)
+    seed()
+
+    stats = bulk_recommend.run_bulk_recommendations(chunk_size=5)
+    assert stats['plantings'] == 12
+    assert stats['chunks'] == 3
+    assert len(calls) == 1 and stats['weather_calls'] == 1  # one call for the shared cell per run
+
+    with app.app.app_context():
+        assert Recommendation.query.count() == 12
+        assert DecisionPattern.query.count() == 12
+        assert UserAction.query.filter_by(action_type='recommendation_generated').count() == 12
+        # Latest observation (high pests) drives the decision
+        assert {r.action_type for r in Recommendation.query.all()} == {'pesticide'}
+        assert bulk_recommend.load_checkpoint(datetime.now().date()) == 0  # a forced rerun starts fresh
+
+        # Simulate an interrupted run: checkpoint says 5 plantings are done
+        bulk_recommend.save_checkpoint(datetime.now().date(), 5)
+        db.session.commit()
+    stats = bulk_recommend.run_bulk_recommendations(chunk_size=5)
+    assert stats['resumed_after'] == 5
+    assert stats['plantings'] == 7
+
+
+def table_counts():
+    with app.app.app_context():
+        return (Recommendation.query.count(), DecisionPattern.query.count(), UserAction.query.count())
+
+
+def test_completed_run_is_not_repeated_the_same_day(monkeypatch, fresh_db):
+    monkeypatch.setattr(app.weather_service, 'get_weather',
+                        lambda lat, lon: {'weather_category': 'sunny', 'temperature_category': 'optimal'})
+    seed()
+    first = bulk_recommend.run_bulk_recommendations(chunk_size=5)
+    assert first['plantings'] == 12 and not first['already_completed']
+    counts = table_counts()
+
+    again = bulk_recommend.run_bulk_recommendations(chunk_size=5)
+    assert again['already_completed'] and again['plantings'] == 0 and again['last_id'] == 12
+    again = bulk_recommend.run_bulk_recommendations(chunk_size=5, resume=False)
+    assert again['already_completed']
+    assert table_counts() == counts
+
+    forced = bulk_recommend.run_bulk_recommendations(chunk_size=5, force=True)
+    assert forced['plantings'] == 12 and table_counts() == tuple(2 * c for c in counts)
+
+
+def test_crash_mid_run_resumes_without_duplicates(monkeypatch, fresh_db):
+    monkeypatch.setattr(app.weather_service, 'get_weather',
+                        lambda lat, lon: {'weather_category': 'sunny', 'temperature_category': 'optimal'})
+    seed()
+    real_save = bulk_recommend.save_checkpoint
+    chunks = []
+
+    def crash_on_second_chunk(run_date, last_planting_id, completed=False):
+        chunks.append(last_planting_id)
+        if len(chunks) == 2:
+            raise RuntimeError('killed')  # after the chunk's inserts, before its commit
+        real_save(run_date, last_planting_id, completed)
+
+    monkeypatch.setattr(bulk_recommend, 'save_checkpoint', crash_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        bulk_recommend.run_bulk_recommendations(chunk_size=5)
+    with app.app.app_context():
+        assert Recommendation.query.count() == 5  # second chunk rolled back with its checkpoint
+
+    monkeypatch.setattr(bulk_recommend, 'save_checkpoint', real_save)
+    stats = bulk_recommend.run_bulk_recommendations(chunk_size=5)
+    assert stats['resumed_after'] == 5 and stats['plantings'] == 7
+    with app.app.app_context():
+        assert Recommendation.query.count() == 12
+        assert len({r.planting_id for r in Recommendation.query.all()}) == 12
@@ -0,0 +1,178 @@
+# conftest.py
+# Point the Flask app at a throwaway SQLite file and keep model loading lazy
+# before any test module imports app.py, and share the database fixtures
+# (fresh_db, seed_user, seed_sync_user, count_queries) and the stub
+# weather API (stub) between test modules.
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+_db_dir = tempfile.mkdtemp(prefix='smart_crop_test_')
+os.environ.setdefault('DATABASE_URL', 'sqlite:///' + os.path.join(_db_dir, 'test.db'))
+os.environ.setdefault('MODEL_WARMUP', 'lazy')
+os.environ.setdefault('SQLITE_PROFILE', 'production')  # WAL on the throwaway database only
+
+def reset_database():
+    """Recreate every table in the test database and forget in-process state about old rows"""
+    import app
+    with app.app.app_context():
+        app.db.drop_all()
+        app.db.create_all()
+    app.notification_service.clear()
+
+
+@contextmanager
+def _count_queries():
+    import app
+    from sqlalchemy import event
+    counter = {'count': 0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter['count'] += 1
+
+    with app.app.app_context():
+        engine = app.db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _seed_user(n_crops):
+    import app
+    from app import db, User, CropMaster, UserCrop, Recommendation, Notification
+    reset_database()
+    with app.app.app_context():
+        db.session.add(CropMaster(crop_type='Tomato', total_growth_days=110))
+        user = User(username='dash', email='dash@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        today = datetime.now().date()
+        for i in range(n_crops):
+            crop = UserCrop(user_id=user.user_id, crop_type='Tomato' if i % 2 else 'Unknown',
+                            planting_date=today - timedelta(days=20), days_remaining=90)
+            db.session.add(crop)
+            db.session.flush()
+            for d, action, priority in ((3, 'monitor', 'low'), (2, 'irrigate', 'medium'), (1, 'pesticide', 'high')):
+                db.session.add(Recommendation(planting_id=crop.planting_id, recommendation_date=today - timedelta(days=d),
+                                              action_type=action, priority=priority))
+        db.session.add(Notification(user_id=user.user_id, title='hi', message='m', is_read=False))
+        db.session.commit()
+        app.crop_reference.reload()  # reference data is loaded once, not per request
+        app.notification_service.clear()
+        return user.user_id
+
+
+def _seed_sync_user():
+    import app
+    from app import db, User, UserCrop, ImageAnalysis
+    reset_database()
+    with app.app.app_context():
+        owner = User(username='sync', email='sync@example.com', password_hash='x')
+        other = User(username='other', email='other@example.com', password_hash='x')
+        db.session.add_all([owner, other])
+        db.session.flush()
+        mine = UserCrop(user_id=owner.user_id, crop_type='Tomato', planting_date=datetime.now().date())
+        theirs = UserCrop(user_id=other.user_id, crop_type='Rice', planting_date=datetime.now().date())
+        db.session.add_all([mine, theirs])
+        db.session.flush()
+        db.session.add(ImageAnalysis(planting_id=mine.planting_id, detected_disease='blight',
+                                     analysis_date=datetime(2025, 3, 1, 12, 0, 0)))
+        db.session.commit()
+        return owner.user_id, mine.planting_id, theirs.planting_id
+
+
+# app.py is imported lazily in the helpers above: the environment has to be
+# set before its first import.
+@pytest.fixture
+def fresh_db():
+    """Empty tables for the test"""
+    reset_database()
+
+
+@pytest.fixture
+def count_queries():
+    """with count_queries() as counter: ... -> counter['count'] SQL statements ran in the block"""
+    return _count_queries
+
+
+@pytest.fixture
+def seed_user():
+    """seed_user(n_crops) -> user_id of a fresh database holding one user with n_crops plantings"""
+    return _seed_user
+
+
+@pytest.fixture
+def seed_sync_user():
+    """seed_sync_user() -> (user_id, own planting_id, another user's planting_id) in a fresh database"""
+    return _seed_sync_user
+
+
+class StubWeatherAPI:
+    """Local stand-in for OpenWeatherMap counting requests per endpoint and concurrent requests"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fail = False
+        self.calls = {'weather': 0, 'forecast': 0}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                endpoint = self.path.split('?')[0].rsplit('/', 1)[-1]
+                with stub.lock:
+                    stub.calls[endpoint] = stub.calls.get(endpoint, 0) + 1
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.in_flight -= 1
+                if stub.fail:
+                    body, status = {'message': 'boom'}, 500
+                elif endpoint == 'weather':
+                    body, status = {'main': {'temp': 31.0, 'humidity': 40}, 'weather': [{'description': 'light rain'}],
+                                    'wind': {'speed': 3.0}}, 200
+                else:
+                    body, status = {'list': [{'dt': 1700000000 + i * 10800, 'main': {'temp': 20 + i, 'humidity': 50},
+                                              'weather': [{'description': 'clear sky'}]} for i in range(8)]}, 200
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}/data/2.5'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    """StubWeatherAPI on a local port, shut down after the test"""
+    server = StubWeatherAPI()
+    yield server
+    server.close()
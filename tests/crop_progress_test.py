@@ -0,0 +1,48 @@
+# crop_progress_test.py
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+import app
+from app import db, User, UserCrop
+
+
+def seed_crop():
+    with app.app.app_context():
+        user = User(username='poll', email='poll@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        crop = UserCrop(user_id=user.user_id, crop_type='Tomato',
+                        planting_date=datetime.now().date() - timedelta(days=20))
+        db.session.add(crop)
+        db.session.commit()
+        return crop.planting_id
+
+
+def test_progress_polling_only_writes_when_derived_fields_change(fresh_db):
+    planting_id = seed_crop()
+    statements = []
+    with app.app.app_context():
+        engine = db.engine
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0])
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        client = app.app.test_client()
+        first = client.get(f'/api/crop/{planting_id}/progress')
+        assert statements.count('UPDATE') == 1
+        assert statements[-1] == 'UPDATE'  # written after all reads
+
+        statements.clear()
+        for _ in range(3):
+            again = client.get(f'/api/crop/{planting_id}/progress')
+        assert 'UPDATE' not in statements
+        assert again.get_json() == first.get_json()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+    with app.app.app_context():
+        crop = db.session.get(UserCrop, planting_id)
+        assert crop.days_elapsed == 20
+        assert crop.growth_progress == first.get_json()['progress_percentage']
@@ -0,0 +1,117 @@
+# crop_reference_test.py
+import threading
+import time
+
+import pytest
+
+import app
+from app import db, CropMaster, GrowthMilestone
+from crop_reference import CropReferenceIndex
+
+
+def milestone(crop, stage, days, mult=1.0, **extra):
+    row = {'crop_type': crop, 'growth_stage': stage, 'days_from_planting': days,
+           'water_requirement_multiplier': mult, 'ideal_temp_min': 20, 'ideal_temp_max': 30, 'key_tasks': None}
+    row.update(extra)
+    return row
+
+
+def make_index():
+    crops = [{'crop_type': 'Tomato', 'total_growth_days': 110, 'water_need_l_per_week': 35}]
+    milestones = [milestone('Tomato', 'flowering', 50, 1.2), milestone('Tomato', 'seedling', 1, 0.7),
+                  milestone('Tomato', 'vegetative', 15), milestone('Tomato', 'mature', 90, 0.8)]
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return crops, milestones
+    return CropReferenceIndex(loader), loads
+
+
+def test_stage_lookup_matches_linear_scan():
+    index, _ = make_index()
+    ordered = sorted(index.milestones('Tomato'), key=lambda m: m['days_from_planting'])
+    for days in range(0, 130):
+        expected = 'seedling'
+        for m in ordered:
+            if days >= m['days_from_planting']:
+                expected = m['growth_stage']
+        assert index.stage('Tomato', days) == expected
+
+
+def test_default_stages_for_crops_without_milestones():
+    index, _ = make_index()
+    assert [index.stage('Rice', d) for d in (0, 14, 15, 49, 50, 89, 90, 400)] == \
+        ['seedling', 'seedling', 'vegetative', 'vegetative', 'flowering', 'flowering', 'mature', 'mature']
+
+
+def test_next_milestone_and_water_multiplier():
+    index, _ = make_index()
+    assert index.next_milestone('Tomato', 15)['growth_stage'] == 'flowering'
+    assert index.next_milestone('Tomato', 90) is None
+    assert index.next_milestone('Rice', 3) is None
+    assert index.water_multiplier('Tomato', 'flowering') == 1.2
+    assert index.water_multiplier('Tomato', 'unknown') == 1.0
+    assert index.total_growth_days('Rice', 100) == 100
+
+
+def test_loaded_once_until_invalidated():
+    index, loads = make_index()
+    for d in range(50):
+        index.stage('Tomato', d)
+    assert len(loads) == 1 and index.version == 1
+    index.invalidate()
+    index.crop('Tomato')
+    assert len(loads) == 2 and index.version == 2
+
+
+def test_failed_load_is_retried():
+    crops, milestones = make_index()[0].loader()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError('database is locked')
+        return crops, milestones
+    index = CropReferenceIndex(loader)
+    with pytest.raises(RuntimeError):
+        index.stage('Tomato', 60)
+    assert index.version == 0
+    assert index.stage('Tomato', 60) == 'flowering'
+    assert len(calls) == 2 and index.version == 1
+
+
+def test_concurrent_lookups_share_one_load():
+    crops, milestones = make_index()[0].loader()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)  # the other threads reach the stale check meanwhile
+        return crops, milestones
+    index = CropReferenceIndex(loader)
+    threads = [threading.Thread(target=index.stage, args=('Tomato', 60)) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and index.version == 1
+
+
+def test_app_helpers_do_not_query_and_reload_after_commit(count_queries, fresh_db):
+    app.initialize_database()
+    with app.app.app_context():
+        app.crop_reference.reload()
+        with count_queries() as counter:
+            assert app.determine_growth_stage(60, 'Tomato') == 'flowering'
+            assert app.get_next_milestone('Tomato', 60)['stage'] == 'mature'
+            assert app.calculate_water_amount('Tomato', 'flowering', {}) == round(35 * 1.2 * 0.15, 2)
+        assert counter['count'] == 0
+
+        version = app.crop_reference.version
+        db.session.add(CropMaster(crop_type='Okra', total_growth_days=60))
+        db.session.add(GrowthMilestone(crop_type='Okra', growth_stage='fruiting', days_from_planting=40))
+        db.session.commit()
+        assert app.determine_growth_stage(45, 'Okra') == 'fruiting'
+        assert app.crop_reference.version == version + 1
@@ -0,0 +1,50 @@
+# crop_status_batch_test.py
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+
+import app
+
+
+def test_batch_matches_scalar_helpers(fresh_db):
+    app.initialize_database()
+
+    rng = np.random.default_rng(3)
+    today = datetime.now().date()
+    n = 300
+    crops = [SimpleNamespace(
+        crop_type=rng.choice(['Tomato', 'Rice', 'Unknown', '']),
+        planting_date=today - timedelta(days=int(rng.integers(-5, 200))),
+        pest_pressure_level=rng.choice(['none', 'low', 'medium', 'high', None]),
+        disease_detected=bool(rng.random() < 0.3),
+        last_observation_date=None if rng.random() < 0.3 else today - timedelta(days=int(rng.integers(0, 20)))
+    ) for _ in range(n)]
+
+    with app.app.app_context():
+        status = app.compute_crop_status_batch(
+            [c.planting_date for c in crops], [c.crop_type for c in crops],
+            [c.pest_pressure_level for c in crops], [c.disease_detected for c in crops],
+            [c.last_observation_date for c in crops]
+        )
+        for i, c in enumerate(crops):
+            total = app.crop_reference.total_growth_days(c.crop_type, 120)
+            elapsed = max(0, (today - c.planting_date).days)
+            assert status['days_elapsed'][i] == elapsed
+            assert abs(status['progress'][i] - app.calculate_growth_progress(c.planting_date, total)) < 1e-9
+            assert status['stage'][i] == app.determine_growth_stage(elapsed, c.crop_type)
+            assert status['days_remaining'][i] == max(0, total - elapsed)
+            assert status['health_score'][i] == app.calculate_health_score(c)
+
+
+def test_batch_handles_missing_dates_and_overrides():
+    with app.app.app_context():
+        status = app.compute_crop_status_batch(
+            [None, datetime.now().date() - timedelta(days=30)], ['Tomato', 'Rice'], total_days=[None, 60]
+        )
+    assert status['progress'].tolist() == [0.0, 50.0]
+    assert status['days_remaining'].tolist() == [120, 30]
+    assert status['health_score'].tolist() == [100.0, 100.0]
+
+    empty = app.compute_crop_status_batch([], [])
+    assert all(len(v) == 0 for v in empty.values())
@@ -0,0 +1,91 @@
+# dashboard_cache_test.py
+from datetime import datetime
+
+import app
+from app import db, Notification, Recommendation, UserCrop
+from change_events import UserChangeTracker
+from dashboard_cache import DashboardCache
+
+
+def test_second_request_is_served_from_cache_and_revalidates(seed_user, count_queries):
+    user_id = seed_user(3)
+    client = app.app.test_client()
+    first = client.get(f'/api/user/{user_id}/dashboard')
+    assert first.status_code == 200
+    assert first.headers['X-Dashboard-Cache'] == 'miss'
+    etag = first.headers['ETag']
+
+    with count_queries() as counter:
+        second = client.get(f'/api/user/{user_id}/dashboard')
+        not_modified = client.get(f'/api/user/{user_id}/dashboard', headers={'If-None-Match': etag})
+    assert counter['count'] == 0
+    assert second.headers['X-Dashboard-Cache'] == 'hit'
+    assert second.get_json() == first.get_json()
+    assert not_modified.status_code == 304
+    assert not_modified.data == b''
+
+
+def test_commit_touching_user_rows_invalidates_snapshot(seed_user):
+    user_id = seed_user(2)
+    client = app.app.test_client()
+    etag = client.get(f'/api/user/{user_id}/dashboard').headers['ETag']
+
+    with app.app.app_context():
+        db.session.add(Notification(user_id=user_id, title='new', message='m', is_read=False,
+                                    created_at=datetime.utcnow()))
+        db.session.commit()
+    resp = client.get(f'/api/user/{user_id}/dashboard', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.headers['X-Dashboard-Cache'] == 'miss'
+    assert resp.get_json()['notifications'][0]['title'] == 'new'
+
+    # Recommendations only carry planting_id; ownership is resolved after commit
+    etag = resp.headers['ETag']
+    with app.app.app_context():
+        planting_id = UserCrop.query.filter_by(user_id=user_id).first().planting_id
+        db.session.add(Recommendation(planting_id=planting_id, action_type='harvest', priority='critical',
+                                      recommendation_date=datetime.now().date()))
+        db.session.commit()
+    resp = client.get(f'/api/user/{user_id}/dashboard', headers={'If-None-Match': etag})
+    assert resp.status_code == 200
+    assert resp.get_json()['pending_recommendations'][0]['action'] == 'harvest'
+
+
+def test_rollback_does_not_invalidate(seed_user):
+    user_id = seed_user(1)
+    client = app.app.test_client()
+    client.get(f'/api/user/{user_id}/dashboard')
+    with app.app.app_context():
+        db.session.add(Notification(user_id=user_id, title='discarded', message='m'))
+        db.session.flush()
+        db.session.rollback()
+    assert client.get(f'/api/user/{user_id}/dashboard').headers['X-Dashboard-Cache'] == 'hit'
+
+
+def test_snapshot_built_across_an_invalidation_is_not_stored():
+    cache = DashboardCache(ttl_seconds=60)
+    generation = cache.generation(7)
+    cache.invalidate(7)
+    cache.put(7, '{"stale": true}', generation)
+    assert cache.get(7) is None
+
+    etag = cache.put(7, '{"fresh": true}', cache.generation(7))
+    assert cache.get(7) == ('{"fresh": true}', etag)
+    cache.on_changes({None: {'recommendations'}})
+    assert cache.get(7) is None
+
+
+def test_planting_owner_cache_is_bounded():
+    lookups = []
+
+    def planting_owner(ids):
+        lookups.append(sorted(ids))
+        return {pid: pid * 10 for pid in ids}
+
+    tracker = UserChangeTracker([Recommendation], planting_owner, max_owners=2)
+    assert tracker._resolve([(None, 1, 'recommendations'), (None, 2, 'recommendations')]) == \
+        {10: {'recommendations'}, 20: {'recommendations'}}
+    tracker._resolve([(None, 3, 'recommendations'), (None, 2, 'recommendations')])
+    assert list(tracker._owner_cache) == [2, 3]
+    assert tracker._resolve([(None, 1, 'recommendations')]) == {10: {'recommendations'}}
+    assert lookups == [[1, 2], [3], [1]]
@@ -0,0 +1,27 @@
+# dashboard_test.py
+import app
+
+
+def test_dashboard_query_count_is_constant(seed_user, count_queries):
+    client = app.app.test_client()
+    counts = []
+    for n in (1, 10, 50):
+        user_id = seed_user(n)
+        with count_queries() as counter:
+            resp = client.get(f'/api/user/{user_id}/dashboard')
+        assert resp.status_code == 200
+        body = resp.get_json()
+        assert len(body['active_crops']) == n
+        counts.append(counter['count'])
+
+    assert counts[0] == counts[1] == counts[2]
+    assert counts[0] <= 4
+
+
+def test_dashboard_picks_latest_pending_recommendations(seed_user):
+    user_id = seed_user(2)
+    body = app.app.test_client().get(f'/api/user/{user_id}/dashboard').get_json()
+    assert [c['latest_action'] for c in body['active_crops']] == ['pesticide', 'pesticide']
+    assert len(body['pending_recommendations']) == 4
+    assert body['pending_recommendations'][0]['priority'] == 'high'
+    assert {r['action'] for r in body['pending_recommendations']} == {'pesticide', 'irrigate'}
@@ -0,0 +1,88 @@
+# decision_engine_batch_test.py
+import random
+import numpy as np
+
+import app
+from sklearn.svm import SVC
+from sklearn.preprocessing import StandardScaler
+
+
+def random_rows(n, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'visual_health': rng.randint(0, 3),
+        'pest_pressure': rng.randint(0, 3),
+        'growth_stage': rng.choice([0, 1, 2, 3, 'flowering', 'mature']),
+        'days_elapsed': rng.randint(0, 150),
+        'weather_forecast': rng.choice(['sunny', 'cloudy', 'rainy', 'storm']),
+        'temperature_category': rng.choice(['cold', 'cool', 'optimal', 'warm', 'hot'])
+    } for _ in range(n)]
+
+
+def make_engine():
+    engine = app.SmartCropDecisionEngine.__new__(app.SmartCropDecisionEngine)
+    engine.svm_model = None
+    engine.scaler = None
+    return engine
+
+
+def test_rule_based_batch_matches_loop():
+    engine = make_engine()
+    rows = random_rows(500)
+    actions, confidences, reasonings = engine.predict_action_batch(rows)
+    for row, a, c, r in zip(rows, actions, confidences, reasonings):
+        assert engine.rule_based_decision(row) == (a, c, r)
+
+
+def test_array_input_decodes_weather_codes():
+    engine = make_engine()
+    # columns: visual_health, pest_pressure, growth_stage, days_elapsed, weather, temperature
+    X = np.array([
+        [1, 3, 1, 20, 0, 2],   # high pest pressure
+        [1, 0, 1, 20, 0, 4],   # sunny + hot
+        [1, 0, 1, 20, 2, 2],   # rainy
+        [1, 0, 1, 20, 3, 2],   # storm -> default
+    ])
+    actions, _, _ = engine.predict_action_batch(X)
+    assert list(actions) == ['pesticide', 'irrigate', 'no_action', 'monitor']
+
+
+def test_svm_batch_uses_argmax_of_probabilities():
+    engine = make_engine()
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(0, 4, 200), rng.integers(0, 4, 200), rng.integers(0, 4, 200),
+                         rng.random(200), rng.integers(0, 4, 200), rng.integers(0, 5, 200)])
+    y = (X[:, 1] >= 2).astype(int) * 3  # pesticide when pest pressure is high
+    engine.scaler = StandardScaler().fit(X)
+    engine.svm_model = SVC(probability=True, random_state=0).fit(engine.scaler.transform(X), y)
+
+    rows = [dict(r, growth_stage=i % 4) for i, r in enumerate(random_rows(100, seed=1))]
+    actions, confidences, _ = engine.predict_action_batch(rows)
+    for row, action, confidence in zip(rows, actions, confidences):
+        _, single_confidence, _ = engine.predict_action(row)
+        assert np.isclose(confidence, single_confidence)
+        assert action in ('no_action', 'pesticide')
+
+
+def test_rows_the_model_rejects_fall_back_one_by_one():
+    engine = make_engine()
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.integers(0, 4, 200), rng.integers(0, 4, 200), rng.integers(0, 4, 200),
+                         rng.random(200), rng.integers(0, 4, 200), rng.integers(0, 5, 200)])
+    engine.scaler = StandardScaler().fit(X)
+    engine.svm_model = SVC(probability=True, random_state=0).fit(engine.scaler.transform(X),
+                                                                 (X[:, 1] >= 2).astype(int) * 3)
+
+    rows = [dict(r, growth_stage=i % 4) for i, r in enumerate(random_rows(8, seed=2))]
+    rows[1]['days_elapsed'] = None
+    rows[4]['pest_pressure'] = float('nan')
+    rows[6]['growth_stage'] = 'flowering'
+    actions, confidences, reasonings = engine.predict_action_batch(rows)
+    for i, row in enumerate(rows):
+        single = engine.predict_action(row)
+        if i in (1, 4, 6):
+            assert single == engine.rule_based_decision(row)
+            assert (actions[i], confidences[i], reasonings[i]) == single
+        else:
+            assert np.isclose(confidences[i], single[1]) and actions[i] in ('no_action', 'pesticide')
+            assert reasonings[i] == engine.generate_reasoning(actions[i], row, confidences[i])
@@ -0,0 +1,120 @@
+# image_preprocess_test.py
+import io
+import json
+import threading
+import tracemalloc
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import app
+import image_preprocess
+from image_preprocess import SHAPE, decode, open_image, preprocess, preprocess_batch
+
+
+def legacy_array(data):
+    """The pre-image_preprocess path: full decode, resize, float32 copy, divide"""
+    img = Image.open(io.BytesIO(data)).convert('RGB').resize((224, 224))
+    return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def encode(fmt, size=(640, 480), mode='RGB', seed=0):
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(size[1], size[0], len(mode)), dtype=np.uint8)
+    # smooth gradients survive JPEG scaling much like leaf photos do
+    pixels = (pixels // 4 + np.linspace(0, 190, size[0], dtype=np.uint8)[None, :, None]).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels if len(mode) > 1 else pixels[..., 0], mode).save(buf, fmt)
+    return buf.getvalue()
+
+
+def test_matches_legacy_preprocessing():
+    assert image_preprocess.SHARED_CANVAS
+    for data in (encode('PNG'), encode('PNG', mode='RGBA'), encode('PNG', mode='L'), encode('JPEG')):
+        arr = preprocess(io.BytesIO(data), draft=False)
+        assert arr.shape == SHAPE and arr.dtype == np.float32
+        assert np.array_equal(arr, legacy_array(data))
+
+
+def test_jpeg_draft_decodes_smaller_and_stays_close():
+    data = encode('JPEG', size=(1280, 960))
+    img = open_image(io.BytesIO(data))
+    assert img.size == (320, 240)  # 1/4 scale, still >= 224x224
+    arr = preprocess(img)
+    assert np.mean(np.abs(arr - legacy_array(data))) < 0.02
+    # Already loaded images are used as they are
+    loaded = Image.open(io.BytesIO(data))
+    loaded.load()
+    assert open_image(loaded).size == (1280, 960)
+
+
+def test_thread_buffers_are_reused_and_not_shared():
+    a, b = encode('PNG', seed=1), encode('PNG', seed=2)
+    first = preprocess(io.BytesIO(a))
+    second = preprocess(io.BytesIO(b))
+    assert second is first and np.array_equal(second, legacy_array(b))
+
+    other = {}
+    thread = threading.Thread(target=lambda: other.setdefault('arr', preprocess(io.BytesIO(a))))
+    thread.start()
+    thread.join()
+    assert other['arr'] is not first and np.array_equal(first, legacy_array(b))
+
+
+def test_batch_rows_and_steady_state_allocation():
+    images = [encode('PNG', seed=i) for i in range(3)]
+    batch = preprocess_batch([io.BytesIO(d) for d in images])
+    assert batch.shape == (3,) + SHAPE
+    for row, data in zip(batch, images):
+        assert np.array_equal(row, legacy_array(data))
+
+    # Past the file decoder's own read buffers, no full-size copy is allocated
+    decode(io.BytesIO(images[0]))  # this thread's buffers exist now
+    img = Image.open(io.BytesIO(images[1]))
+    img.load()
+    tracemalloc.start()
+    try:
+        preprocess(img, out=batch[0])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak < 64 * 1024  # numpy's casting buffer; the legacy float32 copy alone is 600 KB
+
+
+def test_predict_routes_use_preprocessed_images(monkeypatch):
+    class MeanModel:
+        name = 'fake'
+
+        def predict(self, batch):
+            means = batch.reshape(len(batch), -1).mean(axis=1)
+            return np.stack([means, 1 - means], axis=1)
+
+    class DirectBatcher:
+        def predict(self, arr):
+            return MeanModel().predict(arr[None])[0]
+
+    monkeypatch.setattr(app, 'get_crop_model', lambda wait=True: MeanModel())
+    monkeypatch.setattr(app, 'get_predict_batcher', lambda: DirectBatcher())
+    monkeypatch.setattr(app, 'prediction_cache', None)
+    client = app.app.test_client()
+    png, jpeg = encode('PNG', seed=3), encode('JPEG', seed=4)
+
+    resp = client.post('/api/predict', data={'image': (io.BytesIO(png), 'leaf.png')},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 200
+    assert resp.get_json()['raw'][0] == pytest.approx(float(legacy_array(png).mean()), abs=1e-5)
+    batch_means = {'a.png': legacy_array(png).mean(), 'c.jpg': preprocess(io.BytesIO(jpeg)).mean()}
+
+    resp = client.post('/api/predict/batch', content_type='multipart/form-data', data={
+        'images': [(io.BytesIO(png), 'a.png'), (io.BytesIO(b'not an image'), 'b.jpg'),
+                   (io.BytesIO(jpeg), 'c.jpg')]
+    })
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [(l['type'], l.get('file')) for l in lines] == \
+        [('error', 'b.jpg'), ('result', 'a.png'), ('result', 'c.jpg'), ('summary', None)]
+    for line in lines[1:3]:
+        scores = sorted(p['score'] for p in line['predictions'])
+        mean = float(batch_means[line['file']])
+        assert scores[0] == pytest.approx(min(mean, 1 - mean), abs=1e-5)
+    assert lines[-1]['succeeded'] == 2 and lines[-1]['failed'] == 1
@@ -0,0 +1,74 @@
+# inference_backend_test.py
+import os
+
+import numpy as np
+import pytest
+
+import inference_backends
+from inference_backends import artifact_path, load_backend
+from model_export import DEFAULT_H5, image_paths, load_image_batch, top_k_agreement
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fake_backend(name, fail=False):
+    class Fake:
+        def __init__(self, path, num_threads=None):
+            if fail:
+                raise ImportError(f'no {name} runtime')
+            self.name, self.path = name, path
+    return Fake
+
+
+def test_auto_picks_lightest_available_backend(tmp_path, monkeypatch):
+    h5 = str(tmp_path / 'cnn.h5')
+    monkeypatch.setattr(inference_backends, 'BACKEND_CLASSES',
+                        {'keras': fake_backend('keras'), 'tflite': fake_backend('tflite', fail=True),
+                         'onnx': fake_backend('onnx')})
+    with pytest.raises(RuntimeError, match='tflite: .*missing'):
+        load_backend('auto', h5)
+
+    open(h5, 'wb').close()
+    assert load_backend('auto', h5).name == 'keras'
+    open(artifact_path(h5, 'onnx'), 'wb').close()
+    assert load_backend('auto', h5).path == str(tmp_path / 'cnn.onnx')
+
+    # The TFLite artifact exists but its runtime does not import: fall through to ONNX
+    open(artifact_path(h5, 'tflite'), 'wb').close()
+    backend = load_backend('auto', h5)
+    assert backend.name == 'onnx' and backend.path == str(tmp_path / 'cnn.onnx')
+    with pytest.raises(RuntimeError, match='no tflite runtime'):
+        load_backend('tflite', h5)
+    with pytest.raises(ValueError):
+        load_backend('torch', h5)
+
+
+def test_top_k_agreement():
+    reference = np.array([[0.7, 0.2, 0.05, 0.05], [0.1, 0.2, 0.3, 0.4]])
+    same_order = np.array([[0.69, 0.21, 0.06, 0.04], [0.1, 0.2, 0.3, 0.4]])
+    swapped = np.array([[0.7, 0.05, 0.2, 0.05], [0.1, 0.2, 0.3, 0.4]])
+    assert top_k_agreement(reference, same_order)['top3_agreement'] == 1.0
+    result = top_k_agreement(reference, swapped)
+    assert result['top1_agreement'] == 1.0 and result['top3_agreement'] == 0.5
+    assert result['max_abs_diff'] == pytest.approx(0.15)
+
+
+def test_exported_backends_match_keras_on_test_images():
+    pytest.importorskip('tensorflow')
+    h5 = os.path.join(ROOT, DEFAULT_H5)
+    if not os.path.exists(h5):
+        pytest.skip(f'{DEFAULT_H5} not present')
+    batch = load_image_batch(image_paths(os.path.join(ROOT, 'test_images')))
+    reference = load_backend('keras', h5).predict(batch)
+    exported = [b for b in ('tflite', 'onnx') if os.path.exists(artifact_path(h5, b))]
+    if not exported:
+        pytest.skip('no exported artifacts; run model_export.py')
+    for name in exported:
+        try:
+            backend = load_backend(name, h5)
+        except RuntimeError as e:
+            pytest.skip(str(e))
+        parity = top_k_agreement(reference, backend.predict(batch))
+        assert parity['top3_agreement'] == 1.0, (name, parity)
+        # Batches of a different size reuse the same backend
+        assert np.allclose(backend.predict(batch[:1]), backend.predict(batch)[:1], atol=1e-5)
@@ -0,0 +1,100 @@
+# inference_batcher_test.py
+import threading
+import time
+import numpy as np
+import pytest
+
+from inference_batcher import BatcherStopped, InferenceBatcher
+
+
+def fake_model(batch):
+    """Pretend classifier: class score = mean pixel value of the image"""
+    means = batch.reshape(batch.shape[0], -1).mean(axis=1)
+    return np.stack([means, 1 - means], axis=1)
+
+
+def test_results_fan_out_to_callers():
+    batcher = InferenceBatcher(fake_model, max_batch_size=8, max_wait_ms=20)
+    images = [np.full((4, 4, 3), i / 10.0, dtype=np.float32) for i in range(8)]
+    results = [None] * len(images)
+
+    def worker(i):
+        results[i] = batcher.predict(images[i], timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(images))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    batcher.stop()
+
+    for i, row in enumerate(results):
+        assert np.allclose(row, [i / 10.0, 1 - i / 10.0])
+
+    stats = batcher.stats()
+    assert stats['requests'] == 8
+    assert stats['batches'] < 8  # at least some requests shared a forward pass
+    assert stats['latency']['inference']['count'] == stats['batches']
+
+
+def test_batch_size_is_capped():
+    calls = []
+
+    def recording_model(batch):
+        calls.append(len(batch))
+        time.sleep(0.01)
+        return fake_model(batch)
+
+    batcher = InferenceBatcher(recording_model, max_batch_size=3, max_wait_ms=50)
+    futures = [batcher.submit(np.zeros((2, 2, 3))) for _ in range(7)]
+    for f in futures:
+        f.result(timeout=5)
+    batcher.stop()
+
+    assert max(calls) <= 3
+    assert sum(calls) == 7
+
+
+def test_model_errors_are_propagated():
+    def broken_model(batch):
+        raise RuntimeError('boom')
+
+    batcher = InferenceBatcher(broken_model, max_batch_size=2, max_wait_ms=1)
+    future = batcher.submit(np.zeros((2, 2, 3)))
+    try:
+        future.result(timeout=5)
+        assert False, 'expected RuntimeError'
+    except RuntimeError:
+        pass
+    batcher.stop()
+    assert batcher.stats()['errors'] == 1
+
+
+def test_short_model_output_fails_every_future():
+    batcher = InferenceBatcher(lambda batch: fake_model(batch)[:1], max_batch_size=4, max_wait_ms=50)
+    futures = [batcher.submit(np.zeros((2, 2, 3))) for _ in range(3)]
+    for f in futures:
+        with pytest.raises(ValueError, match='rows'):
+            f.result(timeout=5)
+    # The worker survived and still serves well-formed batches
+    batcher.predict_fn = fake_model
+    assert np.allclose(batcher.predict(np.zeros((2, 2, 3)), timeout=5), [0, 1])
+    batcher.stop()
+
+
+def test_stop_fails_queued_requests():
+    release = threading.Event()
+
+    def slow_model(batch):
+        release.wait(5)
+        return fake_model(batch)
+
+    batcher = InferenceBatcher(slow_model, max_batch_size=1, max_wait_ms=0)
+    running = batcher.submit(np.zeros((2, 2, 3)))
+    time.sleep(0.05)  # the worker holds the first request
+    queued = batcher.submit(np.zeros((2, 2, 3)))
+    threading.Timer(0.1, release.set).start()  # finish the running batch only after stop() began
+    batcher.stop(timeout=5)
+    assert running.result(timeout=1) is not None
+    with pytest.raises(BatcherStopped):
+        queued.result(timeout=1)
@@ -0,0 +1,108 @@
+# model_quantize_test.py
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import inference_backends
+from inference_backends import TFLiteBackend, artifact_path, dequantize, load_backend, quantize
+from model_export import DEFAULT_H5, image_paths, load_image_batch, top_k_agreement
+from model_quantize import accuracy_report, calibration_split
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UINT8_INPUT = {'index': 0, 'shape': np.array([1, 2, 2, 3]), 'dtype': np.uint8, 'quantization': (1 / 255, 0)}
+UINT8_OUTPUT = {'index': 1, 'shape': np.array([1, 3]), 'dtype': np.uint8, 'quantization': (1 / 256, 0)}
+
+
+def make_dataset(root, counts):
+    for name, count in counts.items():
+        os.makedirs(root / name)
+        for i in range(count):
+            Image.new('RGB', (8, 8), (i, 0, 0)).save(root / name / f'{i}.jpg')
+
+
+def test_calibration_split_is_per_class_disjoint_and_seeded(tmp_path):
+    make_dataset(tmp_path, {'b_pest': 40, 'a_leaf': 20})
+    (tmp_path / 'notes.txt').write_text('not a class')
+    names, calibration, evaluation = calibration_split(str(tmp_path), 3, 4, seed=1)
+    assert names == ['a_leaf', 'b_pest']
+    assert sorted(label for _, label in calibration) == [0, 0, 0, 1, 1, 1]
+    # a_leaf's validation slice is 4 images, so only 1 is left after calibration
+    assert sorted(label for _, label in evaluation) == [0, 1, 1, 1, 1]
+    assert not {p for p, _ in calibration} & {p for p, _ in evaluation}
+    assert all(os.path.basename(os.path.dirname(p)) == names[label] for p, label in calibration + evaluation)
+    assert calibration_split(str(tmp_path), 3, 4, seed=1) == (names, calibration, evaluation)
+
+
+def test_calibration_split_only_uses_the_keras_validation_slice(tmp_path):
+    make_dataset(tmp_path, {'leaf': 25})
+    # flow_from_directory(subset='validation') with validation_split=0.2: first 5 sorted names
+    held_out = {str(tmp_path / 'leaf' / name) for name in sorted(os.listdir(tmp_path / 'leaf'))[:5]}
+    assert held_out == {str(tmp_path / 'leaf' / f'{i}.jpg') for i in (0, 1, 10, 11, 12)}
+    _, calibration, evaluation = calibration_split(str(tmp_path), 2, 30)
+    assert len(calibration) == 2 and len(evaluation) == 3
+    assert {p for p, _ in calibration + evaluation} == held_out
+    _, calibration, evaluation = calibration_split(str(tmp_path), 2, 30, validation_split=0.4)
+    assert len(calibration + evaluation) == 10
+
+
+def test_accuracy_report_per_class_delta():
+    labels = [0, 0, 0, 0, 1, 1]
+    float_pred = [0, 0, 0, 1, 1, 1]
+    int8_pred = [0, 0, 1, 1, 1, 0]
+    report = accuracy_report(labels, float_pred, int8_pred, ['leaf', 'pest', 'unused'])
+    assert report['per_class']['leaf'] == {'images': 4, 'float': 0.75, 'int8': 0.5, 'delta': -0.25}
+    assert report['per_class']['pest']['delta'] == pytest.approx(-0.5)
+    assert 'unused' not in report['per_class']
+    assert report['float'] == pytest.approx(5 / 6) and report['int8'] == pytest.approx(3 / 6)
+    assert report['agreement'] == pytest.approx(4 / 6)
+
+
+def test_quantize_round_trip():
+    batch = np.array([-0.1, 0.2, 1.0, 1.2], dtype=np.float32)
+    assert quantize(batch, UINT8_INPUT).tolist() == [0, 51, 255, 255]  # clipped to the uint8 range
+    float_input = dict(UINT8_INPUT, dtype=np.float32, quantization=(0.0, 0))
+    assert quantize(batch, float_input).tolist() == pytest.approx(batch.tolist())
+    assert dequantize(np.array([0, 128, 255], dtype=np.uint8), UINT8_OUTPUT).tolist() == \
+        pytest.approx([0.0, 0.5, 255 / 256])
+
+
+def test_tflite_backend_converts_quantized_tensors(monkeypatch):
+    class FakeInterpreter:
+        def __init__(self, model_path, num_threads=None):
+            self.input = dict(UINT8_INPUT)
+        def allocate_tensors(self):
+            pass
+        def get_input_details(self):
+            return [self.input]
+        def get_output_details(self):
+            return [UINT8_OUTPUT]
+        def resize_tensor_input(self, index, shape):
+            self.input['shape'] = np.array(shape)
+        def set_tensor(self, index, value):
+            assert value.dtype == np.uint8 and value.shape[0] == self.input['shape'][0]
+            self.value = value
+        def invoke(self):
+            pass
+        def get_tensor(self, index):
+            # mean pixel of each image as the first "probability"
+            first = self.value.reshape(len(self.value), -1).mean(axis=1).astype(np.uint8)
+            return np.stack([first, 255 - first, np.zeros_like(first)], axis=1)
+
+    monkeypatch.setattr(inference_backends, '_tflite_interpreter_class', lambda: FakeInterpreter)
+    backend = TFLiteBackend('model.int8.tflite')
+    probs = backend.predict(np.full((2, 2, 2, 3), 0.2, dtype=np.float32))  # quantized to 51
+    assert probs.dtype == np.float32 and probs.shape == (2, 3)
+    assert probs[:, 0] == pytest.approx([51 / 256, 51 / 256])
+
+
+def test_int8_model_keeps_top1_on_test_images():
+    pytest.importorskip('tensorflow')
+    h5 = os.path.join(ROOT, DEFAULT_H5)
+    if not os.path.exists(artifact_path(h5, 'tflite_int8')):
+        pytest.skip('no INT8 model; run model_quantize.py')
+    batch = load_image_batch(image_paths(os.path.join(ROOT, 'test_images')))
+    reference = load_backend('keras', h5).predict(batch)
+    parity = top_k_agreement(reference, load_backend('tflite_int8', h5).predict(batch))
+    assert parity['top1_agreement'] == 1.0, parity
@@ -0,0 +1,63 @@
+# model_registry_test.py
+import threading
+import time
+
+from model_registry import ModelRegistry, READY, FAILED, REGISTERED
+
+
+def test_loads_once_on_first_use():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return 'model'
+
+    registry = ModelRegistry()
+    registry.register('svm', loader)
+    assert registry.state('svm') == REGISTERED
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('svm'))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ['model'] * 5
+    assert len(calls) == 1
+    assert registry.state('svm') == READY
+
+
+def test_failed_loader_reports_state():
+    def loader():
+        raise FileNotFoundError('missing.h5')
+
+    registry = ModelRegistry()
+    registry.register('cnn', loader)
+    assert registry.get('cnn') is None
+    status = registry.status()['cnn']
+    assert status['state'] == FAILED
+    assert 'missing.h5' in status['error']
+
+
+def test_background_warm_up_does_not_block():
+    release = threading.Event()
+    registry = ModelRegistry()
+    registry.register('slow', lambda: release.wait(5) and 'ready')
+
+    thread = registry.warm_up()
+    assert registry.get('slow', wait=False) is None
+    release.set()
+    thread.join(5)
+    assert registry.get('slow') == 'ready'
+
+
+def test_reload_loads_again_on_next_get():
+    versions = iter(['v1', 'v2'])
+    registry = ModelRegistry()
+    registry.register('cnn', lambda: next(versions))
+    assert registry.get('cnn') == 'v1'
+    registry.reload('cnn')
+    assert registry.state('cnn') == REGISTERED
+    assert registry.get('cnn') == 'v2'
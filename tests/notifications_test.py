@@ -0,0 +1,174 @@
+# notifications_test.py
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.exc import OperationalError
+
+import app
+from app import db, Notification, UserCrop, notification_service
+from notifications import NotificationService, local_midnight_utc
+
+
+def test_observation_alert_goes_through_outbox_and_counter(seed_user, count_queries):
+    user_id = seed_user(1)  # one unread notification already stored
+    client = app.app.test_client()
+    assert client.get(f'/api/user/{user_id}/notifications/unread-count').get_json()['unread_count'] == 1
+
+    with app.app.app_context():
+        planting_id = UserCrop.query.filter_by(user_id=user_id).first().planting_id
+    for _ in range(3):
+        resp = client.post(f'/api/crop/{planting_id}/observation', json={'pest_presence': 'high'})
+        assert resp.status_code == 200
+    assert notification_service.flush()
+
+    with count_queries() as counter:
+        count = client.get(f'/api/user/{user_id}/notifications/unread-count').get_json()['unread_count']
+    assert count == 4 and counter['count'] == 0
+    body = client.get(f'/api/user/{user_id}/notifications').get_json()
+    assert [n['title'] for n in body['notifications']][:3] == ['Crop Issue Detected'] * 3
+    dashboard = client.get(f'/api/user/{user_id}/dashboard').get_json()
+    assert dashboard['summary']['unread_notifications'] == 4
+
+    ids = [n['id'] for n in body['notifications'][:2]]
+    with count_queries() as counter:
+        marked = client.post(f'/api/user/{user_id}/notifications/read', json={'ids': ids}).get_json()
+    assert marked == {'success': True, 'marked': 2, 'unread_count': 2}
+    assert counter['count'] == 1  # the UPDATE only
+    # The dashboard snapshot was dropped by the mark-as-read
+    assert client.get(f'/api/user/{user_id}/dashboard').get_json()['summary']['unread_notifications'] == 2
+
+    assert client.post(f'/api/user/{user_id}/notifications/read', json={'all': True}).get_json()['marked'] == 2
+    assert client.post(f'/api/user/{user_id}/notifications/read', json={'ids': 'x'}).status_code == 400
+    with app.app.app_context():
+        assert Notification.query.filter_by(user_id=user_id, is_read=False).count() == 0
+
+
+def test_scheduled_notification_is_delivered_when_due(seed_user):
+    user_id = seed_user(1)
+    client = app.app.test_client()
+    assert notification_service.unread_count(user_id) == 1
+    delivered = []
+    notification_service.subscribe(delivered.append)
+    try:
+        notification_service.notify(user_id, 'reminder', 'Later', 'due soon',
+                                    scheduled_for=datetime.utcnow() + timedelta(seconds=0.5))
+        assert notification_service.flush()
+        delivered.clear()
+        body = client.get(f'/api/user/{user_id}/notifications').get_json()
+        assert body['unread_count'] == 1 and [n['title'] for n in body['notifications']] == ['hi']
+        # Not yet due: mark-all leaves it alone
+        assert notification_service.mark_read(user_id) == 1
+        delivered.clear()
+
+        deadline = time.time() + 5
+        while not delivered and time.time() < deadline:
+            time.sleep(0.02)
+        assert delivered == [{user_id: {'notifications'}}]
+        body = client.get(f'/api/user/{user_id}/notifications').get_json()
+        assert body['unread_count'] == 1 and body['notifications'][0]['title'] == 'Later'
+    finally:
+        notification_service._subscribers.remove(delivered.append)
+
+
+def test_orm_writes_invalidate_the_counter(seed_user):
+    user_id = seed_user(1)
+    assert notification_service.unread_count(user_id) == 1
+    with app.app.app_context():
+        db.session.add(Notification(user_id=user_id, title='direct', message='m', is_read=False))
+        db.session.commit()
+    assert notification_service.unread_count(user_id) == 2
+    assert notification_service.stats()['count_loads'] >= 2
+
+
+def test_counts_written_by_another_worker_show_up_after_the_ttl(seed_user, monkeypatch):
+    user_id = seed_user(1)
+    assert notification_service.unread_count(user_id) == 1
+    # Another process inserts directly; this process's tracker never hears of it
+    with app.app.app_context(), db.engine.begin() as conn:
+        conn.execute(Notification.__table__.insert(), [{'user_id': user_id, 'title': 'elsewhere', 'message': 'm',
+                                                        'is_read': False, 'created_at': datetime.utcnow()}])
+    assert notification_service.unread_count(user_id) == 1
+    monkeypatch.setattr(notification_service, 'count_ttl', 0)
+    time.sleep(0.01)
+    assert notification_service.unread_count(user_id) == 2
+
+
+class FlakyEngine:
+    """Delegates to a real engine; the first `failures` begin() calls raise"""
+
+    def __init__(self, engine, failures):
+        self.engine = engine
+        self.failures = failures
+
+    def begin(self):
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError('INSERT', {}, Exception('database is locked'))
+        return self.engine.begin()
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+def test_failed_inserts_are_retried_then_requeued(seed_user):
+    user_id = seed_user(1)
+    with app.app.app_context():
+        engine = db.engine
+    service = NotificationService(FlakyEngine(engine, failures=4), Notification.__table__,
+                                  flush_interval=0, insert_attempts=3, retry_delay=0.01)
+    service.notify(user_id, 'alert', 'flaky', 'm')
+    assert service.flush()
+    stats = service.stats()
+    assert stats['insert_errors'] == 4 and stats['requeued'] == 1 and stats['lost'] == 0
+    assert stats['inserted'] == 1
+    with app.app.app_context():
+        assert Notification.query.filter_by(title='flaky').count() == 1
+
+
+class SlowWriteEngine:
+    """Delegates to a real engine; the first begin() waits until release is set"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def begin(self):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        return self.engine.begin()
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+def test_reads_do_not_wait_for_a_slow_write(seed_user):
+    user_id = seed_user(1)
+    with app.app.app_context():
+        engine = SlowWriteEngine(db.engine)
+    service = NotificationService(engine, Notification.__table__, flush_interval=0)
+    service.notify(user_id, 'alert', 'slow', 'm')
+    assert engine.entered.wait(5)
+    try:
+        assert service.unread_count(user_id) == 1
+        rows, count = service.recent_unread(user_id)
+        assert count == 1 and [r.title for r in rows] == ['hi']
+        # Loaded while the user's insert was running, so not kept
+        assert service.stats()['users_with_counts'] == 0
+    finally:
+        engine.release.set()
+    assert service.flush()
+    assert service.unread_count(user_id) == 2
+    assert service.unread_count(user_id) == 2 and service.stats()['count_loads'] == 3
+
+
+def test_harvest_reminder_is_scheduled_at_local_midnight_in_utc(monkeypatch):
+    monkeypatch.setenv('TZ', 'Asia/Kolkata')
+    time.tzset()
+    try:
+        assert local_midnight_utc(date(2025, 5, 1)) == datetime(2025, 4, 30, 18, 30)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,126 @@
+# predict_batch_test.py
+import io
+import json
+import zipfile
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import app
+
+
+class MeanModel:
+    """Pretend classifier: class 0 score = mean pixel value"""
+    name = 'fake'
+
+    def predict(self, batch):
+        means = batch.reshape(len(batch), -1).mean(axis=1)
+        return np.stack([means, 1 - means], axis=1)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, 'get_crop_model', lambda wait=True: MeanModel())
+    monkeypatch.setattr(app, 'PREDICT_BATCH_CHUNK', 2)
+    return app.app.test_client()
+
+
+def png(shade):
+    buf = io.BytesIO()
+    Image.new('RGB', (32, 32), (shade, shade, shade)).save(buf, 'PNG')
+    return buf.getvalue()
+
+
+def make_zip(entries):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+def post(client, **files):
+    resp = client.post('/api/predict/batch', data=files, content_type='multipart/form-data')
+    if resp.mimetype == 'application/x-ndjson':
+        return resp.status_code, [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    return resp.status_code, resp.get_json()
+
+
+def test_multipart_and_zip_are_classified_across_chunks(client):
+    archive = make_zip([('leaves/', b''), ('leaves/c.png', png(200)), ('notes.txt', b'skip me')])
+    status, lines = post(client, images=[(io.BytesIO(png(0)), 'a.png'), (io.BytesIO(png(255)), 'b.png')],
+                         archive=(archive, 'batch.zip'))
+    assert status == 200
+    results = {l['file']: l['predictions'][0] for l in lines if l['type'] == 'result'}
+    assert set(results) == {'a.png', 'b.png', 'leaves/c.png'}
+    assert results['b.png']['score'] == pytest.approx(1.0)
+    assert lines[-1] == dict(lines[-1], type='summary', total=3, succeeded=3, failed=0)
+
+
+def test_corrupt_files_are_reported_per_file(client):
+    status, lines = post(client, images=[(io.BytesIO(b'not an image'), 'bad.jpg'),
+                                         (io.BytesIO(png(10)), 'ok.png')])
+    assert status == 200
+    assert [(l['type'], l.get('file')) for l in lines] == \
+        [('error', 'bad.jpg'), ('result', 'ok.png'), ('summary', None)]
+
+    status, body = post(client, archive=(io.BytesIO(b'PK not really a zip'), 'broken.zip'))
+    assert status == 400 and body['error'] == 'Invalid zip archive'
+    status, body = post(client, images=[])
+    assert status == 400
+
+
+def test_file_count_cap_applies_to_zip_and_multipart(client, monkeypatch):
+    monkeypatch.setattr(app, 'PREDICT_BATCH_MAX_FILES', 2)
+    archive = make_zip([(f'{i}.png', png(i)) for i in range(3)])
+    status, body = post(client, archive=(archive, 'many.zip'))
+    assert status == 413 and 'Too many files' in body['error']
+    status, body = post(client, images=[(io.BytesIO(png(i)), f'{i}.png') for i in range(3)])
+    assert status == 413
+    archive = make_zip([('b.png', png(2)), ('c.png', png(3))])
+    status, body = post(client, images=[(io.BytesIO(png(1)), 'a.png')], archive=(archive, 'z.zip'))
+    assert status == 413
+
+
+def test_size_caps_reject_zip_bombs_before_inflating(client, monkeypatch):
+    monkeypatch.setattr(app, 'PREDICT_BATCH_MAX_FILE_BYTES', 64 * 1024)
+    bomb = make_zip([('huge.png', b'\0' * (1024 * 1024))])  # ~1 KB compressed
+    assert len(bomb.getvalue()) < 4096
+    reads = []
+    monkeypatch.setattr(zipfile.ZipFile, 'read', lambda self, name, pwd=None: reads.append(name))
+    status, body = post(client, archive=(bomb, 'bomb.zip'))
+    assert status == 413 and 'huge.png' in body['error'] and reads == []
+
+    status, body = post(client, images=[(io.BytesIO(b'\0' * (65 * 1024)), 'big.png')])
+    assert status == 413 and 'big.png' in body['error']
+
+    monkeypatch.setattr(app, 'PREDICT_BATCH_MAX_TOTAL_BYTES', 100 * 1024)
+    many = make_zip([(f'{i}.png', b'\0' * (60 * 1024)) for i in range(2)])
+    status, body = post(client, archive=(many, 'many.zip'))
+    assert status == 413 and 'expands' in body['error']
+
+
+def test_stats_do_not_need_a_loaded_model(monkeypatch):
+    monkeypatch.setattr(app, 'predict_batcher', None)
+    monkeypatch.setattr(app, 'get_crop_model', lambda wait=True: pytest.fail('stats must not load the model'))
+    resp = app.app.test_client().get('/api/predict/stats')
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body['model'] == app.model_registry.state('crop_cnn') and 'cache' in body
+
+
+def test_prediction_cache_follows_the_loaded_backend(tmp_path, monkeypatch):
+    served = tmp_path / 'cnn.onnx'
+    served.write_bytes(b'weights')
+
+    class Backend(MeanModel):
+        name, path = 'onnx', str(served)
+
+    monkeypatch.setattr(app, 'load_backend', lambda *args, **kwargs: Backend())
+    cache = app.create_prediction_cache(on_model_change=app.reload_crop_model)
+    monkeypatch.setattr(app, 'prediction_cache', cache)
+    assert cache.version is None
+    app.initialize_crop_model()
+    assert cache.stats()['model_path'] == str(served) and cache.version is not None
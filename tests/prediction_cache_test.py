@@ -0,0 +1,129 @@
+# prediction_cache_test.py
+import os
+import time
+import tempfile
+from PIL import Image
+
+from prediction_cache import (PredictionCache, MemoryCacheBackend, SQLiteCacheBackend,
+                              perceptual_hash, hamming_distance)
+
+RESULT = {'predictions': [{'label': 'Tomato_healthy', 'score': 0.9}], 'raw': [0.9, 0.1]}
+
+
+def make_model_file(directory):
+    path = os.path.join(directory, 'model.h5')
+    with open(path, 'wb') as f:
+        f.write(b'v1')
+    return path
+
+
+def check_backend(backend, model_path):
+    cache = PredictionCache(backend, model_path, ttl_seconds=60, max_mb=1)
+    image = b'fake image bytes'
+
+    assert cache.get(image) is None
+    cache.put(image, RESULT, phash=0x0F0F0F0F0F0F0F0F)
+    assert cache.get(image) == RESULT
+
+    # Near-duplicate: 2 bits different
+    assert cache.get_similar(0x0F0F0F0F0F0F0F0C) == RESULT
+    # Too far away
+    assert cache.get_similar(0xF0F0F0F0F0F0F0F0) is None
+
+    stats = cache.stats()
+    assert stats['exact_hits'] == 1 and stats['phash_hits'] == 1 and stats['misses'] == 1
+
+    # Replacing the model file invalidates everything
+    time.sleep(0.01)
+    with open(model_path, 'wb') as f:
+        f.write(b'version two')
+    assert cache.get(image) is None
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_memory_backend():
+    with tempfile.TemporaryDirectory() as d:
+        check_backend(MemoryCacheBackend(), make_model_file(d))
+
+
+def test_sqlite_backend():
+    with tempfile.TemporaryDirectory() as d:
+        check_backend(SQLiteCacheBackend(os.path.join(d, 'cache.db')), make_model_file(d))
+
+
+def test_lru_size_bound():
+    with tempfile.TemporaryDirectory() as d:
+        cache = PredictionCache(MemoryCacheBackend(), make_model_file(d), max_mb=0.001)  # ~1 KB
+        for i in range(50):
+            cache.put(f'image {i}'.encode(), RESULT)
+        assert cache.stats()['bytes'] <= 1100
+        assert cache.stats()['evictions'] > 0
+        assert cache.get(b'image 49') == RESULT
+        assert cache.get(b'image 0') is None
+
+
+def test_perceptual_hash_survives_resize():
+    img = Image.open(os.path.join('test_images', 'test_image.jpg'))
+    smaller = img.resize((img.width // 2, img.height // 2))
+    assert hamming_distance(perceptual_hash(img), perceptual_hash(smaller)) <= 3
+
+
+def test_model_change_triggers_reload_and_drops_stale_results():
+    with tempfile.TemporaryDirectory() as d:
+        model_path = make_model_file(d)
+        reloads = []
+        cache = PredictionCache(MemoryCacheBackend(), model_path, on_model_change=lambda: reloads.append(1))
+        assert cache.get(b'img') is None
+        version = cache.version  # a request reads the version, then predicts with the old model...
+
+        time.sleep(0.01)
+        with open(model_path, 'wb') as f:
+            f.write(b'version two')
+        assert cache.get(b'other') is None and reloads == [1]
+        cache.put(b'img', RESULT, version=version)  # ...and finishes after the change
+        assert cache.get(b'img') is None
+        assert cache.stats()['stale_puts'] == 1
+        cache.put(b'img', RESULT, version=cache.version)
+        assert cache.get(b'img') == RESULT and reloads == [1]
+
+
+def test_sqlite_similar_lookup_ignores_other_model_versions():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'cache.db')
+        old_model = make_model_file(d)
+        new_model = os.path.join(d, 'new.h5')
+        with open(new_model, 'wb') as f:
+            f.write(b'new weights')
+        new_worker = PredictionCache(SQLiteCacheBackend(path), new_model)
+        # A worker that has not seen the new file yet stores an old-model result in the shared table
+        old_worker = PredictionCache(SQLiteCacheBackend(path), old_model)
+        new_worker.backend.set_model_version(new_worker.version)
+        old_worker.put(b'img', RESULT, phash=0xFF)
+        assert old_worker.get_similar(0xFF) == RESULT
+        assert new_worker.get_similar(0xFF) is None
+
+
+def test_unbound_cache_is_disabled_until_the_served_file_is_bound():
+    with tempfile.TemporaryDirectory() as d:
+        h5 = make_model_file(d)
+        onnx = os.path.join(d, 'model.onnx')
+        with open(onnx, 'wb') as f:
+            f.write(b'exported')
+        reloads = []
+        cache = PredictionCache(MemoryCacheBackend(), None, on_model_change=lambda: reloads.append(1))
+        cache.put(b'img', RESULT)
+        assert cache.get(b'img') is None and cache.version is None
+
+        cache.bind_model(onnx)  # the loaded backend serves the ONNX export, not the H5
+        cache.put(b'img', RESULT)
+        assert cache.get(b'img') == RESULT
+
+        time.sleep(0.01)
+        with open(h5, 'wb') as f:
+            f.write(b'retrained')
+        assert cache.get(b'img') == RESULT  # only the served file matters
+        with open(onnx, 'wb') as f:
+            f.write(b're-exported')
+        assert cache.get(b'img') is None and reloads == [1]
+        cache.bind_model(onnx)  # the reloaded backend binds the same file: no second reload
+        assert reloads == [1] and cache.stats()['model_path'] == onnx
@@ -0,0 +1,75 @@
+# schema_migrations_test.py
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import inspect, text
+
+import app
+from app import db, ManualObservation, Recommendation, UserAction, ImageAnalysis, Notification, UserCrop
+from schema_migrations import apply_migrations
+
+HOT_INDEXES = [
+    'ix_manual_observations_planting_date', 'ix_recommendations_planting_implemented_date',
+    'ix_user_actions_user_created', 'ix_image_analyses_planting_date',
+    'ix_notifications_user_read_created', 'ix_user_crops_user_active'
+]
+
+
+def index_names(conn):
+    inspector = inspect(conn)
+    return {ix['name'] for table in inspector.get_table_names() for ix in inspector.get_indexes(table)}
+
+
+def test_migration_adds_indexes_to_existing_database_once(fresh_db):
+    with app.app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP TABLE IF EXISTS schema_migrations'))
+            for name in HOT_INDEXES:  # an old database created before the indexes existed
+                conn.execute(text(f'DROP INDEX {name}'))
+            assert not set(HOT_INDEXES) & index_names(conn)
+
+        assert apply_migrations(db.engine, app.MIGRATIONS) == [1]
+        with db.engine.connect() as conn:
+            assert set(HOT_INDEXES) <= index_names(conn)
+        assert apply_migrations(db.engine, app.MIGRATIONS) == []
+
+
+def hot_queries():
+    since = datetime(2024, 1, 1)
+    return {
+        'ix_manual_observations_planting_date': ManualObservation.query.filter_by(planting_id=1)
+            .order_by(ManualObservation.observation_date.desc()).limit(1),
+        'ix_recommendations_planting_implemented_date': Recommendation.query.filter_by(planting_id=1, implemented=False)
+            .order_by(Recommendation.recommendation_date.desc()),
+        'ix_user_actions_user_created': UserAction.query.filter_by(user_id=1).filter(UserAction.created_at >= since)
+            .order_by(UserAction.created_at.desc()).limit(100),
+        'ix_image_analyses_planting_date': ImageAnalysis.query.filter_by(planting_id=1)
+            .filter(ImageAnalysis.analysis_date.between(since, since + timedelta(seconds=10))),
+        'ix_notifications_user_read_created': Notification.query.filter_by(user_id=1, is_read=False)
+            .order_by(Notification.created_at.desc()).limit(10),
+        'ix_user_crops_user_active': UserCrop.query.filter_by(user_id=1, is_active=True),
+    }
+
+
+@pytest.mark.parametrize('index_name', HOT_INDEXES)
+def test_hot_query_uses_index(index_name, fresh_db):
+    with app.app.app_context():
+        app.initialize_database()
+        query = hot_queries()[index_name]
+        sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+        with db.engine.connect() as conn:
+            plan = ' | '.join(row[-1] for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql)))
+    assert index_name in plan, plan
+    assert 'USE TEMP B-TREE' not in plan, plan
+
+
+def test_init_db_command_applies_migrations(fresh_db):
+    with app.app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text('DROP TABLE IF EXISTS schema_migrations'))
+            conn.execute(text(f'DROP INDEX {HOT_INDEXES[0]}'))
+    result = app.app.test_cli_runner().invoke(args=['init-db'])
+    assert result.exit_code == 0, result.output
+    with app.app.app_context(), db.engine.connect() as conn:
+        assert set(HOT_INDEXES) <= index_names(conn)
+        assert conn.execute(text('SELECT version FROM schema_migrations')).scalars().all() == [1]
@@ -0,0 +1,38 @@
+# sqlite_profile_test.py
+import os
+import tempfile
+
+import pytest
+from sqlalchemy import create_engine
+
+import app
+import sqlite_profile
+
+
+def test_app_engine_uses_production_pragmas():
+    with app.app.app_context():
+        settings = sqlite_profile.current_settings(app.db.engine)
+    assert settings['journal_mode'] == 'wal'
+    assert settings['busy_timeout'] == 5000
+    assert settings['synchronous'] == 1  # NORMAL
+    assert settings['cache_size'] == -65536
+
+
+def test_default_profile_and_memory_databases_are_left_alone():
+    assert sqlite_profile.engine_options('sqlite:///:memory:', 'production') == {}
+    assert sqlite_profile.engine_options('sqlite://', 'production') == {}
+    assert sqlite_profile.engine_options('sqlite:///x.db', 'default') == {}
+    assert sqlite_profile.engine_options('sqlite:///x.db', 'production')['pool_size'] == 10
+
+    engine = create_engine('sqlite:///' + os.path.join(tempfile.mkdtemp(), 'plain.db'))
+    assert sqlite_profile.install(engine, 'default') == {}
+    assert sqlite_profile.current_settings(engine)['journal_mode'] == 'delete'
+
+
+def test_env_overrides_and_unknown_profile(monkeypatch):
+    monkeypatch.setenv('SQLITE_BUSY_TIMEOUT', '250')
+    engine = create_engine('sqlite:///' + os.path.join(tempfile.mkdtemp(), 'tuned.db'))
+    sqlite_profile.install(engine, 'production')
+    assert sqlite_profile.current_settings(engine)['busy_timeout'] == 250
+    with pytest.raises(ValueError):
+        sqlite_profile.profile_pragmas('turbo')
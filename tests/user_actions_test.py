@@ -0,0 +1,76 @@
+# user_actions_test.py
+import json
+from datetime import datetime, timedelta
+
+import app
+from app import db, User, UserAction
+
+
+def seed_actions(n=25):
+    """n actions for one user, in pairs sharing a created_at so ties need the action_id tiebreak"""
+    with app.app.app_context():
+        user = User(username='history', email='history@example.com', password_hash='x')
+        other = User(username='other', email='other@example.com', password_hash='x')
+        db.session.add_all([user, other])
+        db.session.flush()
+        start = datetime(2025, 3, 1)
+        for i in range(n):
+            db.session.add(UserAction(user_id=user.user_id, action_type='water',
+                                      details=json.dumps({'i': i, 'note': 'ünïcode "quoted"'}),
+                                      created_at=start + timedelta(minutes=i // 2)))
+        db.session.add(UserAction(user_id=other.user_id, action_type='login', created_at=start))
+        db.session.add(UserAction(user_id=user.user_id, action_type='login', details=None, created_at=start - timedelta(days=1)))
+        db.session.commit()
+        return user.user_id
+
+
+def test_keyset_pages_cover_every_action_once_newest_first(fresh_db):
+    user_id = seed_actions()
+    client = app.app.test_client()
+    seen, cursor, pages = [], None, 0
+    while True:
+        url = f'/api/user/{user_id}/actions?limit=4' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url).get_json()
+        pages += 1
+        seen.extend(body['actions'])
+        cursor = body['next_cursor']
+        assert body['has_more'] is (cursor is not None)
+        if not cursor:
+            break
+    assert pages == 7 and len(seen) == 26
+    assert len({a['action_id'] for a in seen}) == 26
+    keys = [(a['created_at'], a['action_id']) for a in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert seen[0]['details'] == {'i': 24, 'note': 'ünïcode "quoted"'}
+    assert seen[-1]['action_type'] == 'login' and seen[-1]['details'] is None
+
+    with app.app.app_context():
+        expected = UserAction.query.filter_by(user_id=user_id).order_by(UserAction.action_id).first().as_dict()
+    assert next(a for a in seen if a['action_id'] == expected['action_id']) == expected
+
+
+def test_limit_is_capped_and_bad_arguments_rejected(monkeypatch, fresh_db):
+    user_id = seed_actions()
+    client = app.app.test_client()
+    monkeypatch.setattr(app, 'ACTIONS_MAX_LIMIT', 10)
+    body = client.get(f'/api/user/{user_id}/actions?limit=1000000').get_json()
+    assert len(body['actions']) == 10 and body['has_more']
+    since = client.get(f'/api/user/{user_id}/actions?since=2025-03-01T00:10:00').get_json()
+    assert len(since['actions']) == 5
+    assert client.get(f'/api/user/{user_id}/actions?cursor=nonsense').status_code == 400
+    assert client.get(f'/api/user/{user_id}/actions?limit=ten').status_code == 400
+    assert client.get('/api/user/9999/actions').status_code == 404
+
+
+def test_export_streams_all_actions(monkeypatch, fresh_db):
+    user_id = seed_actions()
+    monkeypatch.setattr(app, 'ACTIONS_EXPORT_BATCH', 4)
+    client = app.app.test_client()
+    resp = client.get(f'/api/user/{user_id}/actions/export')
+    assert resp.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert len(lines) == 26 and len({a['action_id'] for a in lines}) == 26
+
+    as_json = client.get(f'/api/user/{user_id}/actions/export?format=json').get_json()
+    assert [a['action_id'] for a in as_json['actions']] == [a['action_id'] for a in lines]
+    assert client.get(f'/api/user/{user_id}/actions/export?format=xml').status_code == 400
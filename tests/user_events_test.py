@@ -0,0 +1,84 @@
+# user_events_test.py
+import json
+
+import pytest
+
+import app
+from app import db, UserCrop, event_hub, notification_service
+from event_hub import EventHub, TooManyConnections
+
+
+def next_events(chunks, n):
+    """Read chunks until n non-comment SSE events arrived; returns [(event, data)]"""
+    events = []
+    while len(events) < n:
+        chunk = next(chunks).decode()
+        for block in chunk.strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.split('\n') if ': ' in line and not line.startswith(':'))
+            if 'event' in fields:
+                events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_sends_snapshot_then_only_changed_topics(monkeypatch, seed_user, count_queries):
+    user_id = seed_user(2)
+    monkeypatch.setattr(app, 'SSE_HEARTBEAT_SECONDS', 0.05)
+    with app.app.app_context():
+        planting_id = UserCrop.query.filter_by(user_id=user_id).first().planting_id
+    resp = app.app.test_client().get(f'/api/crop/{planting_id}/events', buffered=False)
+    assert resp.mimetype == 'text/event-stream'
+    chunks = iter(resp.response)
+    assert next(chunks) == b'retry: 5000\n\n'
+    initial = dict(next_events(chunks, 3))
+    assert [c['planting_id'] for c in initial['crop_status']] == [planting_id]
+    assert initial['notifications']['unread_count'] == 1
+    assert {r['action'] for r in initial['recommendations']} == {'monitor', 'irrigate', 'pesticide'}
+
+    # Nothing changed: heartbeats only, no queries
+    with count_queries() as counter:
+        assert next(chunks) == b': heartbeat\n\n'
+    assert counter['count'] == 0
+
+    # A commit to the crop pushes crop_status; the recommendations payload is unchanged and not resent
+    with app.app.app_context():
+        crop = UserCrop.query.get(planting_id)
+        crop.pest_pressure_level = 'high'
+        db.session.commit()
+    (event, data), = next_events(chunks, 1)
+    assert event == 'crop_status' and data[0]['pest_level'] == 'high'
+    assert data[0]['health_score'] < initial['crop_status'][0]['health_score']
+
+    notification_service.notify(user_id, 'alert', 'Pests', 'high pest pressure', planting_id=planting_id)
+    (event, data), = next_events(chunks, 1)
+    assert event == 'notifications' and data['unread_count'] == 2
+
+    assert event_hub.stats()['open'] == 1
+    resp.close()
+    assert event_hub.stats()['open'] == 0
+
+
+def test_connection_cap():
+    hub = EventHub(max_connections=3, max_per_user=2)
+    subs = [hub.connect(1), hub.connect(1)]
+    with pytest.raises(TooManyConnections):
+        hub.connect(1)
+    subs.append(hub.connect(2))
+    with pytest.raises(TooManyConnections):
+        hub.connect(3)
+    subs[0].close()
+    subs[0].close()
+    hub.connect(3)
+    assert hub.stats()['open'] == 3 and hub.stats()['rejected'] == 2
+
+    hub.on_changes({2: {'user_crops'}, None: {'crops_master'}})
+    assert subs[2].wait(0) == {'user_crops', 'crops_master'}
+    assert subs[1].wait(0) == {'crops_master'}
+    assert subs[1].wait(0.01) == set()
+
+
+def test_over_cap_request_gets_503(monkeypatch, seed_user):
+    user_id = seed_user(1)
+    monkeypatch.setattr(app, 'event_hub', EventHub(max_connections=0))
+    resp = app.app.test_client().get(f'/api/user/{user_id}/events')
+    assert resp.status_code == 503 and resp.headers['Retry-After'] == '30'
+    assert app.app.test_client().get('/api/user/9999/events').status_code == 404
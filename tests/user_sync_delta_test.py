@@ -0,0 +1,109 @@
+# user_sync_delta_test.py
+import json
+from datetime import datetime, timedelta
+
+import app
+from app import db, User, UserCrop, UserAction, ImageAnalysis, ManualObservation, Recommendation
+
+
+def seed_history():
+    with app.app.app_context():
+        owner = User(username='delta', email='delta@example.com', password_hash='x')
+        other = User(username='noise', email='noise@example.com', password_hash='x')
+        db.session.add_all([owner, other])
+        db.session.flush()
+        crops = [UserCrop(user_id=u.user_id, crop_type='Tomato', planting_date=datetime.now().date())
+                 for u in (owner, owner, other)]
+        db.session.add_all(crops)
+        db.session.flush()
+        for i in range(7):
+            for crop in crops:
+                db.session.add(ImageAnalysis(planting_id=crop.planting_id, detected_disease='blight',
+                                             analysis_date=datetime(2025, 1, 1) + timedelta(hours=i)))
+                db.session.add(ManualObservation(planting_id=crop.planting_id, observation_date=datetime(2025, 1, 1).date(),
+                                                 pest_presence='low'))
+                db.session.add(UserAction(user_id=crop.user_id, planting_id=crop.planting_id, action_type='water',
+                                          details=json.dumps({'i': i})))
+        db.session.commit()
+        return owner.user_id, [c.planting_id for c in crops[:2]]
+
+
+def download_all(client, user_id, cursor='', limit=3):
+    rows = {'user_actions': [], 'image_analyses': [], 'manual_observations': []}
+    pages = 0
+    while True:
+        body = client.get(f'/api/user/{user_id}/sync?cursor={cursor}&limit={limit}').get_json()
+        pages += 1
+        for table, data in body['tables'].items():
+            rows[table].extend(dict(zip(data['columns'], r)) for r in data['rows'])
+        cursor = body['cursor']
+        if not body['has_more']:
+            return rows, cursor, pages
+
+
+def test_delta_pages_through_only_the_users_rows(count_queries, fresh_db):
+    user_id, mine = seed_history()
+    client = app.app.test_client()
+    with count_queries() as counter:
+        first = client.get(f'/api/user/{user_id}/sync?cursor=&limit=3')
+    assert counter['count'] == 4  # user lookup + one query per table
+    assert first.get_json()['has_more'] is True
+
+    rows, cursor, pages = download_all(client, user_id)
+    assert pages == 5
+    for table in rows:
+        assert len(rows[table]) == 14
+        assert {r['planting_id'] for r in rows[table]} == set(mine)
+    assert rows['user_actions'][0]['details'] == {'i': 0}
+    ids = [r['analysis_id'] for r in rows['image_analyses']]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+
+    # Nothing new: an up-to-date cursor returns empty tables
+    body = client.get(f'/api/user/{user_id}/sync?cursor={cursor}').get_json()
+    assert body['cursor'] == cursor and not body['has_more']
+    assert all(not t['rows'] for t in body['tables'].values())
+
+    with app.app.app_context():
+        db.session.add(UserAction(user_id=user_id, planting_id=mine[0], action_type='harvest'))
+        db.session.add(ManualObservation(planting_id=mine[1], observation_date=datetime.now().date()))
+        db.session.commit()
+    body = client.get(f'/api/user/{user_id}/sync?cursor={cursor}').get_json()
+    assert [r[2] for r in body['tables']['user_actions']['rows']] == ['harvest']
+    assert len(body['tables']['manual_observations']['rows']) == 1
+    assert body['tables']['image_analyses']['rows'] == []
+
+
+def test_bad_cursor_is_rejected_and_legacy_response_kept(fresh_db):
+    user_id, _ = seed_history()
+    client = app.app.test_client()
+    assert client.get(f'/api/user/{user_id}/sync?cursor=1.2').status_code == 400
+    assert client.get(f'/api/user/{user_id}/sync?cursor=a.b.c').status_code == 400
+    legacy = client.get(f'/api/user/{user_id}/sync').get_json()
+    assert set(legacy) == {'user_actions', 'image_analyses', 'manual_observations'}
+    assert len(legacy['image_analyses']) == 14
+
+
+def test_state_changes_are_not_in_the_delta_but_revalidate_the_dashboard(seed_user):
+    # Documented limitation: the delta only carries the append-only tables
+    user_id = seed_user(1)
+    client = app.app.test_client()
+    cursor = client.get(f'/api/user/{user_id}/sync?cursor=').get_json()['cursor']
+    etag = client.get(f'/api/user/{user_id}/dashboard').headers['ETag']
+    assert client.get(f'/api/user/{user_id}/dashboard', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app.app_context():
+        recommendation = Recommendation.query.first()
+        planting_id, recommendation_id = recommendation.planting_id, recommendation.recommendation_id
+    assert client.post(f'/api/crop/{planting_id}/implement-recommendation/{recommendation_id}').status_code == 200
+    assert client.post(f'/api/user/{user_id}/notifications/read', json={'all': True}).get_json()['marked'] == 1
+
+    body = client.get(f'/api/user/{user_id}/sync?cursor={cursor}').get_json()
+    # Only the log rows written along the way show up, not the recommendation or read flags
+    assert set(body['tables']) == set(app.SYNC_DELTA_TABLES)
+    notes = [r[5] for r in body['tables']['manual_observations']['rows']]
+    assert len(notes) == 1 and notes[0].startswith('Implemented recommendation')
+    resp = client.get(f'/api/user/{user_id}/dashboard', headers={'If-None-Match': etag})
+    assert resp.status_code == 200 and resp.headers['ETag'] != etag
+    dashboard = resp.get_json()
+    assert dashboard['summary']['unread_notifications'] == 0 and dashboard['notifications'] == []
+    assert len(dashboard['pending_recommendations']) == 2
@@ -0,0 +1,99 @@
+# user_sync_stream_test.py
+import json
+from datetime import datetime, timedelta
+
+import app
+from app import UserAction, ImageAnalysis
+
+
+def ndjson_records(planting_id, n):
+    start = datetime(2025, 5, 1)
+    lines = []
+    for seq in range(1, n + 1):
+        if seq % 2:
+            item = {'seq': seq, 'kind': 'detectionLogs',
+                    'record': {'planting_id': planting_id, 'detection_label': 'blight',
+                               'timestamp': (start + timedelta(minutes=seq)).isoformat()}}
+        else:
+            item = {'seq': seq, 'kind': 'quickActions', 'record': {'planting_id': planting_id, 'type': 'water'}}
+        lines.append(json.dumps(item))
+    return '\n'.join(lines) + '\n'
+
+
+def post_stream(client, user_id, body, stream_id='phone-1'):
+    resp = client.post(f'/api/user/{user_id}/sync', data=body, content_type='application/x-ndjson',
+                       headers={'X-Sync-Stream': stream_id})
+    assert resp.status_code == 200
+    return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+
+def test_stream_commits_in_chunks_with_checkpoints(monkeypatch, seed_sync_user):
+    monkeypatch.setattr(app, 'SYNC_STREAM_CHUNK', 100)
+    user_id, mine, _ = seed_sync_user()
+    client = app.app.test_client()
+    events = post_stream(client, user_id, ndjson_records(mine, 250) + 'not json\n')
+
+    assert events[0] == {'type': 'resume', 'stream_id': 'phone-1', 'cursor': 0}
+    checkpoints = [e for e in events if e['type'] == 'checkpoint']
+    assert [c['cursor'] for c in checkpoints] == [100, 200, 250]
+    assert checkpoints[0]['imported']['image_analyses'] == 50
+    summary = events[-1]
+    assert summary['type'] == 'summary' and summary['cursor'] == 250 and summary['invalid'] == 1
+    assert summary['imported']['user_actions'] == 250
+
+    checkpoint = client.get(f'/api/user/{user_id}/sync/checkpoint?stream_id=phone-1').get_json()
+    assert checkpoint['cursor'] == 250 and checkpoint['records'] == 250
+
+
+def test_failed_chunk_can_be_resumed_without_duplicates(monkeypatch, seed_sync_user):
+    monkeypatch.setattr(app, 'SYNC_STREAM_CHUNK', 100)
+    user_id, mine, _ = seed_sync_user()
+    client = app.app.test_client()
+    body = ndjson_records(mine, 250)
+
+    original = app.SyncImporter.import_payload
+    calls = {'n': 0}
+
+    def flaky(self, payload):
+        calls['n'] += 1
+        if calls['n'] == 2:
+            raise RuntimeError('disk full')
+        return original(self, payload)
+    monkeypatch.setattr(app.SyncImporter, 'import_payload', flaky)
+
+    events = post_stream(client, user_id, body)
+    assert events[-1] == {'type': 'error', 'error': 'disk full', 'cursor': 100}
+
+    # The client resends everything; records up to the cursor are skipped
+    events = post_stream(client, user_id, body)
+    assert events[0]['cursor'] == 100
+    assert events[-1]['already_acknowledged'] == 100
+    assert events[-1]['cursor'] == 250
+    with app.app.app_context():
+        assert UserAction.query.count() == 250
+        assert ImageAnalysis.query.filter_by(planting_id=mine).count() == 126  # 125 + the seeded analysis
+
+
+def test_seq_regressions_within_a_stream_are_rejected(monkeypatch, seed_sync_user):
+    monkeypatch.setattr(app, 'SYNC_STREAM_CHUNK', 2)
+    user_id, mine, _ = seed_sync_user()
+    client = app.app.test_client()
+    post_stream(client, user_id, ndjson_records(mine, 3))
+
+    lines = ndjson_records(mine, 8).splitlines()
+    body = '\n'.join(lines[i] for i in (1, 5, 4, 3, 6, 0, 7)) + '\n'  # seqs 2, 6, 5, 4, 7, 1, 8
+    events = post_stream(client, user_id, body)
+    errors = [e for e in events if e['type'] == 'error']
+    assert [(e['line'], e['seq']) for e in errors] == [(3, 5), (4, 4)]
+    summary = events[-1]
+    assert summary['already_acknowledged'] == 2 and summary['out_of_order'] == 2
+    assert summary['cursor'] == 8
+    with app.app.app_context():
+        # seqs 1-3 from the first post, then 6, 7 and 8
+        assert UserAction.query.count() == 6
+
+
+def test_stream_requires_stream_id(seed_sync_user):
+    user_id, _, _ = seed_sync_user()
+    resp = app.app.test_client().post(f'/api/user/{user_id}/sync', data='{}\n', content_type='application/x-ndjson')
+    assert resp.status_code == 400
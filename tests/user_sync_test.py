@@ -0,0 +1,59 @@
+# user_sync_test.py
+from datetime import datetime, timedelta
+
+import app
+from app import UserCrop, ImageAnalysis, ManualObservation, UserAction
+
+
+def detection(planting_id, label, ts):
+    return {'planting_id': planting_id, 'detection_label': label, 'detection_score': 0.9, 'timestamp': ts}
+
+
+def test_sync_dedupes_and_checks_ownership(seed_sync_user):
+    user_id, mine, theirs = seed_sync_user()
+    payload = {
+        'detectionLogs': [
+            detection(mine, 'blight', '2025-03-01T12:00:04'),   # duplicate of the stored analysis
+            detection(mine, 'blight', '2025-03-01T12:00:30'),
+            detection(str(mine), 'blight', '2025-03-01T12:00:33'),  # duplicate within this payload
+            detection(mine, 'rust', '2025-03-01T12:00:30'),
+            detection(theirs, 'blight', '2025-03-01T13:00:00'),  # not the user's planting
+            detection(None, 'blight', '2025-03-01T13:00:00'),
+        ],
+        'cropDetections': [{'planting_id': mine, 'pest_level': 'low', 'timestamp': '2025-03-02T08:00:00'},
+                           {'planting_id': theirs, 'pest_level': 'high'}],
+        'quickActions': [{'planting_id': mine, 'type': 'water'}],
+        'userCrops': [{'planting_id': mine, 'crop_type': 'Tomato'},
+                      {'crop_type': 'Okra', 'planting_date': '2025-02-01', 'expected_harvest_date': '2025-05-01'}]
+    }
+    resp = app.app.test_client().post(f'/api/user/{user_id}/sync', json=payload)
+    assert resp.status_code == 200
+    assert resp.get_json()['imported'] == {'image_analyses': 2, 'manual_observations': 1, 'user_actions': 4,
+                                           'user_crops': 1, 'skipped': 6}
+
+    with app.app.app_context():
+        labels = sorted((a.detected_disease, a.analysis_date.second) for a in ImageAnalysis.query.filter_by(planting_id=mine))
+        assert labels == [('blight', 0), ('blight', 30), ('rust', 30)]
+        assert ManualObservation.query.filter_by(planting_id=mine).one().observation_date.isoformat() == '2025-03-02'
+        assert [a.action_type for a in UserAction.query.order_by(UserAction.action_id)] == \
+            ['automatic_detection', 'automatic_detection', 'manual_observation', 'water']
+        okra = UserCrop.query.filter_by(crop_type='Okra').one()
+        assert okra.user_id == user_id and okra.expected_harvest_date.isoformat() == '2025-05-01'
+
+
+def test_sync_query_count_does_not_grow_with_payload(count_queries, seed_sync_user):
+    user_id, mine, _ = seed_sync_user()
+    client = app.app.test_client()
+    start = datetime(2025, 4, 1)
+    counts = []
+    for n in (10, 300):  # stays within one insert chunk per table
+        payload = {
+            'detectionLogs': [detection(mine, 'blight', (start + timedelta(minutes=i + n)).isoformat()) for i in range(n)],
+            'cropDetections': [{'planting_id': mine, 'pest_level': 'low'} for _ in range(n)],
+            'quickActions': [{'planting_id': mine, 'type': 'water'} for _ in range(n)]
+        }
+        with count_queries() as counter:
+            resp = client.post(f'/api/user/{user_id}/sync', json=payload)
+        assert resp.get_json()['imported']['image_analyses'] == n
+        counts.append(counter['count'])
+    assert counts[0] == counts[1]
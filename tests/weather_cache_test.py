@@ -0,0 +1,85 @@
+# weather_cache_test.py
+import threading
+import time
+
+import app
+from weather_cache import WeatherCache
+
+
+def make_service(stub, **cache_kwargs):
+    service = app.WeatherService(cache=WeatherCache(**cache_kwargs))
+    service.base_url = stub.url
+    return service
+
+
+def test_nearby_farms_share_one_upstream_call(stub):
+    service = make_service(stub, grid_deg=0.1)
+    first = service.get_weather(10.01, 76.02)
+    second = service.get_weather(10.03, 75.98)
+    assert first == second
+    assert first['weather_category'] == 'rainy' and first['temperature_category'] == 'warm'
+    assert stub.calls['weather'] == 1
+
+    service.get_weather(11.5, 76.0)
+    assert stub.calls['weather'] == 2
+    assert service.cache.stats()['hits'] == 1
+
+
+def test_concurrent_misses_are_coalesced(stub):
+    stub.delay = 0.2
+    service = make_service(stub)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get_forecast(9.9, 76.3))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert stub.calls['forecast'] == 1
+    assert len(results) == 8 and all(r == results[0] for r in results)
+    stats = service.cache.stats()
+    assert stats['coalesced'] == 7 and stats['hit_rate'] == 0.0
+
+
+def test_stale_entry_is_served_while_refreshing(stub):
+    service = make_service(stub, ttls={'current': 0, 'forecast': 3600}, stale_seconds=60)
+    service.get_weather(10.0, 76.0)
+    service.get_forecast(10.0, 76.0)
+    time.sleep(0.01)
+
+    stub.delay = 0.3
+    assert service.get_weather(10.0, 76.0)['description'] == 'light rain'
+    assert service.cache.stats()['in_flight'] == 1  # returned before the refresh finished
+    service.get_forecast(10.0, 76.0)
+
+    deadline = time.time() + 2
+    while service.cache.stats()['in_flight'] and time.time() < deadline:
+        time.sleep(0.02)
+    assert stub.calls == {'weather': 2, 'forecast': 1}
+    stats = service.cache.stats()
+    assert stats['stale_hits'] == 1 and stats['background_refreshes'] == 1
+
+
+def test_upstream_errors_fall_back_to_mock_and_are_not_cached(stub):
+    service = make_service(stub)
+    stub.fail = True
+    mock = service.get_weather(10.0, 76.0)
+    assert set(mock) >= {'temperature', 'weather_category'}
+    stub.fail = False
+    assert service.get_weather(10.0, 76.0)['description'] == 'light rain'
+    assert stub.calls['weather'] == 2
+    assert service.cache.stats()['upstream_errors'] == 1
+
+
+def test_callers_get_their_own_copy():
+    cache = WeatherCache()
+    calls = []
+
+    def fetch(lat, lon):
+        calls.append((lat, lon))
+        return {'temperature': 20.0, 'forecast': [{'temp': 21.0}]}
+
+    first = cache.get('current', 10.0, 76.0, fetch)
+    first['temperature'] = -5.0
+    first['forecast'][0]['temp'] = -5.0
+    assert cache.get('current', 10.0, 76.0, fetch) == {'temperature': 20.0, 'forecast': [{'temp': 21.0}]}
+    assert len(calls) == 1 and cache.stats()['hit_rate'] == 0.5
@@ -0,0 +1,69 @@
+# weather_client_test.py
+import time
+
+import pytest
+
+import app
+from weather_cache import WeatherCache
+from weather_client import CircuitBreaker, CircuitOpen, WeatherHTTPClient, OPEN, CLOSED
+
+
+def make_service(stub, breaker=None, cache=True):
+    client = WeatherHTTPClient(max_concurrency=4, timeout=2, breaker=breaker)
+    service = app.WeatherService(cache=WeatherCache() if cache else None, client=client)
+    service.base_url = stub.url
+    return service
+
+
+def test_current_and_forecast_are_fetched_concurrently(stub):
+    stub.delay = 0.25
+    service = make_service(stub)
+    current, forecast = service.get_weather_and_forecast(10.0, 76.0)
+    assert current['description'] == 'light rain'
+    assert len(forecast) == 4
+    assert stub.max_in_flight == 2
+
+
+def test_get_weather_many_calls_upstream_once_per_cell(stub):
+    service = make_service(stub)
+    locations = [(10.01, 76.0), (10.02, 76.01), (12.0, 77.0), (10.0, 76.0)]
+    results = service.get_weather_many(locations)
+    assert len(results) == 4
+    assert results[0] == results[1] == results[3]
+    assert stub.calls['weather'] == 2
+
+
+def test_open_circuit_falls_back_to_mock_without_calling_upstream(stub):
+    stub.fail = True
+    service = make_service(stub, breaker=CircuitBreaker(failure_threshold=2, reset_seconds=0.2), cache=False)
+    for _ in range(2):
+        service.get_weather(10.0, 76.0)
+    assert service.client.breaker.state == OPEN
+
+    mock = service.get_weather(10.0, 76.0)
+    assert 'temperature' in mock
+    assert stub.calls['weather'] == 2
+    assert service.client.breaker.stats()['rejected'] == 1
+
+    # After reset_seconds a single trial call closes the breaker again
+    stub.fail = False
+    time.sleep(0.25)
+    assert service.get_weather(10.0, 76.0)['description'] == 'light rain'
+    assert service.client.breaker.state == CLOSED
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+
+def test_client_raises_circuit_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    client = WeatherHTTPClient(breaker=breaker)
+    with pytest.raises(CircuitOpen):
+        client.get_json('http://127.0.0.1:9/never')
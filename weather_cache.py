@@ -0,0 +1,132 @@
+# =========================
+# LOCATION-GRIDDED WEATHER CACHE
+# =========================
+# Weather is cached per lat/lon grid cell so farms in the same district share
+# one upstream call. Each kind ('current', 'forecast') has its own TTL; after
+# the TTL an entry is still served for stale_seconds while one background
+# refresh runs. Concurrent misses for a cell wait on a single in-flight fetch.
+# Callers get their own deep copy of the cached value, so mutating a result
+# never leaks into other requests.
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """One in-progress upstream fetch that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class WeatherCache:
+    def __init__(self, grid_deg=0.1, ttls=None, stale_seconds=1800, max_entries=4096):
+        if grid_deg <= 0:
+            raise ValueError('grid_deg must be > 0')
+        self.grid_deg = float(grid_deg)
+        self.ttls = dict(ttls or {'current': 600, 'forecast': 3600})
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (kind, i, j) -> (value, fetched_at)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            'hits': 0, 'misses': 0, 'stale_hits': 0, 'coalesced': 0,
+            'upstream_calls': 0, 'upstream_errors': 0, 'background_refreshes': 0
+        }
+
+    # ---------- grid ----------
+    def cell(self, lat, lon):
+        """Integer grid indices for a location"""
+        return (int(round(float(lat) / self.grid_deg)), int(round(float(lon) / self.grid_deg)))
+
+    def cell_center(self, cell):
+        """Coordinates sent upstream for a cell, so every farm in it gets identical data"""
+        return (round(cell[0] * self.grid_deg, 6), round(cell[1] * self.grid_deg, 6))
+
+    # ---------- lookup ----------
+    def get(self, kind, lat, lon, fetch):
+        """Cached value for (kind, cell of lat/lon); fetch(lat, lon) is called on a miss.
+
+        fetch must raise on upstream failure so errors are never cached; on a
+        miss the exception reaches every waiting caller, a failed background
+        refresh just keeps the stale entry.
+        """
+        cell = self.cell(lat, lon)
+        key = (kind, cell[0], cell[1])
+        ttl = self.ttls.get(kind, 600)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[1]
+                if age <= ttl:
+                    self._entries.move_to_end(key)
+                    self.counters['hits'] += 1
+                    return copy.deepcopy(entry[0])
+                if age <= ttl + self.stale_seconds:
+                    self.counters['stale_hits'] += 1
+                    if key not in self._flights:
+                        flight = self._flights[key] = _Flight()
+                        self.counters['background_refreshes'] += 1
+                        threading.Thread(target=self._fetch, args=(key, cell, fetch, flight),
+                                         name='weather-refresh', daemon=True).start()
+                    return copy.deepcopy(entry[0])
+
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.counters['misses'] += 1
+                leader = True
+            else:
+                self.counters['coalesced'] += 1
+                leader = False
+
+        if leader:
+            self._fetch(key, cell, fetch, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return copy.deepcopy(flight.value)
+
+    def _fetch(self, key, cell, fetch, flight):
+        try:
+            flight.value = fetch(*self.cell_center(cell))
+        except Exception as e:
+            flight.error = e
+        with self._lock:
+            self.counters['upstream_calls'] += 1
+            if flight.error is None:
+                self._entries[key] = (flight.value, time.time())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self.counters['upstream_errors'] += 1
+            self._flights.pop(key, None)
+        flight.done.set()
+
+    # ---------- maintenance ----------
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            # coalesced callers waited on an upstream call, so they are not hits
+            served = self.counters['hits'] + self.counters['stale_hits']
+            lookups = served + self.counters['misses'] + self.counters['coalesced']
+            return dict(
+                self.counters,
+                entries=len(self._entries),
+                in_flight=len(self._flights),
+                hit_rate=round(served / lookups, 4) if lookups else 0.0,
+                grid_deg=self.grid_deg,
+                ttls=dict(self.ttls),
+                stale_seconds=self.stale_seconds
+            )
@@ -0,0 +1,96 @@
+# =========================
+# POOLED WEATHER HTTP CLIENT
+# =========================
+# One requests.Session (keep-alive connection pool) shared by all threads,
+# a semaphore bounding concurrent upstream calls and a circuit breaker that
+# rejects calls immediately while the API keeps failing, so callers can fall
+# back to mock data without waiting for timeouts.
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling upstream while the breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after failure_threshold consecutive failures; after reset_seconds
+    one trial call is let through (half-open) and its outcome closes or reopens it."""
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self):
+        with self._lock:
+            return {'state': self.state, 'consecutive_failures': self.failures, 'rejected': self.rejected}
+
+
+class WeatherHTTPClient:
+    def __init__(self, max_concurrency=8, timeout=10, breaker=None):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_concurrency = max_concurrency
+
+    def get_json(self, url):
+        """GET url and decode JSON; raises CircuitOpen, requests errors or ValueError on bad status"""
+        if not self.breaker.allow():
+            raise CircuitOpen('weather API circuit is open')
+        try:
+            with self._slots:
+                response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                raise ValueError(f"HTTP {response.status_code}")
+            data = response.json()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return data
+
+    def stats(self):
+        return {'max_concurrency': self.max_concurrency, 'breaker': self.breaker.stats()}